@@ -1,12 +1,135 @@
-import { exec } from 'child_process'
-import { promisify } from 'util'
+import { spawn } from 'child_process'
 import path from 'path'
 import fs from 'fs'
 import { NextRequest, NextResponse } from 'next/server'
 import { ScrapeResponse, WorkoutRecord } from '@/types/workout'
-import { extractSheetInfo } from '@/lib/scrape-helpers'
+import { decodeColumnarRecords, extractSheetInfo, isColumnarRecords } from '@/lib/scrape-helpers'
 
-const execAsync = promisify(exec)
+// When a long-lived scraper service is running (python scraper_api.py --serve),
+// scrapes go straight to it instead of spawning a Python process per request.
+const scraperServerUrl = process.env.SCRAPER_SERVER_URL
+
+const buildScraperErrorResponse = (errorMessage: string, details: string): ScrapeResponse => {
+  // Clean up the error message (remove newlines, extra spaces)
+  const cleaned = errorMessage.replace(/\n/g, ' ').replace(/\s+/g, ' ').trim()
+
+  return {
+    error: cleaned,
+    details,
+    suggestion: cleaned.includes('403') || cleaned.includes('Access denied') || cleaned.includes('not publicly')
+      ? 'Make sure the Google Sheet is shared with "Anyone with the link" can view.'
+      : cleaned.includes('404') || cleaned.includes('not found')
+      ? 'Verify the sheet ID and tab name are correct. The tab name must match exactly (case-sensitive).'
+      : 'Please check the sheet URL and tab name, and ensure the sheet is publicly accessible.'
+  }
+}
+
+const toWorkoutRecord = (record: any): WorkoutRecord => ({
+  user_id: record.user_id,
+  athlete_name: record.athlete_name,
+  program_name: record.program_name,
+  start_date: record.start_date,
+  week_number: record.week_number,
+  day_number: record.day_number,
+  exercise_number: record.exercise_number,
+  exercise_name: record.exercise_name,
+  exercise_category: record.category ? String(record.category) : null,
+  exercise_notes: record.notes ? String(record.notes) : null,
+  sets: record.sets,
+  reps: String(record.reps), // Ensure reps is a string
+  weights: record.weights,
+  percent: record.percent,
+  athlete_comments: null, // Will be added by users later
+  completed: record.completed ?? false // Default to false if not present
+})
+
+type ScraperCliResult = {
+  code: number | null
+  stderr: string
+  invalidOutput: string | null
+}
+
+// Runs the scraper CLI in NDJSON mode and hands over each record as soon as its
+// line arrives, so the output never has to fit in a single stdout buffer.
+const runScraperCli = (
+  pythonCmd: string,
+  args: string[],
+  cwd: string,
+  onRecord: (record: any) => void
+): Promise<ScraperCliResult> =>
+  new Promise((resolve, reject) => {
+    // stdin is closed: the scraper never waits for input from the route
+    const child = spawn(pythonCmd, args, { cwd, stdio: ['ignore', 'pipe', 'pipe'] })
+    let pending = ''
+    let stderr = ''
+    let invalidOutput: string | null = null
+
+    const handleLine = (line: string) => {
+      const trimmed = line.trim()
+      if (!trimmed) return
+      try {
+        onRecord(JSON.parse(trimmed))
+      } catch {
+        invalidOutput = invalidOutput ?? trimmed
+      }
+    }
+
+    child.stdout.setEncoding('utf8')
+    child.stdout.on('data', (chunk: string) => {
+      pending += chunk
+      const lines = pending.split('\n')
+      pending = lines.pop() ?? ''
+      lines.forEach(handleLine)
+    })
+    child.stderr.setEncoding('utf8')
+    child.stderr.on('data', (chunk: string) => {
+      stderr += chunk
+    })
+    child.on('error', reject)
+    child.on('close', (code) => {
+      handleLine(pending)
+      resolve({ code, stderr, invalidOutput })
+    })
+  })
+
+// Returns the service's JSON output, a ScrapeResponse for scrape errors, or null
+// when the service can't be reached so the caller can fall back to the CLI.
+const scrapeWithServer = async (
+  serverUrl: string,
+  args: { sheetId: string; tabName: string; athleteName: string; startDate: string }
+): Promise<{ stdout: string } | { error: ScrapeResponse } | null> => {
+  let res: Response
+  try {
+    res = await fetch(`${serverUrl.replace(/\/$/, '')}/scrape`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        sheet_id: args.sheetId,
+        tab_name: args.tabName,
+        athlete_name: args.athleteName,
+        start_date: args.startDate,
+        // Shared fields once and per-set arrays: a fraction of the array-of-records size
+        format: 'columnar'
+      })
+    })
+  } catch (fetchError) {
+    console.error('Scraper service unavailable, falling back to CLI:', fetchError)
+    return null
+  }
+
+  const text = await res.text()
+  if (!res.ok) {
+    let errorMessage = 'Failed to scrape sheet'
+    try {
+      errorMessage = JSON.parse(text).error || errorMessage
+    } catch {
+      // Non-JSON error body, keep the generic message
+    }
+    return { error: buildScraperErrorResponse(errorMessage, text) }
+  }
+
+  return { stdout: text }
+}
 
 export async function POST(request: NextRequest) {
   try {
@@ -40,122 +163,117 @@ export async function POST(request: NextRequest) {
     // Use the tab name from request (must be exact match)
     const targetTab = tabName.trim()
     
-    // Path to scraper script and venv
-    const scraperDir = path.join(process.cwd(), 'sheet-scraper')
-    const scraperPath = path.join(scraperDir, 'scraper_api.py')
-    const venvPython = path.join(scraperDir, 'venv', 'bin', 'python')
-    
-    // Check if scraper exists
-    if (!fs.existsSync(scraperPath)) {
-      return NextResponse.json(
-        { error: 'Scraper script not found' } as ScrapeResponse,
-        { status: 500 }
-      )
+    const records: WorkoutRecord[] = []
+    let stdout = ''
+    let stderr = ''
+    const serverResult = scraperServerUrl
+      ? await scrapeWithServer(scraperServerUrl, {
+          sheetId,
+          tabName: targetTab,
+          athleteName: athleteName?.trim() ?? '',
+          startDate: startDate.trim()
+        })
+      : null
+
+    if (serverResult && 'error' in serverResult) {
+      return NextResponse.json(serverResult.error, { status: 400 })
     }
+
+    if (serverResult) {
+      stdout = serverResult.stdout
+      try {
+        // Data is already in the correct format from Python, but we need to ensure types
+        const parsed = JSON.parse(stdout)
+        const serverRecords = isColumnarRecords(parsed) ? decodeColumnarRecords(parsed) : parsed
+        records.push(...serverRecords.map(toWorkoutRecord))
+      } catch (parseError) {
+        console.error('Failed to parse JSON output:', parseError)
+        return NextResponse.json(
+          {
+            error: 'Failed to parse scraper output',
+            details: stdout,
+            suggestion: 'The scraper may have returned invalid data. Check the scraper logs.'
+          } as ScrapeResponse,
+          { status: 500 }
+        )
+      }
+    } else {
+      // Path to scraper script and venv
+      const scraperDir = path.join(process.cwd(), 'sheet-scraper')
+      const scraperPath = path.join(scraperDir, 'scraper_api.py')
+      const venvPython = path.join(scraperDir, 'venv', 'bin', 'python')
     
-    // Use venv Python directly if available, otherwise use system python
-    const pythonCmd = fs.existsSync(venvPython) ? venvPython : 'python3'
+      // Check if scraper exists
+      if (!fs.existsSync(scraperPath)) {
+        return NextResponse.json(
+          { error: 'Scraper script not found' } as ScrapeResponse,
+          { status: 500 }
+        )
+      }
     
-    // Run the scraper with the sheet ID, tab name, athlete name, and start date
-    let stdout: string, stderr: string
-    const athleteNameArg = athleteName && athleteName.trim() ? `"${athleteName.trim()}"` : '""'
-    const startDateArg = `"${startDate.trim()}"`
-    console.log(`Running scraper: ${pythonCmd} "${scraperPath}" "${sheetId}" "${targetTab}" ${athleteNameArg} ${startDateArg}`)
-    try {
-      const result = await execAsync(
-        `${pythonCmd} "${scraperPath}" "${sheetId}" "${targetTab}" ${athleteNameArg} ${startDateArg}`,
-        { 
-          cwd: scraperDir,
-          maxBuffer: 1024 * 1024 * 10 // 10MB buffer
-        }
-      )
-      stdout = result.stdout
+      // Use venv Python directly if available, otherwise use system python
+      const pythonCmd = fs.existsSync(venvPython) ? venvPython : 'python3'
+    
+      // Run the scraper with the sheet ID, tab name, athlete name, and start date,
+      // streaming one record per line
+      const args = [
+        scraperPath,
+        '--format', 'ndjson',
+        '--',
+        sheetId,
+        targetTab,
+        athleteName?.trim() ?? '',
+        startDate.trim()
+      ]
+      console.log(`Running scraper: ${pythonCmd} ${args.map(arg => `"${arg}"`).join(' ')}`)
+      const result = await runScraperCli(pythonCmd, args, scraperDir, (record) => {
+        records.push(toWorkoutRecord(record))
+      })
       stderr = result.stderr
-      console.log('Scraper stdout:', stdout)
-      console.log('Scraper stderr:', stderr)
-    } catch (execError: any) {
-      // Extract error message from stderr or stdout
-      stderr = execError.stderr || ''
-      stdout = execError.stdout || ''
-      
-      // Parse the error message from Python output
-      let errorMessage = 'Failed to scrape sheet'
+
+      if (result.code !== 0) {
+        // Parse the error message from Python output
+        let errorMessage = 'Failed to scrape sheet'
       
-      if (stderr) {
-        // Look for the actual error message after "Error:"
-        const errorMatch = stderr.match(/Error:?\s*(.+)/i)
-        if (errorMatch) {
-          errorMessage = errorMatch[1].trim()
-        } else {
-          errorMessage = stderr.trim()
-        }
-      } else if (stdout) {
-        // Sometimes errors go to stdout
-        const errorMatch = stdout.match(/Error:?\s*(.+)/i)
-        if (errorMatch) {
-          errorMessage = errorMatch[1].trim()
+        if (stderr) {
+          // Look for the actual error message after "Error:"
+          const errorMatch = stderr.match(/Error:?\s*(.+)/i)
+          if (errorMatch) {
+            errorMessage = errorMatch[1].trim()
+          } else {
+            errorMessage = stderr.trim()
+          }
+        } else if (result.invalidOutput) {
+          // Sometimes errors go to stdout
+          const errorMatch = result.invalidOutput.match(/Error:?\s*(.+)/i)
+          if (errorMatch) {
+            errorMessage = errorMatch[1].trim()
+          }
         }
-      }
       
-      // Clean up the error message (remove newlines, extra spaces)
-      errorMessage = errorMessage.replace(/\n/g, ' ').replace(/\s+/g, ' ').trim()
-      
-      const response: ScrapeResponse = {
-        error: errorMessage,
-        details: stderr || stdout,
-        suggestion: errorMessage.includes('403') || errorMessage.includes('Access denied') || errorMessage.includes('not publicly')
-          ? 'Make sure the Google Sheet is shared with "Anyone with the link" can view.'
-          : errorMessage.includes('404') || errorMessage.includes('not found')
-          ? 'Verify the sheet ID and tab name are correct. The tab name must match exactly (case-sensitive).'
-          : 'Please check the sheet URL and tab name, and ensure the sheet is publicly accessible.'
+        return NextResponse.json(
+          buildScraperErrorResponse(errorMessage, stderr || result.invalidOutput || ''),
+          { status: 400 }
+        )
+      }
+
+      if (result.invalidOutput) {
+        console.error('Failed to parse scraper output line:', result.invalidOutput)
+        return NextResponse.json(
+          {
+            error: 'Failed to parse scraper output',
+            details: result.invalidOutput,
+            suggestion: 'The scraper may have returned invalid data. Check the scraper logs.'
+          } as ScrapeResponse,
+          { status: 500 }
+        )
       }
-      
-      return NextResponse.json(response, { status: 400 })
     }
-    
+
     if (stderr && !stderr.includes('Successfully')) {
       console.error('Scraper stderr:', stderr)
     }
 
-    // Parse JSON output from Python scraper
-    console.log('Scraper stdout length:', stdout.length)
-    console.log('Scraper stdout preview:', stdout.substring(0, 200))
-
-    let records: WorkoutRecord[]
-    try {
-      const parsedData = JSON.parse(stdout)
-
-      // Data is already in the correct format from Python, but we need to ensure types
-      records = parsedData.map((record: any) => ({
-        user_id: record.user_id,
-        athlete_name: record.athlete_name,
-        program_name: record.program_name,
-        start_date: record.start_date,
-        week_number: record.week_number,
-        day_number: record.day_number,
-        exercise_number: record.exercise_number,
-        exercise_name: record.exercise_name,
-        exercise_category: record.category ? String(record.category) : null,
-        exercise_notes: record.notes ? String(record.notes) : null,
-        sets: record.sets,
-        reps: String(record.reps), // Ensure reps is a string
-        weights: record.weights,
-        percent: record.percent,
-        athlete_comments: null, // Will be added by users later
-        completed: record.completed ?? false // Default to false if not present
-      }))
-    } catch (parseError) {
-      console.error('Failed to parse JSON output:', parseError)
-      return NextResponse.json(
-        {
-          error: 'Failed to parse scraper output',
-          details: stdout || stderr,
-          suggestion: 'The scraper may have returned invalid data. Check the scraper logs.'
-        } as ScrapeResponse,
-        { status: 500 }
-      )
-    }
-
     console.log('Parsed records count:', records.length)
 
     if (records.length === 0) {
@@ -1,5 +1,10 @@
 import { describe, expect, it } from 'vitest'
-import { buildScrapeErrorMessage, extractSheetInfo } from './scrape-helpers'
+import {
+  buildScrapeErrorMessage,
+  decodeColumnarRecords,
+  extractSheetInfo,
+  isColumnarRecords
+} from './scrape-helpers'
 
 describe('extractSheetInfo', () => {
   it('extracts sheet id and gid from a Google Sheets URL', () => {
@@ -28,3 +33,38 @@ describe('buildScrapeErrorMessage', () => {
     expect(message).toContain('Missing tab data')
   })
 })
+
+describe('decodeColumnarRecords', () => {
+  const payload = {
+    format: 'columnar' as const,
+    version: 1,
+    count: 3,
+    fields: ['athlete_name', 'week_number', 'exercise_name', 'reps', 'percent', 'completed'],
+    shared: { athlete_name: 'jane', completed: false },
+    dictionaries: { exercise_name: ['Snatch', 'Back Squat'] },
+    columns: {
+      week_number: [1, 1, 2],
+      exercise_name: [0, 1, 0],
+      reps: ['3', '5', '2'],
+      percent: [70, null, 80]
+    }
+  }
+
+  it('rebuilds records with shared fields and dictionary-encoded names', () => {
+    expect(decodeColumnarRecords(payload)).toEqual([
+      { athlete_name: 'jane', week_number: 1, exercise_name: 'Snatch', reps: '3', percent: 70, completed: false },
+      { athlete_name: 'jane', week_number: 1, exercise_name: 'Back Squat', reps: '5', percent: null, completed: false },
+      { athlete_name: 'jane', week_number: 2, exercise_name: 'Snatch', reps: '2', percent: 80, completed: false }
+    ])
+  })
+
+  it('keeps the original field order', () => {
+    expect(Object.keys(decodeColumnarRecords(payload)[0])).toEqual(payload.fields)
+  })
+
+  it('detects columnar payloads', () => {
+    expect(isColumnarRecords(payload)).toBe(true)
+    expect(isColumnarRecords([])).toBe(false)
+    expect(isColumnarRecords(null)).toBe(false)
+  })
+})
@@ -40,3 +40,41 @@ export const buildScrapeErrorMessage = (result: ScrapeResponse): string | null =
 
   return errorMsg
 }
+
+// Columnar scraper output (sheet-scraper/columnar.py): fields shared by every
+// record are sent once, the rest as parallel arrays, exercise names as indexes
+export type ColumnarRecords = {
+  format: 'columnar'
+  version: number
+  count: number
+  fields: string[]
+  shared: Record<string, unknown>
+  dictionaries: Record<string, unknown[]>
+  columns: Record<string, unknown[]>
+}
+
+export const isColumnarRecords = (payload: unknown): payload is ColumnarRecords =>
+  typeof payload === 'object' &&
+  payload !== null &&
+  (payload as ColumnarRecords).format === 'columnar'
+
+export const decodeColumnarRecords = (payload: ColumnarRecords): Record<string, unknown>[] => {
+  if (payload.version !== 1) {
+    throw new Error(`Unsupported columnar version ${payload.version}`)
+  }
+
+  const columns: Record<string, unknown[]> = { ...payload.columns }
+  for (const [field, values] of Object.entries(payload.dictionaries)) {
+    columns[field] = columns[field].map(position => values[position as number])
+  }
+
+  const records: Record<string, unknown>[] = []
+  for (let i = 0; i < payload.count; i++) {
+    const record: Record<string, unknown> = {}
+    for (const field of payload.fields) {
+      record[field] = field in payload.shared ? payload.shared[field] : columns[field][i]
+    }
+    records.push(record)
+  }
+  return records
+}
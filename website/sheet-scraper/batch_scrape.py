@@ -0,0 +1,145 @@
+"""
+Concurrent multi-sheet scraping.
+
+scrape_many() downloads sheets on a bounded thread pool and parses them on a
+process pool, yielding each job's records (or its error) as soon as it is
+done. Wall time for a batch is close to its slowest sheet instead of the sum.
+Jobs for the same sheet and tab (a roster sharing one template) share a single
+fetch and parse into a ParsedTemplate, which is then assigned to each job's
+athlete and start date.
+
+CLI: python scraper_api.py --batch manifest.jsonl   (use '-' for stdin)
+Each manifest line is {"sheet_id", "tab_name", "athlete_name", "start_date"};
+each output line is the job plus either "records" or "error".
+"""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from sheet_cache import SheetCache
+from sheet_grid import DEFAULT_ENGINE
+from records import ParsedTemplate, assign, restamp_api_records
+
+DEFAULT_FETCH_WORKERS = 8
+
+
+class ScrapeJob(NamedTuple):
+    sheet_id: str
+    tab_name: str = '4-Day Template'
+    athlete_name: str = ''
+    start_date: str = ''
+
+
+def read_manifest(lines: Iterable[str]) -> Iterator[ScrapeJob]:
+    """Jobs from JSON-lines manifest text, normalized the same way as single scrapes."""
+    from scraper_api import parse_scrape_request
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            payload = json.loads(line)
+            if not isinstance(payload, dict):
+                raise ValueError('expected a JSON object')
+            yield ScrapeJob(**parse_scrape_request(payload))
+        except ValueError as e:
+            raise ValueError(f"Invalid manifest line {line_number}: {e}")
+
+
+def _parse_job(body: bytes, encoding: Optional[str], tab_name: str, engine: str) -> ParsedTemplate:
+    """Runs in a parse worker process."""
+    import scraper_api
+    from sheet_grid import read_csv_grid
+
+    grid = read_csv_grid(body, engine, encoding)
+    return scraper_api.parse_template(grid, tab_name)
+
+
+def _group_jobs(jobs: List[ScrapeJob]) -> Dict[Tuple[str, str], List[int]]:
+    """Positions of the jobs for each (sheet_id, tab_name), in order of first appearance."""
+    groups = {}
+    for index, job in enumerate(jobs):
+        groups.setdefault((job.sheet_id, job.tab_name), []).append(index)
+    return groups
+
+
+def _result(index: int, job: ScrapeJob, records: Optional[List[Dict[str, Any]]] = None,
+            error: Optional[str] = None) -> Dict[str, Any]:
+    result = {'job': index}
+    result.update(job._asdict())
+    if error is not None:
+        result['error'] = error
+    else:
+        result['records'] = records
+    return result
+
+
+def scrape_many(jobs: Iterable[ScrapeJob], fetch_workers: int = DEFAULT_FETCH_WORKERS,
+                parse_workers: Optional[int] = None, engine: str = DEFAULT_ENGINE,
+                cache: Optional[SheetCache] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Scrape every job concurrently, yielding results in completion order.
+    Each result carries the job's position in `jobs` under 'job'.
+    """
+    import scraper_api
+
+    jobs = list(jobs)
+    if not jobs:
+        return
+
+    groups = _group_jobs(jobs)
+    parse_workers = parse_workers or min(len(groups), os.cpu_count() or 1)
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+        for key in groups:
+            future = fetch_pool.submit(scraper_api.fetch_sheet_csv, *key, cache)
+            pending[future] = ('fetch', key, None)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, key, fetched = pending.pop(future)
+                sheet_id, tab_name = key
+                stamp = [tab_name]
+
+                try:
+                    value = future.result()
+                except Exception as e:
+                    for index in groups[key]:
+                        yield _result(index, jobs[index], error=f"Error processing {tab_name}: {e}")
+                    continue
+
+                if stage == 'fetch':
+                    fetched = value
+                    records = cache.load_records(sheet_id, tab_name, fetched.content_hash, stamp) \
+                        if cache else None
+                    if records is None:
+                        parse_future = parse_pool.submit(_parse_job, fetched.body, fetched.encoding, tab_name, engine)
+                        pending[parse_future] = ('parse', key, fetched)
+                        continue
+                    for index in groups[key]:
+                        job = jobs[index]
+                        yield _result(index, job, restamp_api_records(records, job.athlete_name, job.start_date))
+                else:
+                    template = value
+                    if cache:
+                        cache.store_records(sheet_id, tab_name, fetched.content_hash, stamp, assign(template))
+                    for index in groups[key]:
+                        job = jobs[index]
+                        yield _result(index, job, assign(template, job.athlete_name, job.start_date))
+
+
+def write_results(results: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """Write results as NDJSON, flushing per line. Returns the number of failed jobs."""
+    failures = 0
+    for result in results:
+        if 'error' in result:
+            failures += 1
+        out.write(json.dumps(result, ensure_ascii=False) + '\n')
+        out.flush()
+    return failures
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Scraper benchmarks with regression gates.
+
+Times each stage of a scrape on generated sheets (see sheet_generator.py):
+
+    fetch       get_sheet_data() against a local stub of the Sheets CSV export
+    read_csv    read_csv_grid() with the csv engine
+    read_pandas read_csv_grid() with the pandas engine
+    parse       parse_template_sheet()
+    json        json.dumps() of the records
+    ndjson      write_ndjson() of the records
+    columnar    columnar encoding of the records
+
+Throughput is sheet cells per second for fetch/read/parse and records per
+second for the serializers. Results are compared with a JSON baseline saved
+on the same machine, and the run fails when any stage is slower than the
+baseline by more than the threshold. Baselines are machine-specific, so none
+is checked in (benchmarks/ is git-ignored): without one the run only reports.
+
+Usage:
+    python benchmark.py                 # compare with benchmarks/baseline.json, if saved
+    python benchmark.py --save          # record a new baseline
+    python benchmark.py --sizes small,medium --repeat 3 --threshold 0.3
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import platform
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+import scraper_api
+from sheet_grid import read_csv_grid
+from sheet_generator import generate_sheet
+from columnar import to_columnar, dumps
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'baseline.json')
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25
+MIN_SAMPLE_SECONDS = 0.02
+
+# name -> (weeks, days, exercises, sets)
+SIZES = {
+    'small': (4, 3, 4, 5),
+    'medium': (12, 4, 6, 6),
+    'large': (52, 5, 8, 8),
+}
+
+SERIALIZE_STAGES = ('json', 'ndjson', 'columnar')
+
+
+class _StubSheetHandler(BaseHTTPRequestHandler):
+    """Serves generated sheets at /spreadsheets/d/<sheet_id>/..."""
+
+    sheets: Dict[str, bytes] = {}
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without this, delayed ACKs add ~40ms per fetch
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        parts = self.path.split('/')
+        body = self.sheets.get(parts[3]) if len(parts) > 3 else None
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(sheets: Dict[str, bytes]) -> ThreadingHTTPServer:
+    handler = type('BoundStubSheetHandler', (_StubSheetHandler,), {'sheets': sheets})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _time(func: Callable[[], Any], repeat: int) -> float:
+    """
+    Seconds per call of func: the best of repeat samples, each looping func for
+    at least MIN_SAMPLE_SECONDS so sub-millisecond stages aren't timer noise.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= MIN_SAMPLE_SECONDS:
+            break
+        number *= 2
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+
+def run_benchmarks(sizes: List[str], repeat: int = DEFAULT_REPEAT) -> Dict[str, Any]:
+    """Time every stage for each named size."""
+    sheets = {name: generate_sheet(*SIZES[name]) for name in sizes}
+    server = start_stub_server({name: text.encode('utf-8') for name, text in sheets.items()})
+    base_url = scraper_api.SHEETS_BASE_URL
+    scraper_api.SHEETS_BASE_URL = f'http://127.0.0.1:{server.server_port}'
+
+    results = {}
+    try:
+        for name in sizes:
+            text = sheets[name]
+            body = text.encode('utf-8')
+            grid = read_csv_grid(body, 'csv')
+            records = scraper_api.parse_template_sheet(grid, 'Benchmark', 'athlete', '2026-01-05')
+            cells = len(grid) * grid.n_cols
+
+            stages = {
+                'fetch': lambda: scraper_api.get_sheet_data(name, 'Template', 'csv'),
+                'read_csv': lambda: read_csv_grid(body, 'csv'),
+                'read_pandas': lambda: read_csv_grid(body, 'pandas'),
+                'parse': lambda: scraper_api.parse_template_sheet(grid, 'Benchmark', 'athlete', '2026-01-05'),
+                'json': lambda: json.dumps(records, ensure_ascii=False),
+                'ndjson': lambda: scraper_api.write_ndjson(records, io.StringIO()),
+                'columnar': lambda: dumps(to_columnar(records)),
+            }
+
+            results[name] = {'shape': list(SIZES[name]), 'cells': cells, 'records': len(records), 'stages': {}}
+            for stage, func in stages.items():
+                seconds = _time(func, repeat)
+                units = len(records) if stage in SERIALIZE_STAGES else cells
+                results[name]['stages'][stage] = {
+                    'seconds': seconds,
+                    'throughput': units / seconds if seconds > 0 else float('inf'),
+                }
+    finally:
+        scraper_api.SHEETS_BASE_URL = base_url
+        server.shutdown()
+        server.server_close()
+
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Descriptions of every stage whose throughput fell more than threshold below the baseline."""
+    regressions = []
+    for name, result in current['results'].items():
+        base_result = baseline.get('results', {}).get(name)
+        if not base_result:
+            continue
+        for stage, timing in result['stages'].items():
+            base_timing = base_result['stages'].get(stage)
+            if not base_timing:
+                continue
+            ratio = timing['throughput'] / base_timing['throughput']
+            if ratio < 1 - threshold:
+                regressions.append(f"{name}/{stage}: {ratio:.0%} of baseline throughput "
+                                   f"({timing['seconds'] * 1000:.2f}ms vs {base_timing['seconds'] * 1000:.2f}ms)")
+    return regressions
+
+
+def print_report(current: Dict[str, Any], baseline: Optional[Dict[str, Any]], out=sys.stdout):
+    for name, result in current['results'].items():
+        weeks, days, exercises, sets = result['shape']
+        print(f"{name}: {weeks} weeks x {days} days x {exercises} exercises x {sets} sets, "
+              f"{result['cells']} cells, {result['records']} records", file=out)
+        base_stages = (baseline or {}).get('results', {}).get(name, {}).get('stages', {})
+        for stage, timing in result['stages'].items():
+            line = f"  {stage:<12} {timing['seconds'] * 1000:9.2f}ms  {timing['throughput']:14,.0f}/s"
+            if stage in base_stages:
+                ratio = timing['throughput'] / base_stages[stage]['throughput']
+                line += f"  {ratio:6.0%} of baseline"
+            print(line, file=out)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Benchmark the sheet scraper and check for regressions.')
+    parser.add_argument('--sizes', default=','.join(SIZES),
+                        help=f"Comma-separated sizes to run ({', '.join(SIZES)})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Timed runs per stage')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed throughput drop before failing, as a fraction (0.25 = 25%%)')
+    parser.add_argument('--save', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--output', default=None, help='Also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    current = run_benchmarks(sizes, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2)
+            f.write('\n')
+        print_report(current, None)
+        print(f"\nSaved baseline to {args.baseline}")
+        return
+
+    baseline = None
+    try:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        print(f"No baseline at {args.baseline}; run with --save to record one", file=sys.stderr)
+
+    print_report(current, baseline)
+    if baseline is None:
+        return
+
+    regressions = compare(current, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressions past {args.threshold:.0%}:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        sys.exit(1)
+    print(f"\nNo regressions past {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
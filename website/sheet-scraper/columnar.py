@@ -0,0 +1,96 @@
+"""
+Compact columnar encoding of scraped records.
+
+Every record repeats the same user_id, athlete_name, program_name, start_date
+and completed values. The columnar form sends fields whose value is the same in
+every record once under "shared", keeps the remaining fields as parallel arrays
+under "columns", and replaces exercise names with indexes into a dictionary:
+
+    {
+      "format": "columnar", "version": 1, "count": 2,
+      "fields": ["user_id", ..., "completed"],
+      "shared": {"user_id": "1", "athlete_name": "jane", ...},
+      "dictionaries": {"exercise_name": ["Snatch", "Back Squat"]},
+      "columns": {"week_number": [1, 1], "exercise_name": [0, 1], ...}
+    }
+
+from_columnar() rebuilds the exact records, keys in their original order.
+"""
+
+import json
+from typing import Any, Dict, List
+
+try:
+    import orjson
+except ImportError:  # Optional; the stdlib encoder produces the same JSON, just slower
+    orjson = None
+
+COLUMNAR_FORMAT = 'columnar'
+COLUMNAR_VERSION = 1
+
+# Low-cardinality string fields sent as indexes into a list of distinct values
+DICTIONARY_FIELDS = ('exercise_name',)
+
+
+def dumps(value: Any) -> str:
+    """Compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value).decode('utf-8')
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _same(a: Any, b: Any) -> bool:
+    # Stricter than ==, which would treat 1, 1.0 and True as one shared value
+    return type(a) is type(b) and a == b
+
+
+def to_columnar(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Encode records that all have the same fields."""
+    fields = list(records[0]) if records else []
+    for record in records:
+        if len(record) != len(fields) or any(field not in record for field in fields):
+            raise ValueError('Columnar output needs every record to have the same fields')
+
+    shared = {}
+    columns = {}
+    dictionaries = {}
+    for field in fields:
+        values = [record[field] for record in records]
+        first = values[0]
+        if all(_same(value, first) for value in values):
+            shared[field] = first
+        elif field in DICTIONARY_FIELDS:
+            positions = {}
+            columns[field] = [positions.setdefault(value, len(positions)) for value in values]
+            dictionaries[field] = list(positions)
+        else:
+            columns[field] = values
+
+    return {
+        'format': COLUMNAR_FORMAT,
+        'version': COLUMNAR_VERSION,
+        'count': len(records),
+        'fields': fields,
+        'shared': shared,
+        'dictionaries': dictionaries,
+        'columns': columns,
+    }
+
+
+def from_columnar(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Decode a to_columnar() payload back into records."""
+    if payload.get('format') != COLUMNAR_FORMAT or payload.get('version') != COLUMNAR_VERSION:
+        raise ValueError('Not a columnar scrape payload')
+
+    shared = payload['shared']
+    columns = dict(payload['columns'])
+    for field, values in payload['dictionaries'].items():
+        columns[field] = [values[position] for position in columns[field]]
+
+    records = []
+    for i in range(payload['count']):
+        records.append({
+            field: shared[field] if field in shared else columns[field][i]
+            for field in payload['fields']
+        })
+    return records
@@ -0,0 +1,228 @@
+"""
+Exercise label normalizer.
+
+Maps an exercise label ('Clean & Jerk', 'Pause Squat (BS)', 'Front Squat (3s)')
+to a canonical name and a lift category. An Aho-Corasick automaton built once per
+process over the lowercased alias table finds every lift keyword and alias in
+a label in a single pass, and results are memoized per label.
+
+- Lift keywords (snatch, clean, jerk, squat, pull, press, push, curl) match
+  anywhere, even inside a word ('Pullover' is a pull). A label with none is
+  not a lift. The category is the first keyword of LIFT_KEYWORDS in the
+  canonical name, so 'Snatch Pull' and 'Push Jerk' are prescribed from the
+  snatch and the jerk.
+- Aliases only match whole words: 'BS' is a back squat in 'Pause Squat (BS)'
+  but not in 'BSS Squat' or 'ABS'. When several are found the longest wins,
+  then the leftmost, so 'Clean & Jerk + Front Squat' is a clean and jerk.
+  Aliases only rename: a label is still a lift only if it has a keyword
+  ('FS Pause Squat' is a front squat, 'Pause BS' and 'FS' are not lifts).
+- Exercise library names (load_library) match the whole label only, ignoring
+  case and spacing, and give the label the library's spelling. That way
+  'power clean' reads 'Power Clean' without a library entry like 'Snatch'
+  swallowing 'Snatch Balance'.
+
+Labels that match no alias or library name keep their text.
+
+    >>> normalizer = ExerciseNormalizer()
+    >>> normalizer.normalize('Pause Squat (BS)')
+    ExerciseMatch(name='Back Squat', category='Squat')
+    >>> normalizer.normalize('BSS Squat')
+    ExerciseMatch(name='BSS Squat', category='Squat')
+    >>> normalizer.normalize('Pause BS') is None
+    True
+"""
+
+import os
+import json
+import hashlib
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+CACHE_SIZE = 4096
+
+# JSON file of exercise library entries (names, or {"name", "aliases"} objects)
+LIBRARY_ENV = 'SCRAPER_EXERCISE_LIBRARY'
+
+# In priority order for the category
+LIFT_KEYWORDS = [
+    ('snatch', 'Snatch'),
+    ('clean', 'Clean'),
+    ('jerk', 'Jerk'),
+    ('squat', 'Squat'),
+    ('pull', 'Pull'),
+    ('press', 'Press'),
+    ('push', 'Push'),
+    ('curl', 'Curl'),
+]
+
+# Canonical name -> the ways coaches write it
+DEFAULT_ALIASES = {
+    'Clean and Jerk': ['Clean & Jerk', 'Clean and Jerk'],
+    'Snatch Pull': ['Snatch Pull'],
+    'Clean Pull': ['Clean Pull'],
+    'Front Squat': ['Front Squat', 'FS'],
+    'Back Squat': ['Back Squat', 'BS'],
+}
+
+
+class ExerciseMatch(NamedTuple):
+    name: str
+    category: str
+
+
+class _Automaton:
+    """Aho-Corasick matcher over a fixed set of lowercase patterns."""
+
+    def __init__(self, patterns: List[str]):
+        self.patterns = patterns
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail = [0]
+        # Pattern indexes ending at each state, including those reached through fail links
+        self._out: List[List[int]] = [[]]
+
+        for pattern_idx, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                child = self._goto[state].get(char)
+                if child is None:
+                    child = self._goto[state][char] = self._new_state()
+                state = child
+            self._out[state].append(pattern_idx)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _new_state(self) -> int:
+        self._goto.append({})
+        self._fail.append(0)
+        self._out.append([])
+        return len(self._goto) - 1
+
+    def matches(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """(start, end, pattern index) of every occurrence of every pattern in text."""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_idx in out[state]:
+                yield end - len(patterns[pattern_idx]), end, pattern_idx
+
+
+def _is_word_edge(text: str, pos: int) -> bool:
+    """True if text[pos], the character next to a match, doesn't continue its word."""
+    return pos < 0 or pos >= len(text) or not text[pos].isalnum()
+
+
+def _library_key(name: str) -> str:
+    return ' '.join(name.lower().split())
+
+
+class ExerciseNormalizer:
+    """Canonical names and categories for exercise labels; build once and reuse."""
+
+    def __init__(self, aliases: Optional[Dict[str, Iterable[str]]] = None,
+                 library_names: Iterable[str] = (), cache_size: int = CACHE_SIZE):
+        aliases = DEFAULT_ALIASES if aliases is None else {canonical: list(names) for canonical, names in aliases.items()}
+        library_names = [name for name in library_names if name and name.strip()]
+        # Identifies the configuration, so results cached from another one aren't reused
+        self.fingerprint = hashlib.sha256(
+            json.dumps([aliases, library_names], ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+
+        # Pattern -> [keyword rank, canonical name]; either may be None
+        targets: Dict[str, List[Any]] = {}
+        for rank, (keyword, _) in enumerate(LIFT_KEYWORDS):
+            targets[keyword] = [rank, None]
+        for canonical, names in aliases.items():
+            for alias in names:
+                target = targets.setdefault(alias.lower(), [None, None])
+                if target[1] is None:
+                    target[1] = canonical
+        self._automaton = _Automaton(list(targets))
+        self._targets = list(targets.values())
+
+        self._library = {_library_key(name): name for name in library_names}
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def _keyword_rank(self, text: str) -> int:
+        ranks = [self._targets[pattern_idx][0] for _, _, pattern_idx in self._automaton.matches(text.lower())]
+        return min((rank for rank in ranks if rank is not None), default=len(LIFT_KEYWORDS))
+
+    def _normalize(self, label: str) -> Optional[ExerciseMatch]:
+        """(canonical name, category) for a lift label, or None if the label names no lift."""
+        text = label.lower()
+        category_rank = len(LIFT_KEYWORDS)
+        best = None  # (length, -start, canonical)
+
+        for start, end, pattern_idx in self._automaton.matches(text):
+            rank, canonical = self._targets[pattern_idx]
+            if rank is not None:
+                category_rank = min(category_rank, rank)
+            if canonical is not None and _is_word_edge(text, start - 1) and _is_word_edge(text, end):
+                candidate = (end - start, -start, canonical)
+                if best is None or candidate[:2] > best[:2]:
+                    best = candidate
+
+        if category_rank == len(LIFT_KEYWORDS):
+            return None
+
+        name = self._library.get(_library_key(label))
+        if name is None:
+            name = best[2] if best else label
+        if name != label:
+            # A renamed label takes its new name's category ('Clean + FS' is a squat)
+            name_rank = self._keyword_rank(name)
+            if name_rank < len(LIFT_KEYWORDS):
+                category_rank = name_rank
+        return ExerciseMatch(name, LIFT_KEYWORDS[category_rank][1])
+
+
+def load_library(path: str) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Exercise names and extra aliases from a JSON export of the exercise library:
+    a list of names, or of {"name": ..., "aliases": [...]} objects.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        raise Exception(f"Error loading exercise library {path}: {e}")
+
+    names = []
+    aliases = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if isinstance(entry, str):
+            names.append(entry)
+        elif isinstance(entry, dict) and entry.get('name'):
+            names.append(entry['name'])
+            if entry.get('aliases'):
+                aliases[entry['name']] = [str(alias) for alias in entry['aliases']]
+    return names, aliases
+
+
+_normalizer = None
+
+
+def get_normalizer() -> ExerciseNormalizer:
+    """The process-wide normalizer, seeded from SCRAPER_EXERCISE_LIBRARY when it is set."""
+    global _normalizer
+    if _normalizer is None:
+        library_names, aliases = [], dict(DEFAULT_ALIASES)
+        path = os.environ.get(LIBRARY_ENV)
+        if path:
+            library_names, extra = load_library(path)
+            for canonical, names in extra.items():
+                aliases[canonical] = list(aliases.get(canonical, [])) + names
+        _normalizer = ExerciseNormalizer(aliases, library_names)
+    return _normalizer
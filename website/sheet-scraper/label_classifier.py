@@ -0,0 +1,98 @@
+"""
+Label cell classifier shared by scraper.py and scraper_api.py.
+
+Maps the text of a label cell (the first column of a week block) to its kind
+and, for exercises, the normalized exercise name and lift category (see
+exercise_names.py). The rules are compiled once and results are memoized, so
+each distinct label string is classified once per process no matter how many
+weeks repeat it.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from exercise_names import get_normalizer
+
+# Label kinds
+DAY = 'day'
+COMMENTS = 'comments'
+ACCESSORIES = 'accessories'
+READINESS = 'readiness'
+IGNORED = 'ignored'
+TOTAL = 'total'
+EXERCISE = 'exercise'
+OTHER = 'other'
+
+CACHE_SIZE = 4096
+
+DAY_PATTERN = re.compile(r'[Dd]ay\s+(\d+)')
+
+# Checked in order; the first matching rule decides the kind. Labels matching
+# none are EXERCISE if the exercise normalizer finds a lift in them.
+KIND_RULES = [
+    (COMMENTS, re.compile(r'Athlete Comments')),
+    (ACCESSORIES, re.compile(r'Accessories')),
+    (READINESS, re.compile(r'Rate Your Readiness')),
+    (IGNORED, re.compile(r'Split Squats|Leaps')),
+    (TOTAL, re.compile(r'Total')),
+]
+
+# Labels that end the exercise list following an accessories header
+ACCESSORY_STOP_PATTERN = re.compile(r'Snatch|Clean|Jerk|Squat|Total|Accessories|Athlete Comments')
+NUMBER_PATTERN = re.compile(r'^\d+\.?\d*%?$')
+
+
+class LabelInfo(NamedTuple):
+    kind: str
+    # Normalized name and lift category ('Snatch', 'Squat', ...), set for EXERCISE labels
+    exercise_name: Optional[str]
+    exercise_category: Optional[str]
+    # Set for DAY labels
+    day_number: Optional[int]
+    # Accessories parsing: does this label end the accessory list, or name an accessory?
+    ends_accessories: bool
+    is_accessory_name: bool
+
+
+def normalize_exercise_name(text: str) -> str:
+    """Map lift label variants ('Clean & Jerk', 'FS', ...) to canonical names."""
+    match = get_normalizer().normalize(text)
+    return match.name if match else text
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_label(text: str) -> LabelInfo:
+    """Classify a stripped label cell."""
+    day_match = DAY_PATTERN.search(text)
+
+    kind = OTHER
+    exercise = None
+    if day_match:
+        kind = DAY
+    else:
+        for rule_kind, pattern in KIND_RULES:
+            if pattern.search(text):
+                kind = rule_kind
+                break
+        else:
+            exercise = get_normalizer().normalize(text)
+            if exercise:
+                kind = EXERCISE
+
+    ends_accessories = day_match is not None or ACCESSORY_STOP_PATTERN.search(text) is not None
+    is_accessory_name = (
+        not ends_accessories
+        and len(text) > 2
+        and not NUMBER_PATTERN.match(text)
+        and '%' not in text
+    )
+
+    return LabelInfo(
+        kind,
+        exercise.name if exercise else None,
+        exercise.category if exercise else None,
+        int(day_match.group(1)) if day_match else None,
+        ends_accessories,
+        is_accessory_name
+    )
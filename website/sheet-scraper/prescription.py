@@ -0,0 +1,139 @@
+"""
+Load prescription for a roster.
+
+A template prescribes its main sets as a percent of a lift's 1RM; the weights
+in the sheet are for whoever the sheet was written for. prescribe() turns a
+parsed template into every athlete's weights at once: the percents of the
+template's sets form a vector, the athletes' 1RMs an (athlete x lift) matrix
+with the lifts of extract_exercise_weights as columns, and
+
+    weights = one_rep_maxes[:, set_lifts] * percents / 100
+
+is a single NumPy broadcast, rounded to the plate increment. A set without a
+percent keeps the sheet's weight. A set with one whose exercise isn't
+prescribed from a 1RM column (see training_load.exercise_lift), or whose
+athlete has no 1RM for that lift, gets a null weight: the sheet's weight is
+its author's, not the athlete's.
+
+CLI: python scraper_api.py <sheet_id> [tab_name] "" [start_date] --roster roster.json
+where roster.json maps athlete names to {lift: 1RM} objects.
+"""
+
+import json
+import math
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+from records import ParsedTemplate, SetRecord, assign
+from training_load import exercise_lift
+
+# The 1RM row of a sheet, in column order (see extract_exercise_weights)
+LIFTS = ['Snatch', 'Clean', 'Jerk', 'Clean and Jerk', 'Back Squat', 'Front Squat']
+
+DEFAULT_INCREMENT = 1.0
+ROUNDING = {
+    'nearest': lambda units: np.floor(units + 0.5),
+    'down': np.floor,
+    'up': np.ceil,
+}
+DEFAULT_ROUNDING = 'nearest'
+
+Roster = Dict[str, Dict[str, float]]
+
+
+class Prescription(NamedTuple):
+    """Prescribed weights: one row per athlete, one column per set in set_indexes."""
+    athletes: List[str]
+    # Positions in template.records of the sets with a percent
+    set_indexes: List[int]
+    # NaN where the set has no 1RM lift or the athlete has no 1RM for it
+    weights: np.ndarray
+
+
+def one_rep_max_matrix(roster: Roster) -> Tuple[List[str], List[str], np.ndarray]:
+    """(athletes, lifts, athlete x lift 1RMs), NaN for missing or non-positive 1RMs."""
+    athletes = list(roster)
+    lifts = list(LIFTS)
+    for maxes in roster.values():
+        lifts.extend(lift for lift in maxes if lift not in lifts)
+
+    matrix = np.full((len(athletes), len(lifts)), np.nan)
+    columns = {lift: col for col, lift in enumerate(lifts)}
+    for row, maxes in enumerate(roster.values()):
+        for lift, value in maxes.items():
+            if value is not None and value > 0:
+                matrix[row, columns[lift]] = value
+    return athletes, lifts, matrix
+
+
+def round_to_plates(weights: np.ndarray, increment: float = DEFAULT_INCREMENT,
+                    rounding: str = DEFAULT_ROUNDING) -> np.ndarray:
+    """Round weights to multiples of the smallest plate increment (NaN stays NaN)."""
+    if rounding not in ROUNDING:
+        raise ValueError(f"Unknown rounding '{rounding}'. Expected one of: {', '.join(ROUNDING)}")
+    if not increment or increment <= 0:
+        return weights
+    # Rounded again so multiples of increments like 0.1 don't print as 72.30000000000001
+    return np.round(ROUNDING[rounding](weights / increment) * increment, 6)
+
+
+def prescribe(template: ParsedTemplate, roster: Roster, increment: float = DEFAULT_INCREMENT,
+              rounding: str = DEFAULT_ROUNDING) -> Prescription:
+    """Every athlete's weight for every percent-based set of the template, in one broadcast."""
+    athletes, lifts, matrix = one_rep_max_matrix(roster)
+    columns = {lift: col for col, lift in enumerate(lifts)}
+    # Sets whose exercise has no 1RM lift read this all-NaN column
+    no_lift = len(lifts)
+    matrix = np.hstack([matrix, np.full((len(athletes), 1), np.nan)])
+
+    set_indexes, set_lifts, percents = [], [], []
+    lift_of = {}
+    for position, record in enumerate(template.records):
+        if type(record) is not SetRecord or record.percent is None:
+            continue
+        name = record.exercise_name
+        if name not in lift_of:
+            lift_of[name] = exercise_lift(name, columns)
+        set_indexes.append(position)
+        set_lifts.append(no_lift if lift_of[name] is None else columns[lift_of[name]])
+        percents.append(record.percent)
+
+    weights = matrix[:, np.array(set_lifts, dtype=np.int64)] * (np.array(percents, dtype=np.float64) / 100)
+    return Prescription(athletes, set_indexes, round_to_plates(weights, increment, rounding))
+
+
+def iter_roster_records(template: ParsedTemplate, roster: Roster, start_date: str = '',
+                        increment: float = DEFAULT_INCREMENT,
+                        rounding: str = DEFAULT_ROUNDING) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the template's API records for each athlete of the roster in turn, with
+    their weights (None for percent sets that can't be prescribed for them).
+    """
+    prescription = prescribe(template, roster, increment, rounding)
+    for athlete_name, weights in zip(prescription.athletes, prescription.weights.tolist()):
+        records = assign(template, athlete_name, start_date)
+        for position, weight in zip(prescription.set_indexes, weights):
+            records[position]['weights'] = None if math.isnan(weight) else weight
+        yield from records
+
+
+def load_roster(path: str) -> Roster:
+    """A roster from a JSON file: {athlete name: {lift: 1RM}}."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+    except (OSError, ValueError) as e:
+        raise Exception(f"Error loading roster {path}: {e}")
+
+    if not isinstance(payload, dict):
+        raise Exception(f"Error loading roster {path}: expected an object of athlete names")
+    roster = {}
+    for athlete_name, maxes in payload.items():
+        if not isinstance(maxes, dict):
+            raise Exception(f"Error loading roster {path}: 1RMs of {athlete_name} should be an object")
+        try:
+            roster[athlete_name] = {str(lift): float(value) for lift, value in maxes.items() if value is not None}
+        except (TypeError, ValueError):
+            raise Exception(f"Error loading roster {path}: 1RMs of {athlete_name} should be numbers")
+    return roster
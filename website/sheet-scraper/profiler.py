@@ -0,0 +1,156 @@
+"""
+Opt-in per-stage profiling for a scrape (--profile).
+
+Instrumented code asks get_profiler() for the active profiler and wraps its
+stages in profiler.stage(name). Until enable_profiling() is called that is a
+shared no-op profiler, so the instrumentation costs a function call per stage.
+
+The report is JSON on stderr, never stdout, so callers parsing the scraper's
+output are unaffected:
+
+    {
+      "total": {"wall_s", "cpu_s"},
+      "stages": {"fetch": {"wall_s", "cpu_s", "calls"}, ...},
+      "weeks": [{"week_number", "start_col", "end_col", "wall_s", "cpu_s", "rows", "cells", "records"}],
+      "sheet": {"rows", "cols", "cells"},
+      "rows_scanned", "cells_scanned", "records",
+      "peak_memory_bytes"
+    }
+
+Stage times exclude any stage nested inside them. Output stages consume the
+parse lazily, so their own time is serialization only. "sheet" is the size of
+the grid read; rows_scanned and cells_scanned add up the week blocks parsed
+from it (see add_week), so the sheet itself is not counted again.
+"""
+
+import sys
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+
+class Profiler:
+    """Collects stage timings, per-week stats and peak traced memory."""
+
+    enabled = True
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.weeks = []
+        self.sheet: Optional[Dict[str, int]] = None
+        self.counters = {'rows_scanned': 0, 'cells_scanned': 0, 'records': 0}
+        # Wall/CPU time of the stages nested in each open stage
+        self._nested = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, float]]:
+        """Time the block; the yielded dict holds its wall_s/cpu_s once it exits."""
+        timing = {}
+        nested = [0.0, 0.0]
+        self._nested.append(nested)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield timing
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            self._nested.pop()
+            if self._nested:
+                self._nested[-1][0] += wall
+                self._nested[-1][1] += cpu
+
+            entry = self.stages.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0})
+            entry['wall_s'] += wall - nested[0]
+            entry['cpu_s'] += cpu - nested[1]
+            entry['calls'] += 1
+            timing['wall_s'] = wall
+            timing['cpu_s'] = cpu
+
+    def count(self, counter: str, amount: int):
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def set_sheet(self, rows: int, cols: int):
+        self.sheet = {'rows': rows, 'cols': cols, 'cells': rows * cols}
+
+    def add_week(self, week_num: int, start_col: int, end_col: int, timing: Dict[str, float],
+                 rows: int, cells: int, records: int):
+        """A parsed week block; the one place scans and records of a parse are counted."""
+        self.weeks.append({
+            'week_number': week_num,
+            'start_col': start_col,
+            'end_col': end_col,
+            'wall_s': timing['wall_s'],
+            'cpu_s': timing['cpu_s'],
+            'rows': rows,
+            'cells': cells,
+            'records': records,
+        })
+        self.count('rows_scanned', rows)
+        self.count('cells_scanned', cells)
+        self.count('records', records)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'total': {
+                'wall_s': time.perf_counter() - self._wall_start,
+                'cpu_s': time.process_time() - self._cpu_start,
+            },
+            'stages': self.stages,
+            'weeks': self.weeks,
+            'sheet': self.sheet,
+            **self.counters,
+            'peak_memory_bytes': tracemalloc.get_traced_memory()[1],
+        }
+
+    def write(self, out: TextIO = sys.stderr):
+        out.write(json.dumps({'profile': self.report()}) + '\n')
+        out.flush()
+
+
+class _NullProfiler:
+    """Stands in for Profiler when profiling is off."""
+
+    enabled = False
+
+    def stage(self, name: str):
+        return nullcontext({})
+
+    def count(self, counter: str, amount: int):
+        pass
+
+    def set_sheet(self, rows: int, cols: int):
+        pass
+
+    def add_week(self, *args, **kwargs):
+        pass
+
+
+NULL_PROFILER = _NullProfiler()
+
+_active = NULL_PROFILER
+
+
+def get_profiler():
+    return _active
+
+
+def enable_profiling() -> Profiler:
+    """Start profiling this process; instrumented code reports to the returned profiler."""
+    global _active
+    _active = Profiler()
+    return _active
+
+
+def disable_profiling():
+    global _active
+    _active = NULL_PROFILER
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
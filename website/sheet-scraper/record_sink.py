@@ -0,0 +1,201 @@
+"""
+Output sinks for scraped records.
+
+A sink takes records one at a time with write() and finishes with close().
+HttpBatchSink posts them to an import endpoint instead of printing them:
+
+- records are grouped per week and sent in batches bounded by record count
+  and body size, so a large program never becomes one giant payload
+- batches go out over the pooled keep-alive session, up to `concurrency`
+  at a time; write() blocks while that many are in flight
+- connection errors, 429 and 5xx responses are retried with exponential
+  backoff (honouring Retry-After); other 4xx responses fail the batch, and
+  once one batch has failed the ones still queued are not sent
+- every batch carries an Idempotency-Key derived from (athlete, program,
+  start_date, week, part) and its records, so a retried or re-run import can
+  be deduplicated, but a batch whose records changed is not taken for one
+  already stored
+
+Each POST body is
+    {"athlete_name", "program_name", "start_date", "week_number", "part", "records": [...]}
+
+CLI: python scraper_api.py <sheet_id> ... --sink URL   (or $SCRAPER_SINK_URL)
+"""
+
+import json
+import time
+import random
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Dict, List, Optional
+
+from sheet_cache import get_session
+
+SINK_URL_ENV = 'SCRAPER_SINK_URL'
+SINK_TOKEN_ENV = 'SCRAPER_SINK_TOKEN'
+
+DEFAULT_BATCH_RECORDS = 500
+DEFAULT_BATCH_BYTES = 512 * 1024
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF = 0.5  # seconds, doubled per attempt
+MAX_BACKOFF = 30.0
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class SinkError(Exception):
+    """Raised by close() when a batch could not be delivered."""
+
+
+class _NotSent(SinkError):
+    """A queued batch skipped because an earlier one failed."""
+
+
+def idempotency_key(athlete_name: str, program_name: str, start_date: str, week_number: Any, part: int,
+                    records: str) -> str:
+    """Key for one batch; records is the batch's records as sent (their JSON, comma-joined)."""
+    key = json.dumps([athlete_name, program_name, start_date, week_number, part], ensure_ascii=False)
+    digest = hashlib.sha256(key.encode('utf-8'))
+    digest.update(b'\n')
+    digest.update(records.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class HttpBatchSink:
+    """Posts records to `url` in per-week, size-bounded batches."""
+
+    def __init__(self, url: str, batch_records: int = DEFAULT_BATCH_RECORDS,
+                 batch_bytes: int = DEFAULT_BATCH_BYTES, concurrency: int = DEFAULT_CONCURRENCY,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF,
+                 timeout: float = 30, headers: Optional[Dict[str, str]] = None, session=None):
+        self.url = url
+        self.batch_records = max(1, batch_records)
+        self.batch_bytes = batch_bytes
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json'}
+        self.headers.update(headers or {})
+        self.session = session or get_session()
+
+        self.pool = ThreadPoolExecutor(max_workers=concurrency)
+        self._in_flight = threading.BoundedSemaphore(concurrency)
+        self._futures: List[Future] = []
+        # Set once a batch fails for good; batches still queued then fail without being sent
+        self._failed = threading.Event()
+
+        self._group = None
+        self._part = 0
+        self._pending: List[str] = []
+        self._pending_bytes = 0
+
+        self.records = 0
+        self.batches = 0
+        self.attempts = 0
+        self._attempts_lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            if not self._closed:
+                self.close()
+        else:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def write(self, record: Dict[str, Any]):
+        group = (record.get('athlete_name', ''), record.get('program_name', ''),
+                 record.get('start_date', ''), record.get('week_number'))
+        if group != self._group:
+            self._flush()
+            self._group = group
+            self._part = 0
+
+        encoded = json.dumps(record, ensure_ascii=False)
+        if self._pending and (len(self._pending) >= self.batch_records
+                              or self._pending_bytes + len(encoded) + 1 > self.batch_bytes):
+            self._flush()
+        self._pending.append(encoded)
+        self._pending_bytes += len(encoded) + 1
+        self.records += 1
+
+    def close(self) -> Dict[str, int]:
+        """Send what's left, wait for every batch and raise SinkError if any failed."""
+        self._flush()
+        self._closed = True
+        errors = []
+        for future in self._futures:
+            error = future.exception()
+            if error is not None:
+                errors.append(error)
+        self.pool.shutdown(wait=True)
+        if errors:
+            # Report the failure that stopped the import, not the batches skipped after it
+            cause = next((e for e in errors if not isinstance(e, _NotSent)), errors[0])
+            raise SinkError(f"{len(errors)} of {self.batches} batches failed: {cause}")
+        return {'records': self.records, 'batches': self.batches, 'requests': self.attempts}
+
+    def _flush(self):
+        if not self._pending:
+            return
+        athlete_name, program_name, start_date, week_number = self._group
+        # Records are already JSON; splice them in rather than encoding the batch again
+        envelope = json.dumps({
+            'athlete_name': athlete_name,
+            'program_name': program_name,
+            'start_date': start_date,
+            'week_number': week_number,
+            'part': self._part,
+        }, ensure_ascii=False)
+        records = ','.join(self._pending)
+        body = f'{envelope[:-1]}, "records": [{records}]}}'.encode('utf-8')
+        key = idempotency_key(athlete_name, program_name, start_date, week_number, self._part, records)
+
+        self._pending = []
+        self._pending_bytes = 0
+        self._part += 1
+        self.batches += 1
+
+        self._in_flight.acquire()
+        future = self.pool.submit(self._post, body, key)
+        future.add_done_callback(lambda _: self._in_flight.release())
+        self._futures.append(future)
+
+    def _post(self, body: bytes, key: str):
+        headers = dict(self.headers, **{'Idempotency-Key': key})
+        for attempt in range(self.retries + 1):
+            if self._failed.is_set():
+                raise _NotSent("not sent: an earlier batch failed")
+            with self._attempts_lock:
+                self.attempts += 1
+            retry_after = None
+            try:
+                response = self.session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+            except OSError as e:
+                # requests' connection errors and timeouts are OSErrors
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if response.status_code < 300:
+                    return
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code not in RETRY_STATUSES:
+                    self._failed.set()
+                    raise SinkError(error)
+                retry_after = response.headers.get('Retry-After')
+
+            if attempt == self.retries:
+                self._failed.set()
+                raise SinkError(f"{error} (gave up after {attempt + 1} attempts)")
+            time.sleep(self._delay(attempt, retry_after))
+
+    def _delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(MAX_BACKOFF, float(retry_after))
+            except ValueError:
+                pass
+        # Full jitter keeps concurrent batches from retrying in lockstep
+        return random.uniform(0, min(MAX_BACKOFF, self.backoff * 2 ** attempt))
@@ -0,0 +1,124 @@
+"""
+Parsed record types shared by scraper.py and scraper_api.py.
+
+The parsers produce compact SetRecord/AccessoryRecord tuples holding only what
+the sheet says about a set. Program, athlete and start date are the same for
+every record of a scrape, so they are only added when a record is serialized
+to one of the two output schemas below.
+
+A ParsedTemplate is a sheet's records in that athlete-independent form; assign()
+stamps it for one athlete, so rolling a template out to a roster costs one
+parse plus a pass over the records per athlete.
+"""
+
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Union
+
+# Columns of scraper.py's CSV output
+CSV_FIELDS = ['id', 'user_id', 'program_name', 'week_number', 'day_number',
+              'exercise_number', 'exercise_name', 'sets', 'reps', 'weights', 'notes']
+
+
+class SetRecord(NamedTuple):
+    """One working set of a main exercise."""
+    week_number: int
+    day_number: int
+    exercise_number: int
+    exercise_name: str
+    reps: int
+    weight: float
+    percent: Optional[float]
+
+
+class AccessoryRecord(NamedTuple):
+    """An accessory exercise, prescribed as sets of a rep range."""
+    week_number: int
+    day_number: int
+    exercise_number: int
+    exercise_name: str
+    sets: int
+    reps_min: int
+    reps_max: int
+
+    @property
+    def reps(self) -> str:
+        return f'{self.reps_min}-{self.reps_max}'
+
+
+Record = Union[SetRecord, AccessoryRecord]
+
+
+def to_api_record(record: Record, program_name: str, athlete_name: str = '',
+                  start_date: str = '') -> Dict[str, Any]:
+    """The JSON record printed by scraper_api.py."""
+    is_set = type(record) is SetRecord
+    return {
+        'user_id': '1',
+        'athlete_name': athlete_name,
+        'program_name': program_name,
+        'start_date': start_date,
+        'week_number': record.week_number,
+        'day_number': record.day_number,
+        'exercise_number': record.exercise_number,
+        'exercise_name': record.exercise_name,
+        'sets': 1 if is_set else record.sets,
+        'reps': str(record.reps),
+        'weights': record.weight if is_set else None,
+        'percent': record.percent if is_set else None,
+        'completed': False
+    }
+
+
+def from_api_record(record: Dict[str, Any]) -> Record:
+    """The parsed record an API record was serialized from (see to_api_record)."""
+    keys = (record['week_number'], record['day_number'], record['exercise_number'], record['exercise_name'])
+    # Only working sets have a weight
+    if record['weights'] is not None:
+        return SetRecord(*keys, int(record['reps']), record['weights'], record['percent'])
+    reps_min, reps_max = record['reps'].split('-')
+    return AccessoryRecord(*keys, record['sets'], int(reps_min), int(reps_max))
+
+
+class ParsedTemplate(NamedTuple):
+    """A parsed template sheet, not yet assigned to an athlete."""
+    program_name: str
+    records: List[Record]
+
+
+def iter_assigned_records(template: ParsedTemplate, athlete_name: str = '',
+                          start_date: str = '') -> Iterator[Dict[str, Any]]:
+    """Yield the template's API records for one athlete and start date."""
+    program_name = template.program_name
+    for record in template.records:
+        yield to_api_record(record, program_name, athlete_name, start_date)
+
+
+def assign(template: ParsedTemplate, athlete_name: str = '', start_date: str = '') -> List[Dict[str, Any]]:
+    """The template's API records for one athlete and start date."""
+    return list(iter_assigned_records(template, athlete_name, start_date))
+
+
+def restamp_api_records(records: List[Dict[str, Any]], athlete_name: str = '',
+                        start_date: str = '') -> List[Dict[str, Any]]:
+    """
+    Copies of API records for another athlete and start date, so one parse of
+    a sheet can be handed to every caller that asked for it.
+    """
+    return [{**record, 'athlete_name': athlete_name, 'start_date': start_date} for record in records]
+
+
+def to_csv_row(record: Record, record_id: int, program_name: str) -> Dict[str, Any]:
+    """The CSV row written by scraper.py."""
+    is_set = type(record) is SetRecord
+    return {
+        'id': record_id,
+        'user_id': 1,
+        'program_name': program_name,
+        'week_number': record.week_number,
+        'day_number': record.day_number,
+        'exercise_number': record.exercise_number,
+        'exercise_name': record.exercise_name,
+        'sets': 1 if is_set else record.sets,
+        'reps': record.reps,
+        'weights': record.weight if is_set else None,
+        'notes': f"{record.percent:.0f}%" if is_set and record.percent is not None else ''
+    }
@@ -3,30 +3,72 @@
 Google Sheets Scraper API - Can be called with sheet ID and tab name as arguments
 """
 
+import os
 import sys
 import json
-import requests
-import pandas as pd
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, NamedTuple, Optional, TextIO, Tuple, Union
 import re
 
-# Import functions from the main scraper
-# We'll copy the necessary functions here or import them
+from sheet_grid import (SheetGrid, ENGINES, DEFAULT_ENGINE, FIRST_WEEK_COL, WEEK_HEADER_ROW, WEEK_HEADER_PATTERN,
+                        read_csv_grid)
+from sheet_index import SheetIndex, DATA_START_ROW
+from label_classifier import ACCESSORIES, EXERCISE
+from sheet_cache import SheetCache, get_session, content_hash, default_cache
+from records import (SetRecord, AccessoryRecord, Record, ParsedTemplate, to_api_record, from_api_record, assign,
+                     restamp_api_records)
+from profiler import get_profiler, enable_profiling
+from record_sink import HttpBatchSink, SINK_URL_ENV, SINK_TOKEN_ENV, DEFAULT_BATCH_RECORDS, DEFAULT_CONCURRENCY
+from sheet_stream import SheetStream, iter_stream_records
+from sheet_probe import SheetProbe, PROBE_ROWS, PROBE_BYTES, layout_summary
+
+# requests and pandas are imported lazily: the csv engine never needs pandas,
+# and a thin client talking to the scraper service never needs either.
+
+# Overridable so fetches can be pointed at a local stub server
+SHEETS_BASE_URL = os.environ.get('SCRAPER_SHEETS_BASE_URL', 'https://docs.google.com').rstrip('/')
+
+class FetchedSheet(NamedTuple):
+    body: bytes
+    content_hash: str
+    encoding: Optional[str]
+    # True when the server answered 304 and the cached body was used
+    from_cache: bool
+
+    @property
+    def text(self) -> str:
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+def fetch_sheet_csv(sheet_id: str, sheet_name: str = None, cache: Optional[SheetCache] = None,
+                    stream: bool = False) -> Union[FetchedSheet, SheetStream]:
+    """
+    Download the sheet's CSV export, revalidating against the cache when there is one.
+    With stream=True a SheetStream is returned once the headers arrive, and the body is read
+    as it is parsed; a cached body the server reports unchanged (304) is still a FetchedSheet.
+    """
+    import requests
+
+    session = get_session()
+    cached = cache.load(sheet_id, sheet_name) if cache else None
 
-def get_sheet_data(sheet_id: str, sheet_name: str = None) -> pd.DataFrame:
-    """Fetch Google Sheet data using the CSV export URL"""
     urls_to_try = []
     
     if sheet_name:
-        urls_to_try.append(f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}")
+        urls_to_try.append(f"{SHEETS_BASE_URL}/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv&sheet={sheet_name}")
     else:
-        urls_to_try.append(f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv")
-        urls_to_try.append(f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv")
+        urls_to_try.append(f"{SHEETS_BASE_URL}/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv")
+        urls_to_try.append(f"{SHEETS_BASE_URL}/spreadsheets/d/{sheet_id}/export?format=csv")
     
     errors = []
     for url in urls_to_try:
         try:
-            response = requests.get(url, timeout=10)
+            response = session.get(url, timeout=10, headers=cached.validators() if cached else None, stream=stream)
+            if stream and response.status_code != 200:
+                # Read the empty or error body so the connection goes back to the pool
+                response.content
+            
+            if response.status_code == 304 and cached:
+                cache.touch(cached)
+                return FetchedSheet(cached.read_body(), cached.content_hash, cached.encoding, True)
             
             # Check for specific HTTP errors
             if response.status_code == 403:
@@ -38,9 +80,17 @@ def get_sheet_data(sheet_id: str, sheet_name: str = None) -> pd.DataFrame:
             
             response.raise_for_status()
             
-            from io import StringIO
-            df = pd.read_csv(StringIO(response.text))
-            return df
+            if stream:
+                return SheetStream(response, sheet_id, sheet_name, cache)
+            body = response.content
+            encoding = response.encoding
+            if cache:
+                entry = cache.store(sheet_id, sheet_name, body,
+                                    etag=response.headers.get('ETag'),
+                                    last_modified=response.headers.get('Last-Modified'),
+                                    encoding=encoding)
+                return FetchedSheet(body, entry.content_hash, encoding, False)
+            return FetchedSheet(body, content_hash(body), encoding, False)
         except requests.exceptions.HTTPError as e:
             # response should be available from the exception
             status_code = getattr(e.response, 'status_code', None) if hasattr(e, 'response') else None
@@ -79,25 +129,50 @@ def get_sheet_data(sheet_id: str, sheet_name: str = None) -> pd.DataFrame:
     
     raise Exception(error_summary)
 
-def find_week_blocks(df: pd.DataFrame) -> List[Tuple[int, int, int]]:
+def get_sheet_data(sheet_id: str, sheet_name: str = None, engine: str = DEFAULT_ENGINE,
+                   cache: Optional[SheetCache] = None, local: bool = False) -> SheetGrid:
+    """
+    Fetch Google Sheet data using the CSV export URL. With local=True, sheet_id is
+    instead a local CSV or xlsx file, or '-' for stdin (see local_sheets.py).
+    """
+    if local:
+        import local_sheets
+
+        if os.path.isdir(sheet_id):
+            raise Exception(f"{sheet_id} is a directory; use local_sheets.iter_local_sheets() to read every sheet in it")
+        tab_names = [sheet_name] if sheet_name else None
+        for _, grid in local_sheets.iter_local_sheets(sheet_id, tab_names, engine):
+            return grid
+        raise Exception(f"No sheets found in {sheet_id}")
+
+    with get_profiler().stage('fetch'):
+        fetched = fetch_sheet_csv(sheet_id, sheet_name, cache)
+    return read_sheet_grid(fetched.body, engine, fetched.encoding)
+
+def read_sheet_grid(data: Union[str, bytes], engine: str = DEFAULT_ENGINE, encoding: Optional[str] = None) -> SheetGrid:
+    """read_csv_grid, recorded as the read stage when profiling"""
+    profile = get_profiler()
+    with profile.stage(f'read_{engine}'):
+        grid = read_csv_grid(data, engine, encoding)
+    profile.set_sheet(len(grid), grid.n_cols)
+    return grid
+
+def find_week_blocks(grid: SheetGrid) -> List[Tuple[int, int, int]]:
     """Find week blocks in the horizontal structure."""
     week_blocks = []
     
-    if len(df) < 5:
+    if len(grid) < 5:
         return week_blocks
     
-    week_row = df.iloc[3]
-    
     current_week = None
     start_col = None
     
-    for col_idx in range(7, len(df.columns)):
-        col_name = df.columns[col_idx]
-        cell_value = week_row[col_name] if col_name in week_row.index else None
+    for col_idx in range(FIRST_WEEK_COL, grid.n_cols):
+        cell_value = grid.cell(WEEK_HEADER_ROW, col_idx)
         
-        if pd.notna(cell_value):
+        if cell_value is not None:
             cell_str = str(cell_value).strip()
-            week_match = re.search(r'[Ww]eek\s+(\d+)', cell_str)
+            week_match = WEEK_HEADER_PATTERN.search(cell_str)
             if week_match:
                 if current_week is not None and start_col is not None:
                     week_blocks.append((current_week, start_col, col_idx - 1))
@@ -106,25 +181,24 @@ def find_week_blocks(df: pd.DataFrame) -> List[Tuple[int, int, int]]:
                 start_col = col_idx
     
     if current_week is not None and start_col is not None:
-        end_col = len(df.columns) - 1
-        for i in range(start_col + 1, len(df.columns)):
-            next_cell = week_row[df.columns[i]] if i < len(df.columns) else None
-            if pd.notna(next_cell):
+        end_col = grid.n_cols - 1
+        for i in range(start_col + 1, grid.n_cols):
+            next_cell = grid.cell(WEEK_HEADER_ROW, i)
+            if next_cell is not None:
                 next_str = str(next_cell).strip()
-                if re.search(r'[Ww]eek\s+\d+', next_str):
+                if WEEK_HEADER_PATTERN.search(next_str):
                     end_col = i - 1
                     break
         week_blocks.append((current_week, start_col, end_col))
     
     return week_blocks
 
-def extract_exercise_weights(df: pd.DataFrame) -> Dict[str, float]:
+def extract_exercise_weights(grid: SheetGrid) -> Dict[str, float]:
     """Extract exercise weights from row 1, columns 0-5."""
     weights = {}
-    if len(df) < 2:
+    if len(grid) < 2:
         return weights
     
-    weight_row = df.iloc[1]
     exercise_mapping = {
         0: 'Snatch',
         1: 'Clean',
@@ -134,11 +208,10 @@ def extract_exercise_weights(df: pd.DataFrame) -> Dict[str, float]:
         5: 'Front Squat'
     }
     
-    for col_idx in range(min(6, len(df.columns))):
+    for col_idx in range(min(6, grid.n_cols)):
         if col_idx in exercise_mapping:
-            col_name = df.columns[col_idx]
-            weight_val = weight_row[col_name] if col_name in weight_row.index else None
-            if pd.notna(weight_val):
+            weight_val = grid.cell(1, col_idx)
+            if weight_val is not None:
                 try:
                     weight = float(weight_val)
                     exercise_name = exercise_mapping[col_idx]
@@ -148,108 +221,47 @@ def extract_exercise_weights(df: pd.DataFrame) -> Dict[str, float]:
     
     return weights
 
-def parse_exercise_sets(df: pd.DataFrame, row_idx: int, start_col: int, end_col: int,
-                       exercise_name: str, week_num: int, day_num: int,
-                       program_name: str,
-                       exercise_number: int, athlete_name: str = '', start_date: str = '') -> List[Dict[str, Any]]:
+def parse_exercise_sets(grid: SheetGrid, row_idx: int, start_col: int, end_col: int,
+                       exercise_name: str, week_num: int, day_num: int, exercise_number: int,
+                       block: Optional['WeekBlockMatrix'] = None) -> List[SetRecord]:
     """Parse sets for an exercise."""
-    exercises = []
-    
-    if row_idx + 2 >= len(df):
-        return exercises
+    if row_idx + 2 >= len(grid):
+        return []
     
-    reps_row = df.iloc[row_idx]
-    weights_row = df.iloc[row_idx + 1]
-    percentages_row = df.iloc[row_idx + 2] if row_idx + 2 < len(df) else None
+    # parse_week_data shares one matrix across the whole week block
+    if block is None:
+        # numpy is only imported once a sheet is parsed, not by a cached or --help run
+        from week_matrix import WeekBlockMatrix
+
+        block = WeekBlockMatrix(grid, start_col, end_col, row_idx, row_idx + 3)
     
-    sets_data = []
+    reps, weights, percentages = block.exercise_sets(row_idx)
     
-    for col_idx in range(start_col + 1, min(end_col + 1, len(df.columns))):
-        col_name = df.columns[col_idx]
-        
-        rep_val = reps_row[col_name] if col_name in reps_row.index else None
-        if pd.isna(rep_val):
-            continue
-        
-        try:
-            reps = int(float(rep_val))
-            if reps <= 0 or reps > 50:
-                continue
-        except (ValueError, TypeError):
-            continue
-        
-        weight_val = weights_row[col_name] if col_name in weights_row.index else None
-        weight = None
-        if pd.notna(weight_val):
-            try:
-                weight = float(weight_val)
-            except (ValueError, TypeError):
-                pass
-        
-        percentage = None
-        if percentages_row is not None:
-            pct_val = percentages_row[col_name] if col_name in percentages_row.index else None
-            if pd.notna(pct_val):
-                pct_str = str(pct_val).strip().replace('%', '')
-                try:
-                    percentage = float(pct_str)
-                except (ValueError, TypeError):
-                    pass
-        
-        if weight is not None:
-            if weight > 500:
-                continue
-            sets_data.append({
-                'reps': reps,
-                'weight': weight,
-                'percentage': percentage
-            })
-    
-    for set_num, set_data in enumerate(sets_data, 1):
-        exercise_record = {
-            'user_id': '1',
-            'athlete_name': athlete_name,
-            'program_name': program_name,
-            'start_date': start_date,
-            'week_number': week_num,  # Keep as number
-            'day_number': day_num,  # Keep as number
-            'exercise_number': exercise_number,  # Keep as number
-            'exercise_name': exercise_name,
-            'sets': 1,  # Keep as number
-            'reps': str(set_data['reps']),  # Convert to string
-            'weights': set_data['weight'],  # Keep as number (float)
-            'percent': set_data['percentage'],  # Keep as number (float)
-            'completed': False  # Default to not completed
-        }
-        exercises.append(exercise_record)
-    
-    return exercises
-
-def parse_accessories(df: pd.DataFrame, row_idx: int, start_col: int, end_col: int,
-                     week_num: int, day_num: int, program_name: str,
-                     exercise_number: int,
-                     seen_exercises: Dict[str, int], athlete_name: str = '', start_date: str = '') -> List[Dict[str, Any]]:
+    return [SetRecord(week_num, day_num, exercise_number, exercise_name, set_reps, weight, percentage)
+            for set_reps, weight, percentage in zip(reps, weights, percentages)]
+
+def parse_accessories(grid: SheetGrid, row_idx: int, start_col: int, end_col: int,
+                     week_num: int, day_num: int, exercise_number: int,
+                     seen_exercises: Dict[str, int],
+                     index: Optional[SheetIndex] = None) -> List[AccessoryRecord]:
     """
     Parse accessories from a row. Format: "Accessories 2 x 10-15:\nExercise1\nExercise2"
     Returns list of accessory exercise records.
     """
     accessories = []
     
-    if row_idx >= len(df):
+    if row_idx >= len(grid):
         return accessories
     
-    row = df.iloc[row_idx]
-    first_col_name = df.columns[start_col] if start_col < len(df.columns) else None
+    if index is None:
+        index = SheetIndex(grid, [start_col], row_idx)
     
-    if not first_col_name:
-        return accessories
+    label = index.label_at(start_col, row_idx)
     
-    first_cell = row[first_col_name] if first_col_name in row.index else None
-    
-    if pd.isna(first_cell):
+    if label is None:
         return accessories
     
-    cell_str = str(first_cell).strip()
+    cell_str = label.text
     
     # Parse sets and reps from "Accessories 2 x 10-15:" format
     sets_match = re.search(r'Accessories\s+(\d+)\s*[xX×]\s*(\d+)\s*[-–]\s*(\d+)', cell_str, re.IGNORECASE)
@@ -285,30 +297,15 @@ def parse_accessories(df: pd.DataFrame, row_idx: int, start_col: int, end_col: i
                 if exercise_name:
                     exercise_names.append(exercise_name)
     
-    # Also check following rows for exercise names
-    for i in range(1, 5):  # Check up to 4 rows below
-        if row_idx + i >= len(df):
+    # Also check following rows for exercise names (up to 4 rows below)
+    for next_label in index.labels_between(start_col, row_idx + 1, row_idx + 5):
+        # Stop if we hit another section (Day, exercise, etc.)
+        if next_label.ends_accessories:
             break
         
-        next_row = df.iloc[row_idx + i]
-        next_cell = next_row[first_col_name] if first_col_name in next_row.index else None
-        
-        if pd.notna(next_cell):
-            next_str = str(next_cell).strip()
-            
-            # Stop if we hit another section (Day, exercise, etc.)
-            if re.search(r'[Dd]ay\s+\d+', next_str):
-                break
-            if any(keyword in next_str for keyword in ['Snatch', 'Clean', 'Jerk', 'Squat', 'Total', 'Accessories']):
-                break
-            if 'Athlete Comments' in next_str:
-                break
-            
-            # If it's not empty and doesn't look like a number or percentage, it might be an exercise name
-            if next_str and not re.match(r'^\d+\.?\d*%?$', next_str) and len(next_str) > 2:
-                # Check if it looks like an exercise name (not a number, not a percentage)
-                if not re.match(r'^\d+$', next_str) and '%' not in next_str:
-                    exercise_names.append(next_str)
+        # Not a number or percentage, so it's an exercise name
+        if next_label.is_accessory_name:
+            exercise_names.append(next_label.text)
     
     # Create records for each accessory exercise
     for exercise_name in exercise_names:
@@ -318,49 +315,20 @@ def parse_accessories(df: pd.DataFrame, row_idx: int, start_col: int, end_col: i
         
         current_exercise_number = seen_exercises[exercise_name]
 
-        # Create one record per accessory exercise with sets and rep range
-        accessory_record = {
-            'user_id': '1',
-            'athlete_name': athlete_name,
-            'program_name': program_name,
-            'start_date': start_date,
-            'week_number': week_num,  # Keep as number
-            'day_number': day_num,  # Keep as number
-            'exercise_number': current_exercise_number,  # Keep as number
-            'exercise_name': exercise_name,
-            'sets': sets,  # Keep as number (e.g., 2)
-            'reps': f'{reps_min}-{reps_max}',  # Rep range as string (e.g., "10-15")
-            'weights': None,  # Accessories typically don't have weights (null)
-            'percent': None,  # Accessories typically don't have percentages (null)
-            'completed': False  # Default to not completed
-        }
-        accessories.append(accessory_record)
+        # One record per accessory exercise with sets and rep range; no weights or percentages
+        accessories.append(AccessoryRecord(week_num, day_num, current_exercise_number, exercise_name,
+                                           sets, reps_min, reps_max))
     
     return accessories
 
-def find_day_blocks(df: pd.DataFrame, start_row: int, end_row: int, 
-                   start_col: int, end_col: int) -> List[Tuple[int, int]]:
+def find_day_blocks(grid: SheetGrid, start_row: int, end_row: int, 
+                   start_col: int, end_col: int, index: Optional[SheetIndex] = None) -> List[Tuple[int, int]]:
     """Find day blocks within a week block."""
-    day_blocks = []
+    if index is None:
+        index = SheetIndex(grid, [start_col], start_row)
     
-    found_day_1 = False
-    first_day_row = start_row
-    
-    for row_idx in range(start_row, min(end_row, len(df))):
-        row = df.iloc[row_idx]
-        first_col_name = df.columns[start_col] if start_col < len(df.columns) else None
-        
-        if first_col_name:
-            cell_value = row[first_col_name] if first_col_name in row.index else None
-            if pd.notna(cell_value):
-                cell_str = str(cell_value).strip()
-                day_match = re.search(r'[Dd]ay\s+(\d+)', cell_str)
-                if day_match:
-                    day_num = int(day_match.group(1))
-                    if day_num == 1:
-                        found_day_1 = True
-                        first_day_row = row_idx
-                    day_blocks.append((day_num, row_idx))
+    day_blocks = index.day_markers(start_col, start_row, min(end_row, len(grid)))
+    found_day_1 = any(day_num == 1 for day_num, _ in day_blocks)
     
     if not found_day_1 and day_blocks:
         day_blocks.insert(0, (1, start_row))
@@ -369,161 +337,668 @@ def find_day_blocks(df: pd.DataFrame, start_row: int, end_row: int,
     
     return day_blocks
 
-def parse_week_data(df: pd.DataFrame, week_num: int, start_col: int, end_col: int,
-                    program_name: str, exercise_weights: Dict[str, float],
-                    athlete_name: str = '', start_date: str = '') -> List[Dict[str, Any]]:
+def parse_week_data(grid: SheetGrid, week_num: int, start_col: int, end_col: int,
+                    exercise_weights: Dict[str, float],
+                    index: Optional[SheetIndex] = None) -> List[Record]:
     """Parse data for a specific week block."""
     all_exercises = []
     
-    if len(df) < 5:
+    if len(grid) < 5:
         return all_exercises
     
-    start_row = 5
-    end_row = len(df)
+    start_row = DATA_START_ROW
+    end_row = len(grid)
     
-    day_blocks = find_day_blocks(df, start_row, end_row, start_col, end_col)
+    # parse_template_sheet shares one index across all week blocks
+    if index is None:
+        index = SheetIndex(grid, [start_col], start_row)
+    
+    day_blocks = find_day_blocks(grid, start_row, end_row, start_col, end_col, index)
     
     if not day_blocks:
         day_blocks = [(1, start_row)]
     
+    from week_matrix import WeekBlockMatrix
+
+    # Coerce the block's set columns to numbers once for every day and exercise
+    block = WeekBlockMatrix(grid, start_col, end_col)
+    
     for day_idx, (day_num, day_start_row) in enumerate(day_blocks):
         if day_idx + 1 < len(day_blocks):
             day_end_row = day_blocks[day_idx + 1][1]
         else:
             day_end_row = end_row
         
-        current_exercise = None
-        exercise_number = 0
-        seen_exercises = {}
+        all_exercises.extend(parse_day_data(grid, week_num, day_num, day_start_row, day_end_row,
+                                            start_col, end_col, block, index))
+    
+    return all_exercises
+
+def parse_day_data(grid: SheetGrid, week_num: int, day_num: int, start_row: int, end_row: int,
+                   start_col: int, end_col: int, block: 'WeekBlockMatrix', index: SheetIndex) -> List[Record]:
+    """
+    Parse the exercises of one day: rows [start_row, end_row) of a week block.
+    Besides those rows, this reads the two rows below the last exercise and the
+    four below an accessories label.
+    """
+    day_exercises = []
+    exercise_number = 0
+    seen_exercises = {}
+    
+    # Only rows with a label in the anchor column can start an exercise or section
+    for label in index.labels_between(start_col, start_row, end_row):
+        row_idx = label.row
         
-        for row_idx in range(day_start_row, day_end_row):
-            row = df.iloc[row_idx]
-            
-            first_col_name = df.columns[start_col] if start_col < len(df.columns) else None
-            if not first_col_name:
-                continue
-            
-            first_cell = row[first_col_name] if first_col_name in row.index else None
-            
-            if pd.notna(first_cell):
-                first_cell_str = str(first_cell).strip()
-                
-                if re.search(r'[Dd]ay\s+\d+', first_cell_str):
-                    continue
-                if 'Athlete Comments' in first_cell_str:
-                    continue
-                
-                # Parse accessories if found
-                if 'Accessories' in first_cell_str:
-                    accessories = parse_accessories(df, row_idx, start_col, end_col, week_num, day_num,
-                                                   program_name, exercise_number, seen_exercises, athlete_name, start_date)
-                    if accessories:
-                        all_exercises.extend(accessories)
-                        # Update exercise_number to the max value after parsing accessories
-                        if seen_exercises:
-                            exercise_number = max(seen_exercises.values())
-                    continue
-                if 'Rate Your Readiness' in first_cell_str:
-                    continue
-                if 'Split Squats' in first_cell_str or 'Leaps' in first_cell_str:
-                    continue
-                if 'Total' in first_cell_str or first_cell_str in ['Total Reps', 'Total Tonnage', 'Relative Intensity']:
-                    continue
-                
-                exercise_keywords = ['Snatch', 'Clean', 'Jerk', 'Squat', 'Pull', 'Press', 'Push', 'Curl']
-                is_exercise = any(keyword.lower() in first_cell_str.lower() for keyword in exercise_keywords)
+        # Parse accessories if found
+        if label.kind == ACCESSORIES:
+            accessories = parse_accessories(grid, row_idx, start_col, end_col, week_num, day_num,
+                                           exercise_number, seen_exercises, index)
+            if accessories:
+                day_exercises.extend(accessories)
+                # Update exercise_number to the max value after parsing accessories
+                if seen_exercises:
+                    exercise_number = max(seen_exercises.values())
+            continue
+        
+        # Day markers, comments, readiness, totals and other labels carry no sets
+        if label.kind != EXERCISE:
+            continue
+        
+        # The weights row below an exercise has an empty label cell
+        if row_idx + 1 < len(grid) and index.label_at(start_col, row_idx + 1) is None:
+            if block.has_numbers(row_idx):
+                exercise_name = label.exercise_name
                 
-                if is_exercise:
-                    if row_idx + 1 < len(df):
-                        next_row = df.iloc[row_idx + 1]
-                        next_first_cell = next_row[first_col_name] if first_col_name in next_row.index else None
-                        
-                        if pd.isna(next_first_cell) or str(next_first_cell).strip() == '':
-                            has_numbers = False
-                            for col_idx in range(start_col + 1, min(end_col + 1, len(df.columns))):
-                                col_name = df.columns[col_idx]
-                                val = row[col_name] if col_name in row.index else None
-                                if pd.notna(val):
-                                    try:
-                                        int(float(val))
-                                        has_numbers = True
-                                        break
-                                    except (ValueError, TypeError):
-                                        pass
-                            
-                            if has_numbers:
-                                exercise_name = first_cell_str
-                                if 'Clean & Jerk' in exercise_name or 'Clean and Jerk' in exercise_name:
-                                    exercise_name = 'Clean and Jerk'
-                                elif 'Snatch Pull' in exercise_name:
-                                    exercise_name = 'Snatch Pull'
-                                elif 'Clean Pull' in exercise_name:
-                                    exercise_name = 'Clean Pull'
-                                elif 'Front Squat' in exercise_name or 'FS' in exercise_name:
-                                    exercise_name = 'Front Squat'
-                                elif 'Back Squat' in exercise_name or 'BS' in exercise_name:
-                                    exercise_name = 'Back Squat'
-                                
-                                if exercise_name not in seen_exercises:
-                                    exercise_number += 1
-                                    seen_exercises[exercise_name] = exercise_number
-                                current_exercise_number = seen_exercises[exercise_name]
-
-                                exercises = parse_exercise_sets(df, row_idx, start_col, end_col,
-                                                               exercise_name, week_num, day_num,
-                                                               program_name,
-                                                               current_exercise_number, athlete_name, start_date)
-                                all_exercises.extend(exercises)
+                if exercise_name not in seen_exercises:
+                    exercise_number += 1
+                    seen_exercises[exercise_name] = exercise_number
+                current_exercise_number = seen_exercises[exercise_name]
+
+                exercises = parse_exercise_sets(grid, row_idx, start_col, end_col,
+                                               exercise_name, week_num, day_num,
+                                               current_exercise_number, block)
+                day_exercises.extend(exercises)
     
-    return all_exercises
+    return day_exercises
 
-def parse_template_sheet(df: pd.DataFrame, program_name: str, athlete_name: str = '', start_date: str = '') -> List[Dict[str, Any]]:
-    """Parse a program template sheet that's structured horizontally."""
-    all_exercises = []
+def _parse_week_slice(block: SheetGrid, week_num: int, exercise_weights: Dict[str, float]) -> List[Record]:
+    """Runs in a parse worker process: parse_week_data on a grid holding only the week's columns."""
+    return parse_week_data(block, week_num, 0, block.n_cols - 1, exercise_weights)
 
-    week_blocks = find_week_blocks(df)
+def iter_sheet_records(grid: SheetGrid, parse_workers: Optional[int] = None) -> Iterator[Record]:
+    """
+    Yield the parsed sets and accessories of a horizontally structured template sheet, week by week.
+    With parse_workers > 1, week blocks are parsed in that many processes, each sent only its
+    block's columns; records still come out in week order.
+    """
+    profile = get_profiler()
+    with profile.stage('find_week_blocks'):
+        week_blocks = find_week_blocks(grid)
 
     if not week_blocks:
-        return all_exercises
+        return
+
+    with profile.stage('extract_exercise_weights'):
+        exercise_weights = extract_exercise_weights(grid)
+
+    if parse_workers and parse_workers > 1 and len(week_blocks) > 1:
+        yield from _iter_parallel_week_records(grid, week_blocks, exercise_weights, parse_workers)
+        return
 
-    exercise_weights = extract_exercise_weights(df)
+    # Classify every week's labels in one pass over the sheet
+    with profile.stage('build_index'):
+        index = SheetIndex(grid, [start_col for _, start_col, _ in week_blocks])
 
     for week_num, start_col, end_col in week_blocks:
-        week_exercises = parse_week_data(df, week_num, start_col, end_col,
-                                        program_name, exercise_weights, athlete_name, start_date)
-        all_exercises.extend(week_exercises)
+        # Nothing is yielded inside a stage, so consumers' time isn't counted as parsing
+        with profile.stage('parse_week_data') as timing:
+            records = parse_week_data(grid, week_num, start_col, end_col, exercise_weights, index)
+        if profile.enabled:
+            _profile_week(profile, grid, week_num, start_col, end_col, timing, len(records))
+        yield from records
 
-    return all_exercises
+def _iter_parallel_week_records(grid: SheetGrid, week_blocks: List[Tuple[int, int, int]],
+                                exercise_weights: Dict[str, float], parse_workers: int) -> Iterator[Record]:
+    from concurrent.futures import ProcessPoolExecutor
+
+    profile = get_profiler()
+    with ProcessPoolExecutor(max_workers=min(parse_workers, len(week_blocks))) as pool:
+        futures = [pool.submit(_parse_week_slice, grid.column_slice(start_col, end_col), week_num, exercise_weights)
+                   for week_num, start_col, end_col in week_blocks]
+        # Collected in submission order, so the output is the same as a sequential parse
+        for (week_num, start_col, end_col), future in zip(week_blocks, futures):
+            with profile.stage('parse_week_data') as timing:
+                records = future.result()
+            if profile.enabled:
+                _profile_week(profile, grid, week_num, start_col, end_col, timing, len(records))
+            yield from records
+
+def _profile_week(profile, grid: SheetGrid, week_num: int, start_col: int, end_col: int,
+                  timing: Dict[str, float], records: int):
+    rows = max(0, len(grid) - DATA_START_ROW)
+    cols = max(0, min(end_col + 1, grid.n_cols) - start_col)
+    profile.add_week(week_num, start_col, end_col, timing, rows, rows * cols, records)
+
+def iter_template_records(grid: SheetGrid, program_name: str, athlete_name: str = '',
+                          start_date: str = '', parse_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the JSON records of a template sheet, one week block at a time."""
+    for record in iter_sheet_records(grid, parse_workers):
+        yield to_api_record(record, program_name, athlete_name, start_date)
+
+def parse_template_sheet(grid: SheetGrid, program_name: str, athlete_name: str = '', start_date: str = '',
+                         parse_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Parse a program template sheet that's structured horizontally."""
+    return assign(parse_template(grid, program_name, parse_workers), athlete_name, start_date)
+
+def parse_template(grid: SheetGrid, program_name: str, parse_workers: Optional[int] = None) -> ParsedTemplate:
+    """
+    Parse a template sheet once, without an athlete; records.assign() then
+    stamps it for each athlete it is rolled out to.
+    """
+    return ParsedTemplate(program_name, list(iter_sheet_records(grid, parse_workers)))
 
-def scrape_sheet(sheet_id: str, tab_name: str = '4-Day Template', athlete_name: str = '', start_date: str = ''):
+def scrape_template(sheet_id: str, tab_name: str = '4-Day Template', engine: str = DEFAULT_ENGINE,
+                    cache: Optional[SheetCache] = None, parse_workers: Optional[int] = None) -> ParsedTemplate:
+    """Fetch and parse a sheet into a template that can be assigned to any number of athletes"""
+    try:
+        with get_profiler().stage('fetch'):
+            fetched = fetch_sheet_csv(sheet_id, tab_name, cache)
+        # Same cache entry as iter_scrape_sheet: the records don't depend on the athlete
+        stamp = [tab_name]
+        cached_records = cache.load_records(sheet_id, tab_name, fetched.content_hash, stamp) if cache else None
+        if cached_records is not None:
+            return ParsedTemplate(tab_name, [from_api_record(record) for record in cached_records])
+
+        grid = read_sheet_grid(fetched.body, engine, fetched.encoding)
+        template = parse_template(grid, tab_name, parse_workers)
+        if cache:
+            cache.store_records(sheet_id, tab_name, fetched.content_hash, stamp, assign(template))
+        return template
+    except Exception as e:
+        raise Exception(f"Error processing {tab_name}: {e}")
+
+def iter_scrape_sheet(sheet_id: str, tab_name: str = '4-Day Template', athlete_name: str = '', start_date: str = '',
+                      engine: str = DEFAULT_ENGINE, cache: Optional[SheetCache] = None,
+                      parse_workers: Optional[int] = None, stream: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Scrape a sheet, yielding records as each week is parsed. With stream=True the
+    download and the parse overlap instead (see sheet_stream.py): records start coming
+    as each day of the first week arrives, and engine and parse_workers are not used.
+    """
+    profile = get_profiler()
+    try:
+        with profile.stage('fetch'):
+            fetched = fetch_sheet_csv(sheet_id, tab_name, cache, stream)
+        # Parsed records don't depend on the athlete, so every athlete shares one cache entry
+        stamp = [tab_name]
+
+        if isinstance(fetched, SheetStream):
+            records = []
+            for record in iter_stream_records(fetched, tab_name, athlete_name, start_date):
+                records.append(record)
+                yield record
+            # The body's hash is known now that it has all been read
+            if cache:
+                cache.store_records(sheet_id, tab_name, fetched.content_hash, stamp, records)
+            return
+
+        # Same bytes as last time: replay the records parsed from them, stamped for this athlete
+        cached_records = cache.iter_records(sheet_id, tab_name, fetched.content_hash, stamp) if cache else None
+        if cached_records is not None:
+            for record in cached_records:
+                record['athlete_name'] = athlete_name
+                record['start_date'] = start_date
+                profile.count('records', 1)
+                yield record
+            return
+
+        grid = read_sheet_grid(fetched.body, engine, fetched.encoding)
+        writer = cache.records_writer(sheet_id, tab_name, fetched.content_hash, stamp) if cache else None
+        try:
+            for record in iter_template_records(grid, tab_name, athlete_name, start_date, parse_workers):
+                if writer:
+                    writer.write(record)
+                yield record
+        except BaseException:
+            # Failed or abandoned part way: don't cache a partial result
+            if writer:
+                writer.discard()
+            raise
+        if writer:
+            writer.commit()
+    except Exception as e:
+        raise Exception(f"Error processing {tab_name}: {e}")
+
+def scrape_sheet(sheet_id: str, tab_name: str = '4-Day Template', athlete_name: str = '', start_date: str = '',
+                 engine: str = DEFAULT_ENGINE, cache: Optional[SheetCache] = None,
+                 parse_workers: Optional[int] = None):
     """Main function to scrape a sheet and return exercises"""
-    all_exercises = []
+    return list(iter_scrape_sheet(sheet_id, tab_name, athlete_name, start_date, engine, cache, parse_workers))
 
+def probe_sheet(sheet_id: str, tab_name: str = '4-Day Template', cache: Optional[SheetCache] = None,
+                max_rows: int = PROBE_ROWS, max_bytes: Optional[int] = PROBE_BYTES) -> SheetProbe:
+    """
+    Fetch only the first rows of a sheet for an import preview (see sheet_probe.py).
+    Call .summary() for the layout, then .template() to finish the same download
+    and parse it, or .close() to drop it.
+    """
     try:
-        df = get_sheet_data(sheet_id, sheet_name=tab_name)
-        exercises = parse_template_sheet(df, tab_name, athlete_name, start_date)
-        all_exercises.extend(exercises)
-        return all_exercises
+        with get_profiler().stage('fetch'):
+            fetched = fetch_sheet_csv(sheet_id, tab_name, cache, stream=True)
+        with get_profiler().stage('probe'):
+            return SheetProbe(sheet_id, tab_name, fetched, max_rows, max_bytes)
     except Exception as e:
         raise Exception(f"Error processing {tab_name}: {e}")
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
+def scrape_sheet_summary(sheet_id: str, tab_name: str = '4-Day Template', athlete_name: str = '',
+                         start_date: str = '', engine: str = DEFAULT_ENGINE, cache: Optional[SheetCache] = None,
+                         parse_workers: Optional[int] = None, local: bool = False) -> Dict[str, Any]:
+    """
+    Scrape a sheet along with its training-load rollups (see training_load.py).
+    Returns {'records': [...], 'summary': {...}}.
+    """
+    from training_load import summarize_sheet
+
+    try:
+        grid = get_sheet_data(sheet_id, tab_name, engine, cache, local)
+        template = parse_template(grid, tab_name, parse_workers)
+        with get_profiler().stage('summarize'):
+            summary = summarize_sheet(grid, template.records)
+        return {'records': assign(template, athlete_name, start_date), 'summary': summary}
+    except Exception as e:
+        raise Exception(f"Error processing {tab_name}: {e}")
+
+def week_block_fingerprint(grid: SheetGrid, week_num: int, start_col: int, end_col: int) -> str:
+    """Hash of everything parse_week_data reads for a week block."""
+    width = max(0, min(end_col + 1, grid.n_cols) - start_col)
+    rows = [row[start_col:start_col + width] for row in grid.rows]
+
+    # Empty rows at the bottom of the block don't change its records; only whether
+    # there is at least one matters (an exercise's percents row may be that row)
+    filled = len(rows)
+    while filled and all(cell is None for cell in rows[filled - 1]):
+        filled -= 1
+    rows = rows[:filled + 1]
+
+    return content_hash(json.dumps([week_num, rows], ensure_ascii=False, default=str).encode('utf-8'))
+
+def parse_template_sheet_incremental(grid: SheetGrid, program_name: str, athlete_name: str = '',
+                                     start_date: str = '', previous: Optional[Dict[str, Any]] = None
+                                     ) -> Tuple[List[Dict[str, Any]], Dict[str, List[int]], List[Dict[str, Any]]]:
+    """
+    Parse a template sheet, reusing the records of week blocks whose fingerprint
+    matches one in `previous` (the weeks list saved by the last run).
+    Returns (records, delta, weeks): the merged records for the athlete and start
+    date, the added/removed/changed/unchanged week numbers, and the weeks list to
+    save for the next run. Saved records carry no athlete or start date, like a
+    ParsedTemplate, so the next run can be for anyone.
+    """
+    profile = get_profiler()
+    with profile.stage('find_week_blocks'):
+        week_blocks = find_week_blocks(grid)
+    with profile.stage('fingerprint'):
+        fingerprints = [week_block_fingerprint(grid, *block) for block in week_blocks]
+
+    reusable = {week['fingerprint']: week['records'] for week in previous or []}
+    stale = [block for block, fingerprint in zip(week_blocks, fingerprints) if fingerprint not in reusable]
+
+    parsed = {}
+    if stale:
+        with profile.stage('extract_exercise_weights'):
+            exercise_weights = extract_exercise_weights(grid)
+        # Only the changed weeks' labels need classifying
+        with profile.stage('build_index'):
+            index = SheetIndex(grid, [start_col for _, start_col, _ in stale])
+        for week_num, start_col, end_col in stale:
+            with profile.stage('parse_week_data') as timing:
+                week_records = parse_week_data(grid, week_num, start_col, end_col, exercise_weights, index)
+            if profile.enabled:
+                _profile_week(profile, grid, week_num, start_col, end_col, timing, len(week_records))
+            parsed[(week_num, start_col, end_col)] = [to_api_record(record, program_name) for record in week_records]
+
+    records = []
+    weeks = []
+    for block, fingerprint in zip(week_blocks, fingerprints):
+        week_records = parsed[block] if block in parsed else reusable[fingerprint]
+        records.extend(week_records)
+        weeks.append({'week_number': block[0], 'fingerprint': fingerprint, 'records': week_records})
+
+    # A week is identified by its number; repeated week numbers are compared as a group
+    def signatures(week_list):
+        grouped = {}
+        for week in week_list:
+            grouped.setdefault(week['week_number'], []).append(week['fingerprint'])
+        return grouped
+
+    old = signatures(previous or [])
+    new = signatures(weeks)
+    delta = {
+        'added': sorted(week for week in new if week not in old),
+        'removed': sorted(week for week in old if week not in new),
+        'changed': sorted(week for week in new if week in old and new[week] != old[week]),
+        'unchanged': sorted(week for week in new if week in old and new[week] == old[week]),
+    }
+    return restamp_api_records(records, athlete_name, start_date), delta, weeks
+
+def scrape_sheet_incremental(sheet_id: str, tab_name: str = '4-Day Template', athlete_name: str = '',
+                             start_date: str = '', engine: str = DEFAULT_ENGINE,
+                             cache: Optional[SheetCache] = None) -> Dict[str, Any]:
+    """
+    Re-scrape a sheet, only parsing the week blocks that changed since the last
+    incremental scrape of the same (sheet, tab), whichever athlete it was for.
+    Returns {'delta': {...}, 'records': [...]}; without a cache every week is 'added'.
+    """
+    profile = get_profiler()
+    try:
+        with profile.stage('fetch'):
+            fetched = fetch_sheet_csv(sheet_id, tab_name, cache)
+        # Week records are saved unassigned, so the state is shared by every athlete
+        stamp = [tab_name]
+        state = cache.load_week_state(sheet_id, tab_name, stamp) if cache else None
+
+        if state and state.get('content_hash') == fetched.content_hash:
+            # Same bytes as last time: nothing to fingerprint or parse
+            weeks = state['weeks']
+            week_numbers = sorted({week['week_number'] for week in weeks})
+            records = restamp_api_records([record for week in weeks for record in week['records']],
+                                          athlete_name, start_date)
+            delta = {'added': [], 'removed': [], 'changed': [], 'unchanged': week_numbers}
+        else:
+            grid = read_sheet_grid(fetched.body, engine, fetched.encoding)
+            records, delta, weeks = parse_template_sheet_incremental(
+                grid, tab_name, athlete_name, start_date, state['weeks'] if state else None)
+            if cache:
+                cache.store_week_state(sheet_id, tab_name, stamp,
+                                       {'content_hash': fetched.content_hash, 'weeks': weeks})
+
+        return {'delta': delta, 'records': records}
+    except Exception as e:
+        raise Exception(f"Error processing {tab_name}: {e}")
+
+def parse_scrape_request(payload: Dict[str, Any]) -> Dict[str, str]:
+    """Validate a service request body or batch manifest line and normalize it the same way the CLI does."""
+    sheet_id = str(payload.get('sheet_id') or '').strip()
+    if not sheet_id:
+        raise ValueError('sheet_id is required')
+
+    tab_name = str(payload.get('tab_name') or '').strip() or '4-Day Template'
+    athlete_name = str(payload.get('athlete_name') or '').lower().strip()
+    start_date = str(payload.get('start_date') or '').strip()
+
+    return {
+        'sheet_id': sheet_id,
+        'tab_name': tab_name,
+        'athlete_name': athlete_name,
+        'start_date': start_date,
+    }
+
+def write_ndjson(records: Iterable[Dict[str, Any]], out: TextIO = sys.stdout) -> int:
+    """Write one JSON record per line, flushing as each week completes. Returns the record count."""
+    count = 0
+    current_week = None
+    for record in records:
+        week = record.get('week_number')
+        if week != current_week:
+            out.flush()
+            current_week = week
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        count += 1
+    out.flush()
+    return count
+
+def send_to_sink(records: Iterable[Dict[str, Any]], url: str, batch_records: Optional[int] = None,
+                 concurrency: Optional[int] = None) -> Dict[str, int]:
+    """Post records to an import endpoint in batches (see record_sink.py). Returns delivery counts."""
+    headers = {}
+    token = os.environ.get(SINK_TOKEN_ENV)
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+
+    with HttpBatchSink(url, batch_records=batch_records or DEFAULT_BATCH_RECORDS,
+                       concurrency=concurrency or DEFAULT_CONCURRENCY, headers=headers) as sink:
+        for record in records:
+            sink.write(record)
+        return sink.close()
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Scrape a program template sheet and print its records as JSON.',
+        usage='python scraper_api.py <sheet_id> [tab_name] [athlete_name] [start_date]\n'
+              '       python scraper_api.py <sheet_id> [tab_name[,tab_name...] | "*"] '
+              '[athlete_name] [start_date] --workbook\n'
+              '       python scraper_api.py --file <file.csv | file.xlsx | directory> [tab_name] '
+              '[athlete_name] [start_date]\n'
+              '       python scraper_api.py --stdin [tab_name] [athlete_name] [start_date]\n'
+              '       python scraper_api.py --batch MANIFEST [--fetch-workers N] [--parse-workers N]\n'
+              '       python scraper_api.py --serve [--host HOST] [--port PORT] [--workers N]'
+    )
+    parser.add_argument('sheet_id', nargs='?')
+    parser.add_argument('tab_name', nargs='?', default=None)
+    parser.add_argument('athlete_name', nargs='?', default='')
+    parser.add_argument('start_date', nargs='?', default='')
+    parser.add_argument('--file', default=None, metavar='PATH',
+                        help='Scrape an exported CSV or xlsx file, or every one under a directory, instead of a '
+                             'sheet ID; the positionals are then [tab_name] [athlete_name] [start_date]')
+    parser.add_argument('--stdin', action='store_true',
+                        help='Scrape CSV text or xlsx bytes read from stdin (positionals as with --file)')
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE,
+                        help='Parse engine: stdlib csv (fast startup) or pandas')
+    parser.add_argument('--format', choices=['json', 'ndjson', 'columnar'], default='json',
+                        help='json: one array at the end; ndjson: one record per line, streamed as weeks are parsed; '
+                             'columnar: shared fields once and per-set fields as arrays (see columnar.py)')
+    parser.add_argument('--workbook', action='store_true',
+                        help='Download the whole workbook once as xlsx and scrape the comma-separated tabs in '
+                             'tab_name, or every tab when it is omitted or "*"')
+    parser.add_argument('--list-tabs', action='store_true',
+                        help="Print the workbook's tab names as a JSON array (with --workbook)")
+    parser.add_argument('--stream', action='store_true',
+                        help='Parse the sheet while it downloads, yielding records as days complete (csv engine)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always download and parse the sheet (skip the on-disk cache)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only re-parse weeks changed since the last incremental scrape; '
+                             'prints {"delta": ..., "records": [...]}')
+    parser.add_argument('--probe', action='store_true',
+                        help='Only read the first rows of the sheet and print its layout (weeks, days, exercises, '
+                             'sample rows) as JSON, for import previews')
+    parser.add_argument('--probe-rows', type=int, default=None, help=f'Rows to read (with --probe, default {PROBE_ROWS})')
+    parser.add_argument('--probe-bytes', type=int, default=None,
+                        help=f'Bytes to read (with --probe, default {PROBE_BYTES})')
+    parser.add_argument('--summary', action='store_true',
+                        help='Add per-week, per-day and per-exercise training-load rollups, cross-checked against '
+                             'the sheet\'s Total rows; prints {"records": [...], "summary": ...}')
+    parser.add_argument('--roster', default=None, metavar='FILE',
+                        help='JSON file of {athlete_name: {lift: 1RM}}: print the records of every athlete, with '
+                             'weights prescribed from their 1RMs and the sheet\'s percents (see prescription.py)')
+    parser.add_argument('--plate-increment', type=float, default=None,
+                        help='Round prescribed weights to multiples of this (with --roster, default 1)')
+    parser.add_argument('--rounding', choices=['nearest', 'down', 'up'], default='nearest',
+                        help='Rounding to the plate increment (with --roster)')
+    parser.add_argument('--sink', default=None, metavar='URL',
+                        help='POST the records to this import endpoint in batches instead of printing them '
+                             '(defaults to $SCRAPER_SINK_URL); prints a delivery summary')
+    parser.add_argument('--sink-batch-size', type=int, default=None, help='Max records per batch (with --sink)')
+    parser.add_argument('--sink-concurrency', type=int, default=None, help='Batches in flight (with --sink)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print a JSON timing and memory report for the scrape to stderr')
+    parser.add_argument('--batch', default=None, metavar='MANIFEST',
+                        help='Scrape every job in a JSON-lines manifest (- for stdin), streaming NDJSON results')
+    parser.add_argument('--fetch-workers', type=int, default=None, help='Concurrent downloads (with --batch)')
+    parser.add_argument('--parse-workers', type=int, default=None, help='Parse processes: one per sheet with --batch, '
+                             'otherwise week blocks of the sheet are parsed in parallel')
+    parser.add_argument('--serve', action='store_true', help='Run the long-lived scrape service')
+    parser.add_argument('--host', default=None, help='Service host (with --serve)')
+    parser.add_argument('--port', type=int, default=None, help='Service port (with --serve)')
+    parser.add_argument('--workers', type=int, default=None, help='Warm worker processes (with --serve)')
+    parser.add_argument('--server', default=None,
+                        help='Send the scrape to a running service (defaults to $SCRAPER_SERVER_URL)')
+    args = parser.parse_args(argv)
+
+    import local_sheets
+    import scraper_server
+
+    if args.file is not None and args.stdin:
+        parser.error('--file and --stdin are mutually exclusive')
+    # Local input is only ever read when asked for, never guessed from the sheet ID
+    local_source = local_sheets.STDIN if args.stdin else args.file
+    if local_source is not None:
+        if args.start_date:
+            parser.error('--file and --stdin take no sheet_id: [tab_name] [athlete_name] [start_date]')
+        args.tab_name, args.athlete_name, args.start_date = args.sheet_id, args.tab_name or '', args.athlete_name
+        args.sheet_id = None
+
+    if args.serve:
+        scraper_server.serve(args.host or scraper_server.DEFAULT_HOST,
+                             args.port or scraper_server.DEFAULT_PORT,
+                             args.workers, args.engine, not args.no_cache)
+        return
+
+    if args.batch:
+        import batch_scrape
+
+        try:
+            if args.batch == '-':
+                jobs = list(batch_scrape.read_manifest(sys.stdin))
+            else:
+                with open(args.batch, 'r', encoding='utf-8') as f:
+                    jobs = list(batch_scrape.read_manifest(f))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        results = batch_scrape.scrape_many(
+            jobs,
+            fetch_workers=args.fetch_workers or batch_scrape.DEFAULT_FETCH_WORKERS,
+            parse_workers=args.parse_workers,
+            engine=args.engine,
+            cache=None if args.no_cache else default_cache()
+        )
+        failures = batch_scrape.write_results(results, sys.stdout)
+        if failures:
+            print(f"Error: {failures} of {len(jobs)} jobs failed", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if not args.sheet_id and local_source is None:
         print("Usage: python scraper_api.py <sheet_id> [tab_name] [athlete_name] [start_date]")
         sys.exit(1)
 
-    sheet_id = sys.argv[1]
-    tab_name = sys.argv[2] if len(sys.argv) > 2 else '4-Day Template'
-    athlete_name = sys.argv[3].lower().strip() if len(sys.argv) > 3 and sys.argv[3].strip() else ''
-    start_date = sys.argv[4].strip() if len(sys.argv) > 4 and sys.argv[4].strip() else ''
+    sheet_id = args.sheet_id
+    tab_name = '4-Day Template' if args.tab_name is None else args.tab_name
+    athlete_name = args.athlete_name.lower().strip()
+    start_date = args.start_date.strip()
+    server_url = args.server or os.environ.get(scraper_server.SERVER_URL_ENV)
+    sink_url = args.sink or os.environ.get(SINK_URL_ENV)
+    profile = enable_profiling() if args.profile else get_profiler()
 
     try:
-        exercises = scrape_sheet(sheet_id, tab_name, athlete_name, start_date)
+        import workbook
+
+        exercises = None
+        local = local_source is not None
+        tab_names = None
+        if args.tab_name and args.tab_name != workbook.ALL_TABS:
+            tab_names = [name.strip() for name in args.tab_name.split(',') if name.strip()]
 
-        # Output as JSON to stdout
-        print(json.dumps(exercises, ensure_ascii=False))
+        if args.list_tabs:
+            source = local_source if local else workbook.fetch_workbook(sheet_id, None if args.no_cache else default_cache())
+            print(json.dumps(workbook.list_tabs(source), ensure_ascii=False))
+            return
+        elif args.probe:
+            if local:
+                # Local files are read whole anyway
+                grid = get_sheet_data(local_source, tab_name, args.engine, local=True)
+                summary = {'program_name': tab_name, 'complete': True, 'rows_read': len(grid),
+                           **layout_summary(grid)}
+            else:
+                summary = None
+                if server_url:
+                    try:
+                        # The service keeps the probe's download open for the scrape that follows it
+                        summary = scraper_server.request_probe(server_url, sheet_id, tab_name,
+                                                               args.probe_rows, args.probe_bytes)
+                    except scraper_server.ScraperServerError:
+                        raise
+                    except OSError as e:
+                        print(f"Scraper service unavailable ({e}), probing locally", file=sys.stderr)
+                if summary is None:
+                    probe = probe_sheet(sheet_id, tab_name, None if args.no_cache else default_cache(),
+                                        args.probe_rows or PROBE_ROWS, args.probe_bytes or PROBE_BYTES)
+                    summary = probe.summary()
+                    probe.close()
+            with profile.stage('output'):
+                print(json.dumps(summary, ensure_ascii=False))
+            return
+        elif args.summary:
+            cache = None if args.no_cache else default_cache()
+            result = scrape_sheet_summary(local_source if local else sheet_id, tab_name, athlete_name, start_date,
+                                          args.engine, cache, args.parse_workers, local)
+            with profile.stage('output'):
+                print(json.dumps(result, ensure_ascii=False))
+            return
+        elif args.roster:
+            from prescription import load_roster, iter_roster_records, DEFAULT_INCREMENT
+
+            # Athlete names are normalized like the athlete_name argument
+            roster = {name.lower().strip(): maxes for name, maxes in load_roster(args.roster).items()}
+            cache = None if args.no_cache else default_cache()
+            grid = get_sheet_data(local_source if local else sheet_id, tab_name, args.engine, cache, local)
+            template = parse_template(grid, tab_name, args.parse_workers)
+            increment = DEFAULT_INCREMENT if args.plate_increment is None else args.plate_increment
+            exercises = iter_roster_records(template, roster, start_date, increment, args.rounding)
+        elif local:
+            # Files, directories and stdin are read as they are: no network, cache or service
+            exercises = local_sheets.iter_local_records(local_source, tab_names, athlete_name, start_date,
+                                                        args.engine, args.parse_workers)
+        elif args.workbook:
+            source = workbook.fetch_workbook(sheet_id, None if args.no_cache else default_cache())
+            exercises = workbook.iter_workbook_records(source, tab_names, athlete_name, start_date,
+                                                       args.parse_workers)
+        elif args.incremental:
+            cache = None if args.no_cache else default_cache()
+            result = scrape_sheet_incremental(sheet_id, tab_name, athlete_name, start_date, args.engine, cache)
+            with profile.stage('output'):
+                print(json.dumps(result, ensure_ascii=False))
+            return
+        elif server_url:
+            try:
+                with profile.stage('service_request'):
+                    exercises = scraper_server.request_scrape(server_url, sheet_id, tab_name, athlete_name, start_date)
+                profile.count('records', len(exercises))
+            except scraper_server.ScraperServerError:
+                raise
+            except OSError as e:
+                # Service isn't running; fall back to scraping in this process
+                print(f"Scraper service unavailable ({e}), scraping locally", file=sys.stderr)
+
+        if exercises is None:
+            cache = None if args.no_cache else default_cache()
+            exercises = iter_scrape_sheet(sheet_id, tab_name, athlete_name, start_date, args.engine, cache,
+                                          args.parse_workers, args.stream)
+
+        # Records are parsed lazily while being written; the output stage's own time is serialization
+        with profile.stage('output'):
+            if sink_url:
+                print(json.dumps(send_to_sink(exercises, sink_url, args.sink_batch_size, args.sink_concurrency)))
+            elif args.format == 'ndjson':
+                write_ndjson(exercises)
+            elif args.format == 'columnar':
+                from columnar import to_columnar, dumps
+                print(dumps(to_columnar(list(exercises))))
+            else:
+                # Output as JSON to stdout
+                print(json.dumps(list(exercises), ensure_ascii=False))
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if profile.enabled:
+            # The report goes to stderr so stdout stays parseable
+            sys.stdout.flush()
+            profile.write(sys.stderr)
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Long-lived scraper service - keeps warm worker processes so each scrape only
+pays for the sheet fetch and the parse, not interpreter startup and imports.
+
+Identical scrapes that arrive while one is already running (several coaches
+importing the same shared template) don't start their own: they wait for the
+running fetch and parse of that sheet and tab. Workers send back the parsed
+template rather than records, and each request assigns it to its own athlete
+and start date.
+
+An import preview (POST /probe) reads only the first rows of the sheet. Once
+the layout is sent, the rest of that download is read in the background, which
+also stores it in the sheet cache. A scrape of the same sheet and tab within
+PROBE_KEEP_SECONDS parses that body instead of fetching the sheet again; a
+later one revalidates the cached copy like any other scrape.
+
+Run with: python scraper_api.py --serve [--host 127.0.0.1] [--port 8765] [--workers 4] [--engine csv|pandas]
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import urllib.request
+import urllib.error
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any, Optional, Tuple
+
+from sheet_grid import DEFAULT_ENGINE
+from records import ParsedTemplate, assign
+from columnar import COLUMNAR_FORMAT, to_columnar, from_columnar, dumps
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+SERVER_URL_ENV = 'SCRAPER_SERVER_URL'
+
+# How long, and for how many sheets, probed bodies are kept for a scrape that follows
+PROBE_KEEP_SECONDS = 120
+MAX_OPEN_PROBES = 32
+
+
+_worker_cache = None
+
+
+def _warm_worker(engine: str = DEFAULT_ENGINE, use_cache: bool = True):
+    """Pay the heavy imports once per worker process instead of once per scrape."""
+    global _worker_cache
+    import scraper_api  # noqa: F401
+    from sheet_cache import get_session, default_cache
+    if engine == 'pandas':
+        import pandas  # noqa: F401
+
+    # Keep-alive connections to Google stay open across scrapes in this worker
+    get_session()
+    if use_cache and _worker_cache is None:
+        _worker_cache = default_cache()
+
+
+def _template_job(sheet_id: str, tab_name: str, engine: str) -> ParsedTemplate:
+    import scraper_api
+    return scraper_api.scrape_template(sheet_id, tab_name, engine, _worker_cache)
+
+
+def _probe_job(sheet_id: str, body: bytes, encoding: Optional[str], tab_name: str, engine: str) -> ParsedTemplate:
+    """Parse the body a probe finished downloading, caching the records like _template_job does."""
+    import scraper_api
+    from sheet_cache import content_hash
+
+    template = scraper_api.parse_template(scraper_api.read_sheet_grid(body, engine, encoding), tab_name)
+    if _worker_cache:
+        _worker_cache.store_records(sheet_id, tab_name, content_hash(body), [tab_name], assign(template))
+    return template
+
+
+class ScraperService:
+    """Pool of warm worker processes that parse templates, one at a time per sheet and tab."""
+
+    def __init__(self, workers: Optional[int] = None, engine: str = DEFAULT_ENGINE, use_cache: bool = True):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.engine = engine
+        # (sheet_id, tab_name) -> the running scrape
+        self._in_flight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        # (sheet_id, tab_name) -> (probe, time probed, rest of its body), oldest first
+        self._probes: Dict[Tuple[str, str], Tuple[Any, float, Future]] = {}
+        self.probes_reused = 0
+        # Reads the rest of each probe's download, which also stores it in the cache
+        self._probe_reads = ThreadPoolExecutor(max_workers=MAX_OPEN_PROBES, thread_name_prefix='probe-read')
+        self.cache = None
+        if use_cache:
+            from sheet_cache import default_cache
+            self.cache = default_cache()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker,
+                                        initargs=(engine, use_cache))
+        # Start every worker now so the first requests don't pay for the imports
+        for future in [self.pool.submit(_warm_worker, engine, use_cache) for _ in range(self.workers)]:
+            future.result()
+
+    def scrape_sheet(self, sheet_id: str, tab_name: str = '4-Day Template',
+                     athlete_name: str = '', start_date: str = '') -> List[Dict[str, Any]]:
+        template = self._shared_scrape(sheet_id, tab_name).result()
+        return assign(template, athlete_name, start_date)
+
+    def _shared_scrape(self, sheet_id: str, tab_name: str) -> Future:
+        """The running scrape of this sheet and tab, started if there is none."""
+        key = (sheet_id, tab_name)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            probe, probed_at, reading = self._probes.pop(key, (None, None, None))
+            if probe is not None and time.monotonic() - probed_at > PROBE_KEEP_SECONDS:
+                # Too old to trust: its body is in the cache, so the job only revalidates it
+                probe = None
+            if probe is None:
+                future = self.pool.submit(_template_job, sheet_id, tab_name, self.engine)
+            else:
+                self.probes_reused += 1
+                future = Future()
+            self._in_flight[key] = future
+        # Outside the lock: the callback runs right away if the job has already finished
+        future.add_done_callback(lambda done: self._forget(key, done))
+        if probe is not None:
+            self._finish_probe(probe, reading, future)
+        return future
+
+    def _finish_probe(self, probe, reading: Future, future: Future):
+        """Wait for the rest of a probe's download and parse it on a worker."""
+        try:
+            body = reading.result()
+        except Exception:
+            # The connection didn't survive: fetch the sheet again
+            body = None
+        try:
+            if body is None:
+                template = self.pool.submit(_template_job, probe.sheet_id, probe.tab_name, self.engine).result()
+            else:
+                template = self.pool.submit(_probe_job, probe.sheet_id, body, probe.encoding, probe.tab_name,
+                                            self.engine).result()
+        except Exception as e:
+            future.set_exception(Exception(f"Error processing {probe.tab_name}: {e}"))
+            return
+        future.set_result(template)
+
+    def probe(self, sheet_id: str, tab_name: str = '4-Day Template', max_rows: Optional[int] = None,
+              max_bytes: Optional[int] = None) -> Dict[str, Any]:
+        """The layout of a sheet's first rows; the rest is read afterwards for a scrape that follows."""
+        import scraper_api
+        from sheet_probe import PROBE_ROWS, PROBE_BYTES
+
+        probe = scraper_api.probe_sheet(sheet_id, tab_name, self.cache, max_rows or PROBE_ROWS,
+                                        max_bytes or PROBE_BYTES)
+        summary = probe.summary()
+        reading = self._probe_reads.submit(probe.read_body)
+
+        now = time.monotonic()
+        with self._lock:
+            self._probes.pop((sheet_id, tab_name), None)
+            # Oldest first: expired probes, then as many as it takes to stay under the limit.
+            # Dropped ones finish reading into the cache on their own
+            for key, (_, probed_at, _) in list(self._probes.items()):
+                if now - probed_at > PROBE_KEEP_SECONDS or len(self._probes) >= MAX_OPEN_PROBES:
+                    del self._probes[key]
+            self._probes[(sheet_id, tab_name)] = (probe, now, reading)
+        return summary
+
+    def _forget(self, key: Tuple[str, str], future: Future):
+        # Finished scrapes aren't reused; later requests go through the sheet cache instead
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def shutdown(self):
+        with self._lock:
+            self._probes = {}
+        self._probe_reads.shutdown(wait=False, cancel_futures=True)
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+class ScrapeRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health -> {"status": "ok", "workers": N, "coalesced": N, "probes_reused": N}
+    POST /scrape -> JSON array of records, or {"error": "..."} with status 400.
+                    With "format": "columnar" in the body the records are columnar-encoded.
+    POST /probe  -> the layout summary of the sheet's first rows (see sheet_probe.py);
+                    "max_rows" and "max_bytes" in the body bound the read.
+    """
+
+    service: ScraperService = None
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status: int, body: Any):
+        data = dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        payload = json.loads(raw.decode('utf-8') or '{}')
+        if not isinstance(payload, dict):
+            raise ValueError('Request body must be a JSON object')
+        return payload
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok', 'workers': self.service.workers,
+                                  'coalesced': self.service.coalesced,
+                                  'probes_reused': self.service.probes_reused})
+        else:
+            self._send_json(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path == '/probe':
+            self._probe()
+            return
+        if self.path != '/scrape':
+            self._send_json(404, {'error': f'Unknown path {self.path}'})
+            return
+
+        from scraper_api import parse_scrape_request
+
+        try:
+            payload = self._read_json()
+            args = parse_scrape_request(payload)
+            output_format = payload.get('format') or 'json'
+            if output_format not in ('json', COLUMNAR_FORMAT):
+                raise ValueError(f'Unknown format {output_format}')
+        except ValueError as e:
+            self._send_json(400, {'error': f'Invalid request: {e}'})
+            return
+
+        try:
+            exercises = self.service.scrape_sheet(**args)
+        except Exception as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        if output_format == COLUMNAR_FORMAT:
+            exercises = to_columnar(exercises)
+        self._send_json(200, exercises)
+
+    def _probe(self):
+        from scraper_api import parse_scrape_request
+
+        try:
+            payload = self._read_json()
+            args = parse_scrape_request(payload)
+            limits = [payload.get(name) for name in ('max_rows', 'max_bytes')]
+            if any(limit is not None and (not isinstance(limit, int) or limit <= 0) for limit in limits):
+                raise ValueError('max_rows and max_bytes must be positive integers')
+        except ValueError as e:
+            self._send_json(400, {'error': f'Invalid request: {e}'})
+            return
+
+        try:
+            summary = self.service.probe(args['sheet_id'], args['tab_name'], *limits)
+        except Exception as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        self._send_json(200, summary)
+
+    def log_message(self, format, *args):
+        # Keep stdout clean; request logs go to stderr
+        print(f"[scraper-server] {self.address_string()} {format % args}", file=sys.stderr)
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: Optional[int] = None,
+          engine: str = DEFAULT_ENGINE, use_cache: bool = True):
+    """Run the scrape service until interrupted."""
+    service = ScraperService(workers, engine, use_cache)
+    handler = type('BoundScrapeRequestHandler', (ScrapeRequestHandler,), {'service': service})
+    httpd = ThreadingHTTPServer((host, port), handler)
+    print(f"Scraper service listening on http://{host}:{httpd.server_port} with {service.workers} workers",
+          file=sys.stderr)
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.shutdown()
+
+
+class ScraperServerError(Exception):
+    """Raised by the client when the service rejected the scrape."""
+
+
+def _post_json(server_url: str, path: str, payload: Dict[str, Any], timeout: float) -> Any:
+    req = urllib.request.Request(
+        server_url.rstrip('/') + path,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read().decode('utf-8')).get('error')
+        except (ValueError, AttributeError):
+            message = None
+        raise ScraperServerError(message or f"Scraper service returned HTTP {e.code}")
+
+
+def request_scrape(server_url: str, sheet_id: str, tab_name: str = '4-Day Template',
+                   athlete_name: str = '', start_date: str = '', timeout: float = 60) -> List[Dict[str, Any]]:
+    """
+    Thin client for a running service. Raises ScraperServerError for scrape errors and
+    OSError (URLError) when the service isn't reachable.
+    """
+    return from_columnar(_post_json(server_url, '/scrape', {
+        'sheet_id': sheet_id,
+        'tab_name': tab_name,
+        'athlete_name': athlete_name,
+        'start_date': start_date,
+        'format': COLUMNAR_FORMAT,
+    }, timeout))
+
+
+def request_probe(server_url: str, sheet_id: str, tab_name: str = '4-Day Template',
+                  max_rows: Optional[int] = None, max_bytes: Optional[int] = None,
+                  timeout: float = 60) -> Dict[str, Any]:
+    """Ask a running service for a sheet's layout; a scrape of it that follows reuses the download."""
+    payload = {'sheet_id': sheet_id, 'tab_name': tab_name}
+    if max_rows:
+        payload['max_rows'] = max_rows
+    if max_bytes:
+        payload['max_bytes'] = max_bytes
+    return _post_json(server_url, '/probe', payload, timeout)
@@ -0,0 +1,307 @@
+"""
+On-disk cache for sheet CSV fetches.
+
+Each (sheet_id, tab) gets an entry directory holding the last downloaded body,
+its ETag/Last-Modified validators and a content hash, plus the records parsed
+from that exact body. Fetches send conditional requests, and when the body's
+hash is unchanged the cached records are returned without parsing again.
+Each entry also keeps per-week fingerprints and records for incremental
+re-scrapes; those survive body changes, since most edits touch one week.
+Entries expire after a TTL and the least recently used ones are evicted once
+the cache grows past its size limit. Parsed records are keyed by the parser
+version and the exercise normalizer's configuration as well, since both decide
+which records a body gives.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+# Used when the cache directory can't be written, e.g. a read-only deploy
+FALLBACK_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'sheet-scraper-cache')
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+CACHE_DIR_ENV = 'SCRAPER_CACHE_DIR'
+CACHE_DISABLE_ENV = 'SCRAPER_NO_CACHE'
+
+# Bump when parser output changes so cached records from older parsers are ignored
+PARSER_VERSION = 3
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Shared requests.Session so fetches reuse pooled keep-alive connections."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def content_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def _parse_key() -> List[Any]:
+    """What the records parsed from a body depend on besides the body."""
+    from exercise_names import get_normalizer
+
+    return [PARSER_VERSION, get_normalizer().fingerprint]
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class CacheEntry:
+    """A cached body and its validators."""
+
+    __slots__ = ('path', 'meta')
+
+    def __init__(self, path: str, meta: Dict[str, Any]):
+        self.path = path
+        self.meta = meta
+
+    @property
+    def content_hash(self) -> str:
+        return self.meta['content_hash']
+
+    @property
+    def encoding(self) -> Optional[str]:
+        return self.meta.get('encoding')
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.meta.get('etag'):
+            headers['If-None-Match'] = self.meta['etag']
+        if self.meta.get('last_modified'):
+            headers['If-Modified-Since'] = self.meta['last_modified']
+        return headers
+
+    def read_body(self) -> bytes:
+        with open(os.path.join(self.path, 'body'), 'rb') as f:
+            return f.read()
+
+
+class SheetCache:
+    """Body and parsed-records cache keyed by (sheet_id, tab)."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = DEFAULT_TTL,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # Raises OSError if the directory can't be created or written
+        os.makedirs(cache_dir, exist_ok=True)
+        if not os.access(cache_dir, os.W_OK | os.X_OK):
+            raise PermissionError(f"Cache directory {cache_dir} is not writable")
+
+    def _entry_path(self, sheet_id: str, tab_name: Optional[str]) -> str:
+        key = hashlib.sha256(f"{sheet_id}\0{tab_name or ''}".encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, sheet_id: str, tab_name: Optional[str]) -> Optional[CacheEntry]:
+        """The cached entry, or None if missing or older than the TTL."""
+        path = self._entry_path(sheet_id, tab_name)
+        meta_path = os.path.join(path, 'meta.json')
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - meta.get('fetched_at', 0) > self.ttl:
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+        # Mark as recently used for eviction
+        os.utime(meta_path)
+        return CacheEntry(path, meta)
+
+    def store(self, sheet_id: str, tab_name: Optional[str], body: bytes, etag: Optional[str] = None,
+              last_modified: Optional[str] = None, encoding: Optional[str] = None) -> CacheEntry:
+        """Save a freshly downloaded body, dropping records parsed from an older one."""
+        path = self._entry_path(sheet_id, tab_name)
+        body_hash = content_hash(body)
+        previous = self.load(sheet_id, tab_name)
+        os.makedirs(path, exist_ok=True)
+
+        if previous is None or previous.content_hash != body_hash:
+            for name in os.listdir(path):
+                if name.startswith('records-'):
+                    os.remove(os.path.join(path, name))
+            _write_atomic(os.path.join(path, 'body'), body)
+
+        meta = {
+            'sheet_id': sheet_id,
+            'tab_name': tab_name,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': encoding,
+            'content_hash': body_hash,
+            'size': len(body),
+            'fetched_at': time.time(),
+        }
+        _write_atomic(os.path.join(path, 'meta.json'), json.dumps(meta).encode('utf-8'))
+        self.evict()
+        return CacheEntry(path, meta)
+
+    def touch(self, entry: CacheEntry):
+        """Restart the TTL of an entry the server confirmed unchanged (304)."""
+        entry.meta['fetched_at'] = time.time()
+        _write_atomic(os.path.join(entry.path, 'meta.json'), json.dumps(entry.meta).encode('utf-8'))
+
+    def _records_path(self, sheet_id: str, tab_name: Optional[str], body_hash: str, stamp: List[str]) -> str:
+        key = hashlib.sha256(
+            json.dumps(_parse_key() + [body_hash] + list(stamp)).encode('utf-8')
+        ).hexdigest()[:32]
+        return os.path.join(self._entry_path(sheet_id, tab_name), f'records-{key}.ndjson')
+
+    def _week_state_path(self, sheet_id: str, tab_name: Optional[str], stamp: List[str]) -> str:
+        key = hashlib.sha256(json.dumps(_parse_key() + list(stamp)).encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self._entry_path(sheet_id, tab_name), f'weeks-{key}.json')
+
+    def load_week_state(self, sheet_id: str, tab_name: Optional[str], stamp: List[str]) -> Optional[Dict[str, Any]]:
+        """Week fingerprints and records saved by the last incremental scrape, if any."""
+        try:
+            with open(self._week_state_path(sheet_id, tab_name, stamp), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store_week_state(self, sheet_id: str, tab_name: Optional[str], stamp: List[str], state: Dict[str, Any]):
+        path = self._week_state_path(sheet_id, tab_name, stamp)
+        if not os.path.isdir(os.path.dirname(path)):
+            return
+        _write_atomic(path, json.dumps(state, ensure_ascii=False).encode('utf-8'))
+        self.evict()
+
+    def iter_records(self, sheet_id: str, tab_name: Optional[str], body_hash: str,
+                     stamp: List[str]) -> Optional[Iterator[Dict[str, Any]]]:
+        """Stream the records previously parsed from the body with this hash, or None if there are none."""
+        try:
+            f = open(self._records_path(sheet_id, tab_name, body_hash, stamp), 'r', encoding='utf-8')
+        except OSError:
+            return None
+
+        def records():
+            with f:
+                for line in f:
+                    yield json.loads(line)
+
+        return records()
+
+    def load_records(self, sheet_id: str, tab_name: Optional[str], body_hash: str,
+                     stamp: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """Records previously parsed from the body with this hash, if any."""
+        records = self.iter_records(sheet_id, tab_name, body_hash, stamp)
+        if records is None:
+            return None
+        try:
+            return list(records)
+        except ValueError:
+            return None
+
+    def records_writer(self, sheet_id: str, tab_name: Optional[str], body_hash: str,
+                       stamp: List[str]) -> Optional['RecordsWriter']:
+        """Writer that saves records one at a time as they are parsed."""
+        path = self._records_path(sheet_id, tab_name, body_hash, stamp)
+        if not os.path.isdir(os.path.dirname(path)):
+            return None
+        return RecordsWriter(self, path)
+
+    def store_records(self, sheet_id: str, tab_name: Optional[str], body_hash: str, stamp: List[str],
+                      records: Iterable[Dict[str, Any]]):
+        writer = self.records_writer(sheet_id, tab_name, body_hash, stamp)
+        if writer is None:
+            return
+        for record in records:
+            writer.write(record)
+        writer.commit()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        entries = []
+        total = 0
+        now = time.time()
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(path, 'meta.json')
+            try:
+                used_at = os.path.getmtime(meta_path)
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+            except OSError:
+                continue
+            if now - used_at > self.ttl:
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            entries.append((used_at, size, path))
+            total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+
+class RecordsWriter:
+    """Streams records to a temp NDJSON file that only replaces the cached copy on commit."""
+
+    def __init__(self, cache: SheetCache, path: str):
+        self.cache = cache
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.file = open(self.tmp_path, 'w', encoding='utf-8')
+
+    def write(self, record: Dict[str, Any]):
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def commit(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+        self.cache.evict()
+
+    def discard(self):
+        self.file.close()
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+
+
+def default_cache() -> Optional[SheetCache]:
+    """
+    Cache used by the CLI and the service, configured from the environment.
+    Falls back to a temp directory when the cache directory can't be written,
+    and to no cache when neither can.
+    """
+    if os.environ.get(CACHE_DISABLE_ENV):
+        return None
+    for cache_dir in (os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR, FALLBACK_CACHE_DIR):
+        try:
+            return SheetCache(cache_dir)
+        except OSError:
+            continue
+    return None
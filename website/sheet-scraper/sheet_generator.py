@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Synthetic program sheets in the horizontal template layout.
+
+Produces CSV text shaped like a real "N-Day Template" export, so parser changes
+can be benchmarked and checked without network access:
+
+    header line   program title
+    row 0         lift names (columns 0-5)
+    row 1         1RMs for those lifts
+    row 3         "Week N" above the first column of each week block
+    row 4         set numbers
+    row 5+        per day: "Day N", readiness, exercises (reps / weights /
+                  percents rows), Total rows, an accessories block and the
+                  athlete comments row
+
+Usage: python sheet_generator.py [weeks] [days] [exercises] [sets] > sheet.csv
+"""
+
+import csv
+import io
+import random
+import sys
+from typing import List
+
+FIRST_WEEK_COL = 7
+
+LIFTS = ['Snatch', 'Clean', 'Jerk', 'Clean and Jerk', 'Back Squat', 'Front Squat']
+ONE_REP_MAXES = [100, 125, 120, 115, 170, 145]
+
+# (label as coaches write it, lift whose 1RM it is prescribed from)
+EXERCISES = [
+    ('Snatch', 'Snatch'),
+    ('Clean & Jerk', 'Clean and Jerk'),
+    ('Back Squat', 'Back Squat'),
+    ('Snatch Pull', 'Snatch'),
+    ('Front Squat', 'Front Squat'),
+    ('Push Press', 'Jerk'),
+    ('Power Clean', 'Clean'),
+    ('Clean Pull', 'Clean'),
+    ('Hang Snatch', 'Snatch'),
+    ('Split Jerk', 'Jerk'),
+]
+
+ACCESSORIES = ['RDL', 'Hip Thrust', 'Plank Hold', 'Pull Ups', 'Walking Lunges', 'Back Extensions']
+
+
+def generate_sheet(weeks: int = 4, days: int = 4, exercises: int = 5, sets: int = 5, seed: int = 1) -> str:
+    """CSV text of a weeks x days x exercises x sets program."""
+    rnd = random.Random(seed)
+    block_width = sets + 2  # label column, set columns, one spacer
+    n_cols = FIRST_WEEK_COL + weeks * block_width
+    one_rep_maxes = dict(zip(LIFTS, ONE_REP_MAXES))
+    rows: List[List[str]] = []
+
+    def blank() -> List[str]:
+        return [''] * n_cols
+
+    def week_cols():
+        return [FIRST_WEEK_COL + week * block_width for week in range(weeks)]
+
+    def label_row(text: str) -> List[str]:
+        row = blank()
+        for col in week_cols():
+            row[col] = text
+        return row
+
+    title = blank()
+    title[0] = 'Olympic Weightlifting Program'
+    rows.append(title)
+
+    lift_names = blank()
+    lift_names[:len(LIFTS)] = LIFTS
+    rows.append(lift_names)
+
+    maxes = blank()
+    maxes[:len(LIFTS)] = [str(value) for value in ONE_REP_MAXES]
+    rows.append(maxes)
+
+    rows.append(blank())
+
+    week_labels = blank()
+    set_labels = blank()
+    for week, col in enumerate(week_cols(), 1):
+        week_labels[col] = f'Week {week}'
+        for set_num in range(1, sets + 1):
+            set_labels[col + set_num] = str(set_num)
+    rows.append(week_labels)
+    rows.append(set_labels)
+
+    for day in range(1, days + 1):
+        rows.append(label_row(f'Day {day}'))
+        rows.append(label_row('Rate Your Readiness (1-10)'))
+
+        day_reps = [0] * weeks
+        day_tonnage = [0.0] * weeks
+        for exercise_idx in range(exercises):
+            name, lift = EXERCISES[(day + exercise_idx) % len(EXERCISES)]
+            reps_row, weights_row, percents_row = label_row(name), blank(), blank()
+
+            for week, col in enumerate(week_cols()):
+                for set_num in range(1, sets + 1):
+                    reps = rnd.choice([1, 2, 2, 3, 3, 5])
+                    percent = min(95, 60 + 2 * week + 4 * set_num + rnd.randint(-3, 3))
+                    weight = round(one_rep_maxes[lift] * percent / 100)
+                    reps_row[col + set_num] = str(reps)
+                    weights_row[col + set_num] = str(weight)
+                    percents_row[col + set_num] = f'{percent}%'
+                    day_reps[week] += reps
+                    day_tonnage[week] += reps * weight
+
+            rows += [reps_row, weights_row, percents_row]
+
+        reps_total = label_row('Total Reps')
+        tonnage_total = label_row('Total Tonnage')
+        for week, col in enumerate(week_cols()):
+            reps_total[col + 1] = str(day_reps[week])
+            tonnage_total[col + 1] = str(round(day_tonnage[week]))
+        rows += [reps_total, tonnage_total]
+
+        rows.append(label_row('Accessories 3 x 8-12:'))
+        for offset in range(2):
+            rows.append(label_row(ACCESSORIES[(day + offset) % len(ACCESSORIES)]))
+
+        rows.append(label_row('Athlete Comments:'))
+        rows.append(blank())
+
+    out = io.StringIO()
+    csv.writer(out, lineterminator='\n').writerows(rows)
+    return out.getvalue()
+
+
+if __name__ == '__main__':
+    sys.stdout.write(generate_sheet(*[int(arg) for arg in sys.argv[1:5]]))
@@ -0,0 +1,203 @@
+"""
+Positional sheet grid shared by the parse engines.
+
+The parsers only ever address cells by (row, column) position, so they work on a
+plain list-of-lists instead of a DataFrame. Row 0 of the grid is the first row
+*after* the CSV header line, matching what pd.read_csv would give as df.iloc[0].
+
+Both engines read straight from the downloaded bytes and keep cells as strings.
+gviz exports pad sheets with empty columns and rows; those are dropped at the
+right and bottom edges (one empty row is kept, see _drop_trailing_empty_rows).
+"""
+
+import io
+import re
+import csv
+from io import StringIO
+from itertools import islice
+from typing import Any, List, Optional, TextIO, Union
+
+ENGINES = ('csv', 'pandas')
+DEFAULT_ENGINE = 'csv'
+
+# Layout the parsers rely on: "Week N" headers on row 3 from column 7 on, each
+# starting a week block
+WEEK_HEADER_ROW = 3
+FIRST_WEEK_COL = 7
+WEEK_HEADER_PATTERN = re.compile(r'[Ww]eek\s+(\d+)')
+
+CsvData = Union[str, bytes]
+
+# Cell values pd.read_csv treats as missing by default, so both engines agree
+NA_VALUES = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null',
+])
+
+
+class SheetGrid:
+    """Rows of cell values, with None for empty cells. Rows are padded to n_cols."""
+
+    __slots__ = ('rows', 'n_cols')
+
+    def __init__(self, rows: List[List[Any]], n_cols: Optional[int] = None):
+        if n_cols is None:
+            n_cols = max((len(row) for row in rows), default=0)
+        for row in rows:
+            if len(row) < n_cols:
+                row.extend([None] * (n_cols - len(row)))
+        self.rows = rows
+        self.n_cols = n_cols
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def shape(self):
+        return (len(self.rows), self.n_cols)
+
+    def cell(self, row: int, col: int) -> Any:
+        """Value at (row, col), or None if empty or out of range."""
+        if row >= len(self.rows) or col >= self.n_cols:
+            return None
+        return self.rows[row][col]
+
+    def column_slice(self, start_col: int, end_col: int) -> 'SheetGrid':
+        """Columns start_col..end_col (inclusive) of every row, as a new grid."""
+        end = min(end_col + 1, self.n_cols)
+        return SheetGrid([row[start_col:end] for row in self.rows], max(0, end - start_col))
+
+    @classmethod
+    def from_csv(cls, data: CsvData, encoding: Optional[str] = None) -> 'SheetGrid':
+        """Build a grid with the stdlib csv module (no pandas import)."""
+        reader = csv.reader(_text_stream(data, encoding))
+        next(reader, None)  # header line, same as pd.read_csv
+        rows = [
+            [None if value in NA_VALUES else value for value in row]
+            for row in reader
+            if row  # pd.read_csv skips blank lines
+        ]
+        return cls(_drop_trailing_empty_columns(_drop_trailing_empty_rows(rows)))
+
+    @classmethod
+    def from_dataframe(cls, df) -> 'SheetGrid':
+        """Wrap a DataFrame read by the pandas engine."""
+        import pandas as pd
+
+        # A copy: the array backing read_csv_frame's DataFrame is read-only
+        values = df.to_numpy(dtype=object, copy=True)
+        values[pd.isna(values)] = None
+        return cls(values.tolist(), len(df.columns))
+
+
+def _text_stream(data: CsvData, encoding: Optional[str]) -> TextIO:
+    if isinstance(data, str):
+        return StringIO(data)
+    # Decoded chunk by chunk as it is read, instead of into one full-size str first
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding or 'utf-8', errors='replace', newline='')
+
+
+# Both take rows from from_csv, where every value is a non-empty string or
+# None, so any() tells whether a stretch of cells holds a value
+
+def _drop_trailing_empty_columns(rows: List[List[Any]]) -> List[List[Any]]:
+    """Cut every row after the last column holding a value in any row."""
+    n_cols = 0
+    for row in rows:
+        if len(row) > n_cols and any(row[n_cols:]):
+            # Bisect for the end of the row's values; any() scans in C
+            low, high = n_cols + 1, len(row)
+            while low < high:
+                mid = (low + high) // 2
+                if any(row[mid:]):
+                    low = mid + 1
+                else:
+                    high = mid
+            n_cols = low
+    for row in rows:
+        if len(row) > n_cols:
+            del row[n_cols:]
+    return rows
+
+
+def _drop_trailing_empty_rows(rows: List[List[Any]]) -> List[List[Any]]:
+    """
+    Drop the all-empty rows at the bottom, keeping one: an exercise's percents
+    row is two rows below its label, and the parsers skip an exercise whose
+    percents row is past the end of the sheet.
+    """
+    end = len(rows)
+    while end and not any(rows[end - 1]):
+        end -= 1
+    del rows[end + 1:]
+    return rows
+
+
+def _last_filled(values, axis: int) -> int:
+    """
+    Position of the last row (axis 0) or column (axis 1) of a 2-D array holding a
+    value, or -1. Checks blocks from the end, growing, so an unpadded edge costs
+    one small block.
+    """
+    import pandas as pd
+
+    end, size = values.shape[axis], 8
+    while end:
+        start = max(0, end - size)
+        block = values[start:end] if axis == 0 else values[:, start:end]
+        filled = (~pd.isna(block)).any(axis=1 - axis).nonzero()[0]
+        if len(filled):
+            return start + int(filled[-1])
+        end, size = start, size * 4
+    return -1
+
+
+def read_csv_frame(data: CsvData, encoding: Optional[str] = None):
+    """
+    Read CSV into a DataFrame of strings (NaN for empty cells) with trailing
+    empty columns and rows dropped. Columns are labelled by position.
+    """
+    import pandas as pd
+
+    # Sheets are rectangular, so the header rows give the width. A later, wider
+    # row makes pandas raise, and only then is the whole sheet scanned for it
+    head = list(islice(csv.reader(_text_stream(data, encoding)), WEEK_HEADER_ROW + 2))
+    width = max(map(len, head), default=0)
+    if not width:
+        return pd.DataFrame()
+    try:
+        df = _read_frame(data, encoding, width)
+    except pd.errors.ParserError:
+        df = _read_frame(data, encoding, max(map(len, csv.reader(_text_stream(data, encoding)))))
+
+    # pandas keeps an array per column; the edges are found on one 2-D array
+    # instead, which also backs the result, so SheetGrid copies it only once
+    values = df.to_numpy(dtype=object)
+    n_rows = _last_filled(values, 0) + 2  # keep one empty row, as _drop_trailing_empty_rows does
+    n_cols = _last_filled(values, 1) + 1
+    # dtype=object, or pandas infers a string dtype for every column again
+    return pd.DataFrame(values[:n_rows, :n_cols], dtype=object, copy=False)
+
+
+def _read_frame(data: CsvData, encoding: Optional[str], width: int):
+    import pandas as pd
+
+    if isinstance(data, str):
+        source, options = StringIO(data), {}
+    else:
+        source, options = io.BytesIO(data), {'encoding': encoding or 'utf-8', 'encoding_errors': 'replace'}
+    # dtype=object: cells are kept as the str objects the parser made, without type
+    # inference. The header line is skipped, as header=0 would, and columns are named
+    # by position
+    return pd.read_csv(source, dtype=object, header=None, skiprows=1, names=range(width), **options)
+
+
+def read_csv_grid(data: CsvData, engine: str = DEFAULT_ENGINE, encoding: Optional[str] = None) -> SheetGrid:
+    """Parse CSV text, or bytes in the given encoding (default UTF-8), into a grid with the requested engine."""
+    if engine == 'csv':
+        return SheetGrid.from_csv(data, encoding)
+    if engine == 'pandas':
+        # Only the pandas engine pays for the pandas import
+        return SheetGrid.from_dataframe(read_csv_frame(data, encoding))
+    raise ValueError(f"Unknown engine '{engine}'. Expected one of: {', '.join(ENGINES)}")
@@ -0,0 +1,74 @@
+"""
+Sheet-level structural index.
+
+Every week block has an anchor column (its first column) holding the row
+labels: day markers, exercise names, accessories blocks, totals and comments.
+The index classifies those labels for all anchor columns in a single pass over
+the sheet, so structure detection for every week is a lookup instead of a rescan.
+"""
+
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sheet_grid import SheetGrid
+from label_classifier import classify_label, DAY
+
+DATA_START_ROW = 5
+
+
+class Label(NamedTuple):
+    row: int
+    text: str
+    kind: str
+    exercise_name: Optional[str]
+    exercise_category: Optional[str]
+    day_number: Optional[int]
+    ends_accessories: bool
+    is_accessory_name: bool
+
+
+class SheetIndex:
+    """Classified labels per anchor column, sorted by row."""
+
+    def __init__(self, grid: SheetGrid, anchor_cols: Iterable[int], start_row: int = DATA_START_ROW):
+        self.start_row = start_row
+        self.labels: Dict[int, List[Label]] = {col: [] for col in anchor_cols}
+        self._rows: Dict[int, List[int]] = {col: [] for col in self.labels}
+        self.add_rows(grid, start_row)
+
+    def add_rows(self, grid: SheetGrid, start: int, end: Optional[int] = None):
+        """Index grid rows [start, end). Rows must be added in increasing order."""
+        anchors = [col for col in self.labels if col < grid.n_cols]
+        for row_idx in range(max(start, self.start_row), len(grid) if end is None else end):
+            row = grid.rows[row_idx]
+            for col in anchors:
+                cell = row[col]
+                if cell is None:
+                    continue
+                text = str(cell).strip()
+                if not text:
+                    continue
+                self.labels[col].append(Label(row_idx, text, *classify_label(text)))
+                self._rows[col].append(row_idx)
+
+    def labels_between(self, col: int, start_row: int, end_row: int) -> List[Label]:
+        """Labels in column col for rows [start_row, end_row)."""
+        rows = self._rows.get(col)
+        if not rows:
+            return []
+        return self.labels[col][bisect_left(rows, start_row):bisect_left(rows, end_row)]
+
+    def label_at(self, col: int, row_idx: int) -> Optional[Label]:
+        rows = self._rows.get(col)
+        if not rows:
+            return None
+        pos = bisect_left(rows, row_idx)
+        if pos < len(rows) and rows[pos] == row_idx:
+            return self.labels[col][pos]
+        return None
+
+    def day_markers(self, col: int, start_row: int, end_row: int) -> List[Tuple[int, int]]:
+        """(day_num, row_idx) for every day marker in column col within [start_row, end_row)."""
+        return [(label.day_number, label.row)
+                for label in self.labels_between(col, start_row, end_row)
+                if label.kind == DAY]
@@ -0,0 +1,155 @@
+"""
+Structure probe for import previews.
+
+Before a coach commits to an import, the UI only needs "N weeks, M days, these
+exercises". A probe streams the sheet's CSV export and stops reading after
+PROBE_ROWS rows or PROBE_BYTES bytes, then runs find_week_blocks and a
+labels-only pass over the week blocks' anchor columns (find_day_blocks and the
+classified labels; no set cell is converted). Week headers are at the top of
+the sheet, so every week is seen; days and exercises are those in the rows
+read, and the summary's "complete" says whether that was the whole sheet.
+
+The rest of the download is left unread rather than dropped: if the coach
+confirms, SheetProbe.template() reads it from the same response and parses the
+whole sheet, so the import doesn't fetch it again.
+
+CLI: python scraper_api.py <sheet_id> [tab_name] --probe [--probe-rows N] [--probe-bytes N]
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sheet_grid import SheetGrid, DEFAULT_ENGINE
+from sheet_index import SheetIndex, DATA_START_ROW
+from sheet_stream import SheetStream, ChunkReader, iter_csv_rows
+from label_classifier import ACCESSORIES, EXERCISE
+from records import ParsedTemplate
+
+PROBE_ROWS = 200
+PROBE_BYTES = 512 * 1024
+SAMPLE_ROWS = 12
+
+
+def layout_summary(grid: SheetGrid, sample_rows: int = SAMPLE_ROWS) -> Dict[str, Any]:
+    """
+    Weeks, their days, the exercise and accessory names, the 1RMs and the first
+    rows (up to the end of the first week block) of a grid, from its labels only.
+    """
+    from scraper_api import find_week_blocks, find_day_blocks, extract_exercise_weights
+
+    week_blocks = find_week_blocks(grid)
+    index = SheetIndex(grid, [start_col for _, start_col, _ in week_blocks])
+
+    weeks = []
+    # Names in order of first appearance
+    exercises: Dict[str, None] = {}
+    accessories: Dict[str, None] = {}
+    for week_num, start_col, end_col in week_blocks:
+        day_blocks = find_day_blocks(grid, DATA_START_ROW, len(grid), start_col, end_col, index)
+        weeks.append({'week_number': week_num, 'days': [day_num for day_num, _ in day_blocks]})
+
+        labels = index.labels_between(start_col, DATA_START_ROW, len(grid))
+        for pos, label in enumerate(labels):
+            if label.kind == EXERCISE:
+                # As in parse_day_data, an exercise's weights row has no label
+                if index.label_at(start_col, label.row + 1) is None:
+                    exercises.setdefault(label.exercise_name)
+            elif label.kind == ACCESSORIES:
+                # Same rule as parse_accessories: names in the four rows below the header
+                for next_label in labels[pos + 1:]:
+                    if next_label.row > label.row + 4 or next_label.ends_accessories:
+                        break
+                    if next_label.is_accessory_name:
+                        accessories.setdefault(next_label.text)
+
+    sample_cols = week_blocks[0][2] + 1 if week_blocks else grid.n_cols
+    sample = []
+    for row in grid.rows[:sample_rows]:
+        row = row[:sample_cols]
+        end = len(row)
+        while end and row[end - 1] is None:
+            end -= 1
+        sample.append(row[:end])
+
+    return {
+        'week_count': len(weeks),
+        'days_per_week': max((len(week['days']) for week in weeks), default=0),
+        'weeks': weeks,
+        'exercises': list(exercises),
+        'accessories': list(accessories),
+        'one_rep_maxes': extract_exercise_weights(grid),
+        'sample_rows': sample,
+    }
+
+
+class SheetProbe:
+    """
+    The first rows of a downloading sheet, with the rest of the response kept
+    open for the full parse. close() it if the import is not confirmed.
+    """
+
+    def __init__(self, sheet_id: str, tab_name: str, fetched, max_rows: int = PROBE_ROWS,
+                 max_bytes: Optional[int] = PROBE_BYTES):
+        self.sheet_id = sheet_id
+        self.tab_name = tab_name
+        self.encoding: Optional[str] = fetched.encoding
+        self.bytes_read = 0
+        self._parts: List[bytes] = []
+        self._body: Optional[bytes] = None
+        if isinstance(fetched, SheetStream):
+            self._chunks: Optional[Iterator[bytes]] = fetched.chunks()
+        else:
+            # A cached body the server reported unchanged is already in memory: only the row limit applies
+            self._chunks = iter([fetched.body])
+            max_bytes = None
+
+        rows = []
+        self.complete = True
+        for row in iter_csv_rows(ChunkReader(self._recorded(self._chunks)), self.encoding):
+            rows.append(row)
+            if len(rows) >= max_rows or (max_bytes is not None and self.bytes_read >= max_bytes):
+                self.complete = False
+                break
+        self.grid = SheetGrid(rows)
+
+    def _recorded(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            self._parts.append(chunk)
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def summary(self, sample_rows: int = SAMPLE_ROWS) -> Dict[str, Any]:
+        """layout_summary of the rows read, plus how much of the sheet they are."""
+        return {
+            'program_name': self.tab_name,
+            'complete': self.complete,
+            'rows_read': len(self.grid),
+            'bytes_read': self.bytes_read,
+            **layout_summary(self.grid, sample_rows),
+        }
+
+    def read_body(self) -> bytes:
+        """The whole CSV body: what the probe read plus the rest of the same download."""
+        if self._body is None:
+            if self._chunks is None:
+                raise Exception(f"The probe of {self.tab_name} was closed before the sheet was read")
+            for chunk in self._chunks:
+                self._parts.append(chunk)
+                self.bytes_read += len(chunk)
+            self._body = b''.join(self._parts)
+            self._parts = []
+        return self._body
+
+    def template(self, engine: str = DEFAULT_ENGINE, parse_workers: Optional[int] = None) -> ParsedTemplate:
+        """Finish the download and parse the whole sheet."""
+        from scraper_api import read_sheet_grid, parse_template
+
+        return parse_template(read_sheet_grid(self.read_body(), engine, self.encoding), self.tab_name, parse_workers)
+
+    def close(self):
+        """Drop the unread rest of the download and its connection."""
+        if self._body is None and self._chunks is not None:
+            if hasattr(self._chunks, 'close'):
+                # Closing SheetStream.chunks() closes the response
+                self._chunks.close()
+            self._chunks = None
+            self._parts = []
@@ -0,0 +1,270 @@
+"""
+Streaming scrape: parse a sheet while its CSV export is still downloading.
+
+fetch_sheet_csv(stream=True) returns a SheetStream as soon as the response
+headers arrive. Its body is decoded chunk by chunk and tokenized by the csv
+module as rows complete (quoted cells spanning lines included), and each
+row goes to a StreamingSheetParser:
+
+- the week blocks are found as soon as the header rows are in
+- a day ends at the next "Day N" label in its week's anchor column, and is
+  parsed once READ_AHEAD_ROWS more rows have arrived, since an exercise reads
+  the two rows below its label and an accessories block the four below
+- the last day of every week ends with the sheet
+
+Records come out in the same order as a full parse, week by week and day by
+day. The first week's days are yielded as they complete; later weeks are
+parsed during the download too and yielded as soon as it ends.
+
+CLI: python scraper_api.py <sheet_id> [tab_name] [athlete_name] [start_date] --stream [--format ndjson]
+"""
+
+import io
+import csv
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from sheet_grid import SheetGrid, NA_VALUES
+from sheet_index import SheetIndex, DATA_START_ROW
+from sheet_cache import SheetCache, content_hash
+from records import Record, to_api_record
+from profiler import get_profiler
+
+CHUNK_SIZE = 8 * 1024
+
+# Rows below a day's last row that parsing it may read
+READ_AHEAD_ROWS = 4
+
+
+class SheetStream:
+    """A CSV export whose body hasn't been read yet. Read it once, through chunks()."""
+
+    def __init__(self, response, sheet_id: str, sheet_name: Optional[str], cache: Optional[SheetCache] = None):
+        self.response = response
+        self.sheet_id = sheet_id
+        self.sheet_name = sheet_name
+        self.cache = cache
+        self.encoding: Optional[str] = response.encoding
+        # Set once the whole body has been read
+        self.content_hash: Optional[str] = None
+
+    def chunks(self) -> Iterator[bytes]:
+        """The body as it arrives. When it is complete, it is stored in the cache."""
+        parts = []
+        with self.response:
+            for chunk in self.response.iter_content(CHUNK_SIZE):
+                parts.append(chunk)
+                yield chunk
+
+        body = b''.join(parts)
+        if self.cache:
+            entry = self.cache.store(self.sheet_id, self.sheet_name, body,
+                                     etag=self.response.headers.get('ETag'),
+                                     last_modified=self.response.headers.get('Last-Modified'),
+                                     encoding=self.encoding)
+            self.content_hash = entry.content_hash
+        else:
+            self.content_hash = content_hash(body)
+
+
+class ChunkReader(io.RawIOBase):
+    """Raw stream over an iterator of byte chunks, counting the chunks read."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b'')
+        self.chunks_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = memoryview(chunk)
+            self.chunks_read += 1
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class _WeekState:
+    __slots__ = ('week_num', 'start_col', 'end_col', 'markers', 'scanned', 'prefix', 'days', 'emitted', 'timing')
+
+    def __init__(self, week_num: int, start_col: int, end_col: Optional[int]):
+        self.week_num = week_num
+        self.start_col = start_col
+        # None for the last week, which runs to the sheet's last column
+        self.end_col = end_col
+        # (day_num, row) of the "Day N" labels found so far
+        self.markers: List[tuple] = []
+        self.scanned = DATA_START_ROW
+        # Records of the rows above the first marker, or None until it is known whether they are a day
+        self.prefix: Optional[List[Record]] = None
+        # Records of each parsed day, in marker order
+        self.days: List[List[Record]] = []
+        # Days yielded so far, counting the prefix as -1
+        self.emitted = -1
+        # Parse time of the week's days so far, for the profiler
+        self.timing = {'wall_s': 0.0, 'cpu_s': 0.0}
+
+
+class StreamingSheetParser:
+    """Parses a sheet's rows as they are added; see the module docstring."""
+
+    def __init__(self):
+        self.grid = SheetGrid([], 0)
+        self.index: Optional[SheetIndex] = None
+        self.weeks: Optional[List[_WeekState]] = None
+        self._indexed = DATA_START_ROW
+        self._current_week = 0
+
+    def add_row(self, row: List[Optional[str]]):
+        grid = self.grid
+        if len(row) > grid.n_cols:
+            # Wider than every row so far: pad the earlier rows, as SheetGrid does
+            for earlier in grid.rows:
+                earlier.extend([None] * (len(row) - grid.n_cols))
+            grid.n_cols = len(row)
+        elif len(row) < grid.n_cols:
+            row.extend([None] * (grid.n_cols - len(row)))
+        grid.rows.append(row)
+
+    def ready_records(self) -> Iterator[Record]:
+        """Parse the days whose rows have all arrived and yield whatever can go out in order."""
+        self._advance(finished=False)
+        yield from self._emit(finished=False)
+
+    def finish(self) -> Iterator[Record]:
+        """The sheet is complete: parse and yield everything left."""
+        rows = self.grid.rows
+        # Drop the trailing empty rows but one, like SheetGrid.from_csv
+        end = len(rows)
+        while end and not any(rows[end - 1]):
+            end -= 1
+        del rows[end + 1:]
+        profile = get_profiler()
+        profile.set_sheet(len(self.grid), self.grid.n_cols)
+
+        self._advance(finished=True)
+        if profile.enabled:
+            self._profile_weeks(profile)
+        yield from self._emit(finished=True)
+
+    def _profile_weeks(self, profile):
+        """Report each week to the profiler as a full parse does, with its days' times added up."""
+        grid = self.grid
+        rows = max(0, len(grid) - DATA_START_ROW)
+        for week in self.weeks or []:
+            end_col = grid.n_cols - 1 if week.end_col is None else week.end_col
+            cols = max(0, end_col + 1 - week.start_col)
+            records = len(week.prefix or []) + sum(len(day) for day in week.days)
+            profile.add_week(week.week_num, week.start_col, end_col, week.timing, rows, rows * cols, records)
+
+    def _advance(self, finished: bool):
+        from scraper_api import find_week_blocks
+
+        grid = self.grid
+        if self.weeks is None:
+            if len(grid) < 5:
+                return
+            blocks = find_week_blocks(grid)
+            self.weeks = [_WeekState(week_num, start_col, end_col if pos + 1 < len(blocks) else None)
+                          for pos, (week_num, start_col, end_col) in enumerate(blocks)]
+            self.index = SheetIndex(grid, [week.start_col for week in self.weeks], DATA_START_ROW)
+        else:
+            self.index.add_rows(grid, self._indexed)
+        self._indexed = max(len(grid), DATA_START_ROW)
+
+        for week in self.weeks:
+            week.markers.extend(self.index.day_markers(week.start_col, week.scanned, len(grid)))
+            week.scanned = max(len(grid), DATA_START_ROW)
+            self._parse_ready_days(week, finished)
+
+    def _parse_ready_days(self, week: _WeekState, finished: bool):
+        markers = week.markers
+        if week.prefix is None:
+            first_row = markers[0][1] if markers else None
+            if first_row == DATA_START_ROW or any(day_num == 1 for day_num, _ in markers):
+                # find_day_blocks only adds an implicit Day 1 when the week has no "Day 1" label
+                week.prefix = []
+            elif finished:
+                end_row = first_row if first_row is not None else len(self.grid)
+                week.prefix = self._parse_day(week, 1, DATA_START_ROW, end_row)
+
+        while len(week.days) < len(markers):
+            day_num, start_row = markers[len(week.days)]
+            if len(week.days) + 1 < len(markers):
+                end_row = markers[len(week.days) + 1][1]
+                if not finished and len(self.grid) < end_row + READ_AHEAD_ROWS:
+                    break
+            elif finished:
+                end_row = len(self.grid)
+            else:
+                break
+            week.days.append(self._parse_day(week, day_num, start_row, end_row))
+
+    def _parse_day(self, week: _WeekState, day_num: int, start_row: int, end_row: int) -> List[Record]:
+        from scraper_api import parse_day_data
+        from week_matrix import WeekBlockMatrix
+
+        grid = self.grid
+        end_col = grid.n_cols - 1 if week.end_col is None else week.end_col
+        with get_profiler().stage('parse_week_data') as timing:
+            # The exercise rows of the day plus the weights and percents rows below the last one
+            block = WeekBlockMatrix(grid, week.start_col, end_col, start_row, end_row + 2)
+            records = parse_day_data(grid, week.week_num, day_num, start_row, end_row,
+                                     week.start_col, end_col, block, self.index)
+        if timing:
+            week.timing['wall_s'] += timing['wall_s']
+            week.timing['cpu_s'] += timing['cpu_s']
+        return records
+
+    def _emit(self, finished: bool) -> Iterator[Record]:
+        while self.weeks and self._current_week < len(self.weeks):
+            week = self.weeks[self._current_week]
+            if week.prefix is None:
+                return
+            if week.emitted < 0:
+                week.emitted = 0
+                yield from week.prefix
+            while week.emitted < len(week.days):
+                week.emitted += 1
+                yield from week.days[week.emitted - 1]
+            if not finished:
+                # The week's last day ends with the sheet
+                return
+            self._current_week += 1
+
+
+def iter_csv_rows(raw: ChunkReader, encoding: Optional[str] = None) -> Iterator[List[Optional[str]]]:
+    """The grid rows of CSV bytes read through raw, decoded and split as they arrive."""
+    text = io.TextIOWrapper(io.BufferedReader(raw), encoding=encoding or 'utf-8', errors='replace', newline='')
+    reader = csv.reader(text)
+    next(reader, None)  # header line, same as pd.read_csv
+    for row in reader:
+        if row:  # pd.read_csv skips blank lines
+            yield [None if value in NA_VALUES else value for value in row]
+
+
+def iter_csv_stream_records(chunks: Iterable[bytes], encoding: Optional[str] = None) -> Iterator[Record]:
+    """Parse CSV bytes arriving in chunks, yielding records as soon as they can be."""
+    raw = ChunkReader(chunks)
+    parser = StreamingSheetParser()
+    chunks_seen = 0
+    for row in iter_csv_rows(raw, encoding):
+        parser.add_row(row)
+        # Check for finished days once per network chunk rather than per row
+        if raw.chunks_read != chunks_seen:
+            chunks_seen = raw.chunks_read
+            yield from parser.ready_records()
+    yield from parser.finish()
+
+
+def iter_stream_records(stream: SheetStream, program_name: str, athlete_name: str = '',
+                        start_date: str = '') -> Iterator[Dict[str, Any]]:
+    """Yield the JSON records of a streamed sheet as they are parsed."""
+    for record in iter_csv_stream_records(stream.chunks(), stream.encoding):
+        yield to_api_record(record, program_name, athlete_name, start_date)
@@ -0,0 +1,58 @@
+"""A local stand-in for the Sheets CSV export, with ETag revalidation."""
+
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+
+class SheetServer:
+    """
+    Serves sheets[sheet_id] at the export URLs; hits counts the full (200) downloads
+    and requests every request. Each answer waits `delay` seconds.
+    """
+
+    def __init__(self, delay: float = 0):
+        self.sheets: Dict[str, bytes] = {}
+        self.hits = 0
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.requests += 1
+                time.sleep(delay)
+                body = server.sheets.get(self.path.split('/')[3])
+                if body is None:
+                    self._send(404)
+                    return
+                etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self._send(304, etag)
+                    return
+                server.hits += 1
+                self._send(200, etag, body)
+
+            def _send(self, status, etag=None, body=b''):
+                self.send_response(status)
+                if etag:
+                    self.send_header('ETag', etag)
+                if status == 200:
+                    self.send_header('Content-Type', 'text/csv; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
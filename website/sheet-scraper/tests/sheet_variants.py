@@ -0,0 +1,44 @@
+"""Edits to generated sheets, for layouts the generator doesn't produce."""
+
+import csv
+import io
+from typing import Iterable
+
+
+def _rewrite(text: str, edit) -> str:
+    rows = list(csv.reader(io.StringIO(text)))
+    rows = edit(rows) or rows
+    out = io.StringIO()
+    csv.writer(out).writerows(rows)
+    return out.getvalue()
+
+
+def without_labels(text: str, labels: Iterable[str]) -> str:
+    """The CSV text with every cell holding one of labels emptied ('Day 1', ...)."""
+    labels = set(labels)
+
+    def edit(rows):
+        for row in rows:
+            for col, value in enumerate(row):
+                if value in labels:
+                    row[col] = ''
+
+    return _rewrite(text, edit)
+
+
+def padded(text: str, cols: int = 30, rows: int = 100) -> str:
+    """The CSV text with empty columns and rows added, as gviz exports pad a sheet."""
+    def edit(lines):
+        width = max(map(len, lines)) + cols
+        return [line + [''] * (width - len(line)) for line in lines] + [[''] * width for _ in range(rows)]
+
+    return _rewrite(text, edit)
+
+
+def without_column(text: str, col: int) -> str:
+    """The CSV text with a column removed from every row, narrowing the week block it was in."""
+    def edit(rows):
+        for row in rows:
+            del row[col:col + 1]
+
+    return _rewrite(text, edit)
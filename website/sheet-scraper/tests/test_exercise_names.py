@@ -0,0 +1,29 @@
+import doctest
+import unittest
+
+import exercise_names
+from exercise_names import ExerciseNormalizer, ExerciseMatch
+
+
+def load_tests(loader, tests, ignore):
+    # The examples in the module docstring are part of the suite
+    tests.addTests(doctest.DocTestSuite(exercise_names))
+    return tests
+
+
+class ExerciseNormalizerTest(unittest.TestCase):
+    def setUp(self):
+        self.normalizer = ExerciseNormalizer()
+
+    def test_alias_renames_a_lift_label(self):
+        self.assertEqual(self.normalizer.normalize('Pause Squat (BS)'), ExerciseMatch('Back Squat', 'Squat'))
+
+    def test_alias_alone_is_not_a_lift(self):
+        self.assertIsNone(self.normalizer.normalize('Pause BS'))
+
+    def test_alias_only_matches_whole_words(self):
+        self.assertEqual(self.normalizer.normalize('BSS Squat').name, 'BSS Squat')
+
+
+if __name__ == '__main__':
+    unittest.main()
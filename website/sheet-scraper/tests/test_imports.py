@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+import unittest
+
+SCRAPER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_scraper_api_does_not_import_numpy_or_pandas(self):
+        # A fresh interpreter: this one has them loaded by other tests
+        code = 'import sys, scraper_api; print(sorted({"numpy", "pandas"} & set(sys.modules)))'
+        output = subprocess.run([sys.executable, '-c', code], cwd=SCRAPER_DIR, capture_output=True,
+                                text=True, check=True).stdout
+        self.assertEqual(output.strip(), '[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
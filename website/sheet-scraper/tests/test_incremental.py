@@ -0,0 +1,69 @@
+import csv
+import io
+import tempfile
+import unittest
+from unittest import mock
+
+import scraper_api
+from records import assign
+from sheet_cache import SheetCache
+from sheet_generator import EXERCISES, generate_sheet
+from sheet_grid import read_csv_grid
+from tests.sheet_server import SheetServer
+
+
+def rename_first_exercise(text, start_col):
+    """The CSV text with the first exercise of the week block at start_col renamed."""
+    rows = list(csv.reader(io.StringIO(text)))
+    labels = [label for label, _ in EXERCISES]
+    # Grid row 0 is CSV row 1
+    row = next(row for row in rows[1:] if len(row) > start_col and row[start_col] in labels)
+    row[start_col] = next(label for label in labels if label != row[start_col])
+    out = io.StringIO()
+    csv.writer(out).writerows(rows)
+    return out.getvalue()
+
+
+class IncrementalScrapeTest(unittest.TestCase):
+    def setUp(self):
+        self.text = generate_sheet(3, 2, 3, 3)
+        self.server = SheetServer()
+        self.addCleanup(self.server.close)
+        self.server.sheets['sheet'] = self.text.encode('utf-8')
+        patcher = mock.patch.object(scraper_api, 'SHEETS_BASE_URL', self.server.url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = SheetCache(directory.name)
+
+    def scrape(self, athlete_name, start_date):
+        return scraper_api.scrape_sheet_incremental('sheet', 'Program', athlete_name, start_date, cache=self.cache)
+
+    def expected(self, text, athlete_name, start_date):
+        return assign(scraper_api.parse_template(read_csv_grid(text), 'Program'), athlete_name, start_date)
+
+    def test_week_state_is_shared_by_athletes(self):
+        first = self.scrape('amy', '2024-01-01')
+        self.assertEqual(first['delta']['added'], [1, 2, 3])
+        self.assertEqual(first['records'], self.expected(self.text, 'amy', '2024-01-01'))
+
+        # The same sheet for someone else: nothing to parse, but stamped for them
+        second = self.scrape('bob', '2024-02-01')
+        self.assertEqual(second['delta']['unchanged'], [1, 2, 3])
+        self.assertEqual(second['records'], self.expected(self.text, 'bob', '2024-02-01'))
+
+    def test_edited_week_is_parsed_again(self):
+        self.scrape('amy', '2024-01-01')
+        week_2 = scraper_api.find_week_blocks(read_csv_grid(self.text))[1]
+        edited = rename_first_exercise(self.text, week_2[1])
+        self.server.sheets['sheet'] = edited.encode('utf-8')
+
+        result = self.scrape('bob', '2024-02-01')
+        self.assertEqual(result['delta'], {'added': [], 'removed': [], 'changed': [2], 'unchanged': [1, 3]})
+        self.assertEqual(result['records'], self.expected(edited, 'bob', '2024-02-01'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import scraper_api
+from records import assign
+from sheet_generator import generate_sheet
+from sheet_grid import read_csv_grid
+from tests.sheet_server import SheetServer
+
+
+class _UnreadableStdin:
+    """Fails the test instead of blocking when stdin is read."""
+
+    @property
+    def buffer(self):
+        raise AssertionError('stdin was read')
+
+
+class LocalSourceTest(unittest.TestCase):
+    def setUp(self):
+        self.text = generate_sheet(2, 2, 3, 3)
+        self.expected = assign(scraper_api.parse_template(read_csv_grid(self.text), 'Program'), 'amy', '2024-01-01')
+
+        self.server = SheetServer()
+        self.addCleanup(self.server.close)
+        for patcher in (mock.patch.object(scraper_api, 'SHEETS_BASE_URL', self.server.url),
+                        mock.patch.object(sys, 'stdin', _UnreadableStdin())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def scrape(self, *argv):
+        out = io.StringIO()
+        with redirect_stdout(out):
+            scraper_api.main(['--no-cache', *argv])
+        return json.loads(out.getvalue())
+
+    def test_sheet_ids_are_never_read_as_local_paths(self):
+        self.server.sheets['-'] = self.text.encode('utf-8')
+        self.server.sheets['tests'] = self.text.encode('utf-8')
+
+        self.assertEqual(self.scrape('--', '-', 'Program', 'amy', '2024-01-01'), self.expected)
+        self.assertEqual(self.scrape('--', 'tests', 'Program', 'amy', '2024-01-01'), self.expected)
+        self.assertEqual(self.server.hits, 2)
+
+    def test_file_flag_reads_a_local_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'program.csv')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.text)
+
+            self.assertEqual(self.scrape('--file', path, 'Program', 'amy', '2024-01-01'), self.expected)
+        self.assertEqual(self.server.hits, 0)
+
+    def test_stdin_flag_reads_stdin(self):
+        stdin = mock.Mock(buffer=io.BytesIO(self.text.encode('utf-8')))
+        with mock.patch.object(sys, 'stdin', stdin):
+            self.assertEqual(self.scrape('--stdin', 'Program', 'amy', '2024-01-01'), self.expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import scraper_api
+from sheet_generator import FIRST_WEEK_COL, generate_sheet
+from sheet_grid import read_csv_grid
+from tests.sheet_variants import without_column, without_labels
+
+WEEKS, DAYS, SETS = 5, 3, 4
+BLOCK_WIDTH = SETS + 2
+
+SHEETS = {
+    'generated': generate_sheet(WEEKS, DAYS, 4, SETS),
+    # Week 2 loses its last set column
+    'narrow week': without_column(generate_sheet(WEEKS, DAYS, 4, SETS), FIRST_WEEK_COL + BLOCK_WIDTH + SETS),
+    'no Day labels': without_labels(generate_sheet(WEEKS, DAYS, 4, SETS), [f'Day {n}' for n in range(1, DAYS + 1)]),
+}
+
+
+class ParallelParseTest(unittest.TestCase):
+    def test_parse_workers_match_the_sequential_parse(self):
+        for name, text in SHEETS.items():
+            with self.subTest(sheet=name):
+                grid = read_csv_grid(text)
+                expected = list(scraper_api.iter_sheet_records(grid))
+                self.assertEqual(len({record.week_number for record in expected}), WEEKS)
+
+                self.assertEqual(list(scraper_api.iter_sheet_records(grid, parse_workers=3)), expected)
+
+    def test_narrow_week_block_has_fewer_sets(self):
+        records = list(scraper_api.iter_sheet_records(read_csv_grid(SHEETS['narrow week'])))
+        sets_per_exercise = {}
+        for record in records:
+            key = (record.week_number, record.day_number, record.exercise_number)
+            sets_per_exercise[key] = sets_per_exercise.get(key, 0) + 1
+
+        self.assertEqual(max(count for key, count in sets_per_exercise.items() if key[0] == 2), SETS - 1)
+        self.assertEqual(max(count for key, count in sets_per_exercise.items() if key[0] == 1), SETS)
+
+
+if __name__ == '__main__':
+    unittest.main()
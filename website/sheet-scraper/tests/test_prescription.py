@@ -0,0 +1,49 @@
+import unittest
+
+from prescription import iter_roster_records, prescribe
+from records import AccessoryRecord, ParsedTemplate, SetRecord
+
+TEMPLATE = ParsedTemplate('Program', [
+    SetRecord(1, 1, 1, 'Snatch', 3, 70.0, 70.0),
+    SetRecord(1, 1, 2, 'Back Squat', 5, 120.0, 80.0),
+    # Absolute weight, no percent
+    SetRecord(1, 1, 2, 'Back Squat', 5, 100.0, None),
+    # A percent of no 1RM lift
+    SetRecord(1, 1, 3, 'Push Press', 5, 50.0, 60.0),
+    AccessoryRecord(1, 1, 4, 'Plank', 3, 8, 12),
+])
+
+
+class PrescriptionTest(unittest.TestCase):
+    def test_weights_from_each_athletes_one_rep_maxes(self):
+        roster = {'amy': {'Snatch': 80, 'Back Squat': 150}, 'bob': {'Snatch': 100, 'Back Squat': 200}}
+        records = list(iter_roster_records(TEMPLATE, roster, increment=2.5))
+
+        self.assertEqual([record['athlete_name'] for record in records], ['amy'] * 5 + ['bob'] * 5)
+        self.assertEqual([record['weights'] for record in records[:3]], [55.0, 120.0, 100.0])
+        self.assertEqual([record['weights'] for record in records[5:8]], [70.0, 160.0, 100.0])
+
+    def test_missing_one_rep_max_leaves_weight_null(self):
+        records = list(iter_roster_records(TEMPLATE, {'amy': {'Back Squat': 150}}))
+
+        # The sheet's 70 is its author's snatch weight, not amy's
+        self.assertIsNone(records[0]['weights'])
+        self.assertEqual(records[0]['percent'], 70.0)
+        self.assertEqual(records[1]['weights'], 120.0)
+
+    def test_percent_without_a_lift_leaves_weight_null(self):
+        records = list(iter_roster_records(TEMPLATE, {'amy': {'Snatch': 80, 'Back Squat': 150}}))
+
+        self.assertIsNone(records[3]['weights'])
+        self.assertIsNone(records[4]['weights'])
+        self.assertEqual(records[4]['reps'], '8-12')
+
+    def test_prescription_covers_every_percent_set(self):
+        prescription = prescribe(TEMPLATE, {'amy': {'Snatch': 80}})
+
+        self.assertEqual(prescription.set_indexes, [0, 1, 3])
+        self.assertEqual(prescription.weights.shape, (1, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
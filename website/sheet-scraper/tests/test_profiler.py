@@ -0,0 +1,40 @@
+import unittest
+
+import profiler
+import scraper_api
+from sheet_generator import generate_sheet
+from sheet_index import DATA_START_ROW
+from sheet_stream import iter_csv_stream_records
+
+
+class ProfilerCountsTest(unittest.TestCase):
+    def setUp(self):
+        self.body = generate_sheet(3, 2, 3, 3).encode('utf-8')
+        self.profile = profiler.enable_profiling()
+        self.addCleanup(profiler.disable_profiling)
+
+    def assertCountsMatchWeeks(self, report, records):
+        self.assertEqual(report['records'], len(records))
+        self.assertEqual(report['rows_scanned'], sum(week['rows'] for week in report['weeks']))
+        self.assertEqual(report['cells_scanned'], sum(week['cells'] for week in report['weeks']))
+
+    def test_full_parse_counts_each_week_once(self):
+        grid = scraper_api.read_sheet_grid(self.body, 'csv', 'utf-8')
+        records = list(scraper_api.iter_sheet_records(grid))
+
+        report = self.profile.report()
+        self.assertEqual([week['week_number'] for week in report['weeks']], [1, 2, 3])
+        self.assertCountsMatchWeeks(report, records)
+
+    def test_streaming_parse_reports_its_weeks(self):
+        chunks = [self.body[start:start + 500] for start in range(0, len(self.body), 500)]
+        records = list(iter_csv_stream_records(chunks, 'utf-8'))
+
+        report = self.profile.report()
+        self.assertEqual([week['records'] for week in report['weeks']], [len(records) // 3] * 3)
+        self.assertEqual(report['sheet']['rows'], report['weeks'][0]['rows'] + DATA_START_ROW)
+        self.assertCountsMatchWeeks(report, records)
+
+
+if __name__ == '__main__':
+    unittest.main()
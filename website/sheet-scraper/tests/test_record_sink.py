@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import record_sink
+from record_sink import HttpBatchSink, SinkError, idempotency_key
+
+
+class ImportServer:
+    """
+    A stand-in import endpoint. Answers with statuses.pop(0) while any are left,
+    then 200; requests holds (Idempotency-Key, body) of every POST.
+    """
+
+    def __init__(self, delay: float = 0):
+        self.statuses = []
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with lock:
+                    server.requests.append((self.headers['Idempotency-Key'], body))
+                    status = server.statuses.pop(0) if server.statuses else 200
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                time.sleep(delay)
+                with lock:
+                    server.in_flight -= 1
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', '2')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/import'
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def week_records(athlete_name, week_number, count):
+    return [{'athlete_name': athlete_name, 'program_name': 'Program', 'start_date': '2024-01-01',
+             'week_number': week_number, 'exercise': f'Lift {i}', 'reps': 5} for i in range(count)]
+
+
+class HttpBatchSinkTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ImportServer()
+        self.addCleanup(self.server.close)
+        # Backoff delays are recorded instead of slept
+        self.time = mock.Mock(wraps=time)
+        self.time.sleep = mock.Mock()
+        patcher = mock.patch.object(record_sink, 'time', self.time)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def send(self, records, **options):
+        with HttpBatchSink(self.server.url, **options) as sink:
+            for record in records:
+                sink.write(record)
+            return sink.close()
+
+    def test_batches_per_week_bounded_by_size(self):
+        records = week_records('amy', 1, 5) + week_records('amy', 2, 3) + week_records('bob', 2, 1)
+
+        self.assertEqual(self.send(records, batch_records=2, concurrency=1),
+                         {'records': 9, 'batches': 6, 'requests': 6})
+        bodies = [body for _, body in self.server.requests]
+        self.assertEqual([(body['athlete_name'], body['week_number'], body['part'], len(body['records']))
+                          for body in bodies],
+                         [('amy', 1, 0, 2), ('amy', 1, 1, 2), ('amy', 1, 2, 1),
+                          ('amy', 2, 0, 2), ('amy', 2, 1, 1), ('bob', 2, 0, 1)])
+        self.assertEqual([record for body in bodies for record in body['records']], records)
+        self.assertEqual(len({key for key, _ in self.server.requests}), 6)
+
+    def test_throttling_and_server_errors_are_retried_with_backoff(self):
+        self.server.statuses = [429, 503, 500]
+
+        self.assertEqual(self.send(week_records('amy', 1, 3), backoff=0.5),
+                         {'records': 3, 'batches': 1, 'requests': 4})
+        # A retry is the same batch under the same key
+        self.assertEqual(len({key for key, _ in self.server.requests}), 1)
+        delays = [call.args[0] for call in self.time.sleep.call_args_list]
+        self.assertEqual(delays[0], 2.0)  # Retry-After
+        self.assertLessEqual(delays[1], 1.0)
+        self.assertLessEqual(delays[2], 2.0)
+
+    def test_gives_up_after_the_retries(self):
+        self.server.statuses = [503] * 3
+
+        with self.assertRaisesRegex(SinkError, r'HTTP 503.*gave up after 3 attempts'):
+            self.send(week_records('amy', 1, 3), retries=2)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_client_error_fails_the_import(self):
+        self.server.statuses = [400]
+        records = week_records('amy', 1, 2) + week_records('amy', 2, 2) + week_records('amy', 3, 2)
+
+        with self.assertRaisesRegex(SinkError, r'3 of 3 batches failed: HTTP 400'):
+            self.send(records, concurrency=1)
+        # Not retried, and the batches queued behind it are not sent
+        self.assertEqual(len(self.server.requests), 1)
+        self.time.sleep.assert_not_called()
+
+    def test_batches_in_flight_are_bounded(self):
+        server = ImportServer(delay=0.05)
+        self.addCleanup(server.close)
+        records = [record for week in range(1, 13) for record in week_records('amy', week, 2)]
+
+        with HttpBatchSink(server.url, concurrency=3) as sink:
+            for record in records:
+                sink.write(record)
+            self.assertEqual(sink.close()['batches'], 12)
+        self.assertEqual(len(server.requests), 12)
+        self.assertEqual(server.max_in_flight, 3)
+
+
+class IdempotencyKeyTest(unittest.TestCase):
+    def test_key_follows_the_batch_contents(self):
+        key = idempotency_key('amy', 'Program', '2024-01-01', 1, 0, '{"reps": 5}')
+
+        self.assertEqual(key, idempotency_key('amy', 'Program', '2024-01-01', 1, 0, '{"reps": 5}'))
+        self.assertNotEqual(key, idempotency_key('amy', 'Program', '2024-01-01', 1, 0, '{"reps": 3}'))
+        self.assertNotEqual(key, idempotency_key('amy', 'Program', '2024-01-01', 1, 1, '{"reps": 5}'))
+
+
+if __name__ == '__main__':
+    unittest.main()
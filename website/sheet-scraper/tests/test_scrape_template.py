@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import scraper_api
+from records import assign, from_api_record, to_api_record
+from sheet_cache import SheetCache
+from sheet_generator import generate_sheet
+from tests.sheet_server import SheetServer
+
+
+class ScrapeTemplateCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = SheetServer()
+        self.addCleanup(self.server.close)
+        self.server.sheets['sheet'] = generate_sheet(2, 2, 3, 3).encode('utf-8')
+        patcher = mock.patch.object(scraper_api, 'SHEETS_BASE_URL', self.server.url)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache = SheetCache(cache_dir.name)
+
+    def test_unchanged_sheet_is_not_parsed_again(self):
+        with mock.patch.object(scraper_api, 'parse_template', wraps=scraper_api.parse_template) as parse:
+            first = scraper_api.scrape_template('sheet', 'Program', cache=self.cache)
+            second = scraper_api.scrape_template('sheet', 'Program', cache=self.cache)
+
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(self.server.hits, 1)
+        self.assertTrue(first.records)
+        self.assertEqual(second, first)
+
+    def test_changed_sheet_is_parsed_again(self):
+        scraper_api.scrape_template('sheet', 'Program', cache=self.cache)
+        self.server.sheets['sheet'] = generate_sheet(3, 2, 3, 3).encode('utf-8')
+
+        with mock.patch.object(scraper_api, 'parse_template', wraps=scraper_api.parse_template) as parse:
+            template = scraper_api.scrape_template('sheet', 'Program', cache=self.cache)
+
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual({record.week_number for record in template.records}, {1, 2, 3})
+
+    def test_shares_records_with_scrape_sheet(self):
+        records = scraper_api.scrape_sheet('sheet', 'Program', 'amy', '2024-01-01', cache=self.cache)
+
+        with mock.patch.object(scraper_api, 'parse_template') as parse:
+            template = scraper_api.scrape_template('sheet', 'Program', cache=self.cache)
+
+        parse.assert_not_called()
+        self.assertEqual(assign(template, 'amy', '2024-01-01'), records)
+
+    def test_api_record_round_trip(self):
+        template = scraper_api.scrape_template('sheet', 'Program')
+        for record in template.records:
+            self.assertEqual(from_api_record(to_api_record(record, 'Program')), record)
+
+
+if __name__ == '__main__':
+    unittest.main()
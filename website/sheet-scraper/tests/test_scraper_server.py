@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import scraper_api
+import scraper_server
+from records import assign
+from sheet_cache import CACHE_DIR_ENV
+from sheet_generator import generate_sheet
+from sheet_grid import read_csv_grid
+from tests.sheet_server import SheetServer
+
+
+class ProbeReuseTest(unittest.TestCase):
+    def setUp(self):
+        self.server = SheetServer()
+        self.addCleanup(self.server.close)
+        self.body = generate_sheet(6, 3, 4, 4).encode('utf-8')
+        self.server.sheets['sheet'] = self.body
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        # Workers are forked from this process, so they see the same patches
+        for patcher in (mock.patch.object(scraper_api, 'SHEETS_BASE_URL', self.server.url),
+                        mock.patch.dict(os.environ, {CACHE_DIR_ENV: cache_dir.name})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.service = scraper_server.ScraperService(workers=1)
+        self.addCleanup(self.service.shutdown)
+        self.expected = assign(scraper_api.parse_template(read_csv_grid(self.body), 'Program'), 'amy', '')
+
+    def probe(self):
+        summary = self.service.probe('sheet', 'Program', max_rows=20)
+        # Wait for the background read of the rest of the download
+        self.service._probes[('sheet', 'Program')][2].result()
+        return summary
+
+    def test_scrape_after_probe_reuses_its_download(self):
+        self.assertFalse(self.probe()['complete'])
+
+        self.assertEqual(self.service.scrape_sheet('sheet', 'Program', 'amy'), self.expected)
+        self.assertEqual(self.service.probes_reused, 1)
+        self.assertEqual(self.server.hits, 1)
+
+    def test_probe_warms_the_sheet_cache(self):
+        self.probe()
+
+        # Past the keep window the probe is not used, but its body was cached
+        with mock.patch.object(scraper_server, 'PROBE_KEEP_SECONDS', -1):
+            records = self.service.scrape_sheet('sheet', 'Program', 'amy')
+
+        self.assertEqual(records, self.expected)
+        self.assertEqual(self.service.probes_reused, 0)
+        self.assertEqual(self.server.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import scraper_api
+import scraper_server
+from records import assign
+from sheet_cache import CACHE_DIR_ENV
+from sheet_generator import generate_sheet
+from sheet_grid import read_csv_grid
+from tests.sheet_server import SheetServer
+
+REQUESTS = 8
+
+
+class SharedScrapeTest(unittest.TestCase):
+    def setUp(self):
+        # Slow enough that every request arrives while the first is downloading
+        self.server = SheetServer(delay=0.3)
+        self.addCleanup(self.server.close)
+        self.body = generate_sheet(4, 3, 4, 4).encode('utf-8')
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        for patcher in (mock.patch.object(scraper_api, 'SHEETS_BASE_URL', self.server.url),
+                        mock.patch.dict(os.environ, {CACHE_DIR_ENV: cache_dir.name})):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.service = scraper_server.ScraperService(workers=2)
+        self.addCleanup(self.service.shutdown)
+
+    def scrape_concurrently(self, sheet_id):
+        """(results, errors) of REQUESTS identical scrapes started at once."""
+        barrier = threading.Barrier(REQUESTS)
+
+        def scrape(_):
+            barrier.wait()
+            try:
+                return self.service.scrape_sheet(sheet_id, 'Program', 'amy', '2024-01-01'), None
+            except Exception as e:
+                return None, e
+
+        with ThreadPoolExecutor(REQUESTS) as threads:
+            outcomes = list(threads.map(scrape, range(REQUESTS)))
+        return [result for result, _ in outcomes], [error for _, error in outcomes]
+
+    def assertNothingInFlight(self):
+        # The entry is dropped by a done callback, which may run just after the waiters wake
+        deadline = time.monotonic() + 2
+        while self.service._in_flight and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.service._in_flight, {})
+
+    def test_identical_requests_share_one_fetch(self):
+        self.server.sheets['sheet'] = self.body
+        expected = assign(scraper_api.parse_template(read_csv_grid(self.body), 'Program'), 'amy', '2024-01-01')
+
+        results, errors = self.scrape_concurrently('sheet')
+
+        self.assertEqual(errors, [None] * REQUESTS)
+        self.assertEqual(results, [expected] * REQUESTS)
+        self.assertEqual(self.server.hits, 1)
+        self.assertEqual(self.service.coalesced, REQUESTS - 1)
+        self.assertNothingInFlight()
+
+    def test_failure_reaches_every_waiter(self):
+        results, errors = self.scrape_concurrently('missing')
+
+        self.assertEqual(results, [None] * REQUESTS)
+        # The one scrape's exception, raised to each of them
+        self.assertEqual(len({id(error) for error in errors}), 1)
+        self.assertIn('not found (404)', str(errors[0]))
+        self.assertEqual(self.service.coalesced, REQUESTS - 1)
+        self.assertNothingInFlight()
+
+        # The failed scrape isn't reused: once the sheet exists, it is fetched
+        self.server.sheets['missing'] = self.body
+        self.assertTrue(self.service.scrape_sheet('missing', 'Program'))
+        self.assertEqual(self.server.hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
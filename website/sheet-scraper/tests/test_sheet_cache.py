@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import exercise_names
+import sheet_cache
+from exercise_names import ExerciseNormalizer
+from sheet_cache import CACHE_DIR_ENV, SheetCache, content_hash, default_cache
+
+RECORDS = [{'exercise': 'Snatch', 'reps': 3}]
+
+
+class SheetCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_records_are_keyed_by_the_normalizer_configuration(self):
+        cache = SheetCache(os.path.join(self.directory, 'cache'))
+        body = b'sheet'
+        cache.store('sheet', 'Program', body)
+        cache.store_records('sheet', 'Program', content_hash(body), ['Program'], RECORDS)
+        self.assertEqual(cache.load_records('sheet', 'Program', content_hash(body), ['Program']), RECORDS)
+
+        with mock.patch.object(exercise_names, '_normalizer', ExerciseNormalizer(library_names=['Muscle Snatch'])):
+            self.assertIsNone(cache.load_records('sheet', 'Program', content_hash(body), ['Program']))
+
+    def test_unwritable_cache_directory_falls_back(self):
+        # A directory can't be made under a file, even as root
+        blocked = os.path.join(self.directory, 'file')
+        open(blocked, 'w').close()
+        fallback = os.path.join(self.directory, 'fallback')
+
+        with mock.patch.dict(os.environ, {CACHE_DIR_ENV: os.path.join(blocked, 'cache')}):
+            with mock.patch.object(sheet_cache, 'FALLBACK_CACHE_DIR', fallback):
+                self.assertEqual(default_cache().cache_dir, fallback)
+            with mock.patch.object(sheet_cache, 'FALLBACK_CACHE_DIR', os.path.join(blocked, 'fallback')):
+                self.assertIsNone(default_cache())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import csv
+import io
+import unittest
+
+from sheet_generator import generate_sheet
+from sheet_grid import read_csv_grid
+
+
+def widen_rows(text, extra):
+    """The CSV text with fields appended to some rows: {line number: fields}."""
+    lines = text.splitlines(keepends=True)
+    for number, fields in extra.items():
+        lines[number] = lines[number].rstrip('\r\n') + ''.join(f',"{field}"' for field in fields) + '\r\n'
+    return ''.join(lines)
+
+
+class ReadCsvGridTest(unittest.TestCase):
+    def assertEnginesAgree(self, text):
+        rows = read_csv_grid(text, 'csv').rows
+        self.assertEqual(read_csv_grid(text, 'pandas').rows, rows)
+        self.assertEqual(read_csv_grid(text.encode('utf-8'), 'pandas', 'utf-8').rows, rows)
+        return rows
+
+    def test_generated_sheet(self):
+        self.assertEnginesAgree(generate_sheet(2, 2, 3, 3))
+
+    def test_rows_wider_than_the_header(self):
+        text = generate_sheet(2, 2, 3, 3)
+        width = len(next(csv.reader(io.StringIO(text))))
+        # The first data row is wider too, which pandas can't line up with the header
+        text = widen_rows(text, {1: ['', '5'], 4: ['', '', 'x'], 8: ['9']})
+
+        rows = self.assertEnginesAgree(text)
+        self.assertEqual(len(rows[0]), width + 3)
+        self.assertEqual(rows[0][width + 1], '5')
+        self.assertEqual(rows[3][width + 2], 'x')
+
+    def test_rows_wider_than_the_header_without_week_blocks(self):
+        rows = self.assertEnginesAgree('a,b\n1,2\n3,4,5,6\n,Week 1\n')
+        self.assertEqual(rows, [['1', '2', None, None], ['3', '4', '5', '6'], [None, 'Week 1', None, None]])
+
+    def test_padded_export(self):
+        text = generate_sheet(2, 2, 3, 3)
+        # gviz pads the sheet with empty columns and rows
+        lines = [line + ',""' * 40 for line in text.splitlines()]
+        padded = '\r\n'.join(lines + [','.join(['""'] * (lines[0].count(',') + 1))] * 50) + '\r\n'
+
+        self.assertEqual(self.assertEnginesAgree(padded), read_csv_grid(text, 'csv').rows)
+
+    def test_empty(self):
+        self.assertEqual(self.assertEnginesAgree(''), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
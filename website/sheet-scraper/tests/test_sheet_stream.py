@@ -0,0 +1,51 @@
+import unittest
+
+import scraper_api
+from sheet_generator import generate_sheet
+from sheet_grid import read_csv_grid
+from sheet_stream import iter_csv_stream_records
+from tests.sheet_variants import padded, without_labels
+
+SHEETS = {
+    'generated': generate_sheet(3, 3, 3, 3),
+    'no Day 1 label': without_labels(generate_sheet(3, 3, 3, 3), ['Day 1']),
+    'trailing padding': padded(generate_sheet(3, 3, 3, 3)),
+}
+
+
+def chunked(body, size):
+    return [body[start:start + size] for start in range(0, len(body), size)]
+
+
+class StreamingParserTest(unittest.TestCase):
+    def test_matches_the_full_parse_at_any_chunk_size(self):
+        for name, text in SHEETS.items():
+            expected = list(scraper_api.iter_sheet_records(read_csv_grid(text)))
+            self.assertTrue(expected)
+            for size in (1, 7, 64):
+                with self.subTest(sheet=name, chunk_size=size):
+                    chunks = chunked(text.encode('utf-8'), size)
+                    self.assertEqual(list(iter_csv_stream_records(chunks, 'utf-8')), expected)
+
+    def test_first_week_comes_out_during_the_download(self):
+        chunks = chunked(SHEETS['generated'].encode('utf-8'), 64)
+        fed = 0
+
+        def feed():
+            nonlocal fed
+            for chunk in chunks:
+                fed += 1
+                yield chunk
+
+        fed_at = {}
+        for record in iter_csv_stream_records(feed(), 'utf-8'):
+            fed_at.setdefault((record.week_number, record.day_number), fed)
+
+        # A week's last day ends with the sheet; its other days don't wait for it
+        self.assertLess(fed_at[(1, 1)], fed_at[(1, 2)])
+        self.assertLess(fed_at[(1, 2)], len(chunks))
+        self.assertEqual(fed_at[(1, 3)], len(chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import csv
+import datetime
+import io
+import re
+import unittest
+
+import openpyxl
+
+import scraper_api
+from sheet_generator import generate_sheet
+from sheet_grid import read_csv_grid
+from workbook import iter_workbook_records, open_workbook, workbook_grid
+
+PERCENT = re.compile(r'^\d+(\.(\d+))?%$')
+NUMBER = re.compile(r'^\d+(\.\d+)?$')
+
+DATE_CELL = (3, 0)  # a blank row of the generated sheet, outside the week blocks
+DATE = datetime.date(2024, 1, 15)
+
+
+def csv_text():
+    """A generated sheet with a date, a fractional weight and a fractional percent."""
+    rows = list(csv.reader(io.StringIO(generate_sheet(2, 2, 3, 3))))
+    rows[DATE_CELL[0]][DATE_CELL[1]] = DATE.isoformat()
+    weights = next(i for i, row in enumerate(rows) if row[8].endswith('%')) - 1
+    rows[weights][8] = rows[weights][8] + '.5'
+    rows[weights + 1][9] = rows[weights + 1][9][:-1] + '.5%'
+    out = io.StringIO()
+    csv.writer(out).writerows(rows)
+    return out.getvalue()
+
+
+def to_xlsx(text):
+    """The CSV text as the xlsx export would hold it, with formatted empty cells past its edges."""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'Program'
+    rows = list(csv.reader(io.StringIO(text)))
+    for row_idx, row in enumerate(rows, start=1):
+        for col_idx, value in enumerate(row, start=1):
+            if not value:
+                continue
+            cell = sheet.cell(row_idx, col_idx)
+            percent = PERCENT.match(value)
+            if percent:
+                cell.value = float(value[:-1]) / 100
+                cell.number_format = '0.0%' if percent.group(2) else '0%'
+            elif (row_idx - 1, col_idx - 1) == DATE_CELL:
+                cell.value = DATE
+                cell.number_format = 'yyyy-mm-dd'
+            elif NUMBER.match(value):
+                # Whole numbers both as ints and as floats ('75.0')
+                cell.value = float(value) if '.' in value or col_idx % 2 else int(value)
+            else:
+                cell.value = value
+    # Empty but formatted cells widen and lengthen the sheet's range
+    width = max(map(len, rows))
+    for row_idx in (2, len(rows) + 3):
+        sheet.cell(row_idx, width + 4).number_format = '0%'
+
+    body = io.BytesIO()
+    workbook.save(body)
+    return body.getvalue()
+
+
+class WorkbookTest(unittest.TestCase):
+    def setUp(self):
+        self.text = csv_text()
+        self.xlsx = to_xlsx(self.text)
+
+    def test_cells_read_as_the_csv_export_writes_them(self):
+        expected = read_csv_grid(self.text)
+        workbook = open_workbook(self.xlsx)
+        try:
+            grid = workbook_grid(workbook, 'Program')
+        finally:
+            workbook.close()
+
+        # The formatted empty cells past the edges read as nothing
+        self.assertGreater(grid.shape, expected.shape)
+        self.assertTrue(all(value is None for row in grid.rows for value in row[expected.n_cols:]))
+        self.assertTrue(all(value is None for row in grid.rows[len(expected):] for value in row))
+        self.assertEqual([row[:expected.n_cols] for row in grid.rows[:len(expected)]], expected.rows)
+        self.assertEqual(grid.cell(DATE_CELL[0] - 1, DATE_CELL[1]), '2024-01-15')
+
+    def test_records_match_the_csv_export(self):
+        expected = scraper_api.parse_template_sheet(read_csv_grid(self.text), 'Program', 'amy', '2024-01-01')
+
+        self.assertEqual(list(iter_workbook_records(self.xlsx, ['Program'], 'amy', '2024-01-01')), expected)
+        # The fractional weight and percent made it into the records
+        self.assertTrue(any(record['weights'] % 1 for record in expected if record['weights'] is not None))
+        self.assertTrue(any(record['percent'] % 1 for record in expected if record['percent'] is not None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,240 @@
+"""
+Training-load rollups of a parsed sheet.
+
+The working sets of a scrape are loaded into flat NumPy arrays once and summed
+per group with np.bincount, giving for every week, every day of a week and
+every exercise of a day:
+
+    sets, reps           counts of the parsed sets
+    tonnage              sum of reps x weight
+    average_percent      mean prescribed percent of the sets that have one
+    peak_percent         highest prescribed percent
+    relative_intensity   mean weight per rep as a percent of the lift's 1RM
+                         (row 1 of the sheet, see extract_exercise_weights)
+
+Accessories carry no load and are left out. Sheets that have their own
+"Total Reps", "Total Tonnage" or "Relative Intensity" rows get them
+cross-checked against the computed day rollups.
+
+CLI: python scraper_api.py <sheet_id> [tab_name] [athlete_name] [start_date] --summary
+"""
+
+import re
+from collections import defaultdict
+from typing import Any, Container, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from sheet_grid import SheetGrid
+from sheet_index import SheetIndex, DATA_START_ROW
+from week_matrix import WeekBlockMatrix
+from records import Record, SetRecord
+from exercise_names import get_normalizer
+
+# Lift of the 1RM row an exercise is prescribed from, by exercise category
+# (exercises named like a 1RM column use that column)
+CATEGORY_LIFTS = {
+    'Snatch': 'Snatch',
+    'Clean': 'Clean',
+    'Jerk': 'Jerk',
+    'Squat': 'Back Squat',
+}
+
+# Summary rows a sheet may have under each day, and how a row's numbers are read
+SHEET_TOTAL_ROWS = [
+    ('reps', re.compile(r'Total\s+Reps', re.IGNORECASE), 'sum'),
+    ('tonnage', re.compile(r'Total\s+(Tonnage|Volume)', re.IGNORECASE), 'sum'),
+    ('relative_intensity', re.compile(r'Relative\s+Intensity', re.IGNORECASE), 'mean'),
+]
+
+# How far the sheet's figure may be from the computed one and still agree:
+# (absolute, relative). Sheets round tonnage and intensity; reps must match.
+TOLERANCES = {
+    'reps': (0.0, 0.0),
+    'tonnage': (1.0, 0.005),
+    'relative_intensity': (1.0, 0.0),
+}
+
+DayKey = Tuple[int, int]
+
+
+def exercise_lift(exercise_name: str, lifts: Container[str]) -> Optional[str]:
+    """The lift among lifts (1RM columns) an exercise is prescribed from, or None."""
+    if exercise_name in lifts:
+        return exercise_name
+    match = get_normalizer().normalize(exercise_name)
+    lift = CATEGORY_LIFTS.get(match.category) if match else None
+    return lift if lift in lifts else None
+
+
+def lift_max(exercise_name: str, one_rep_maxes: Dict[str, float]) -> Optional[float]:
+    """The 1RM an exercise is prescribed from, or None if no 1RM column covers it."""
+    lift = exercise_lift(exercise_name, one_rep_maxes)
+    return one_rep_maxes[lift] if lift else None
+
+
+def read_sheet_totals(grid: SheetGrid) -> Dict[DayKey, Dict[str, float]]:
+    """
+    The sheet's own figures per (week, day): the numbers of its Total Reps and
+    Total Tonnage rows summed (one cell holding the day total, or one per set
+    column) and the percents of its Relative Intensity row averaged.
+    """
+    from scraper_api import find_week_blocks, find_day_blocks
+
+    week_blocks = find_week_blocks(grid)
+    index = SheetIndex(grid, [start_col for _, start_col, _ in week_blocks])
+    totals: Dict[DayKey, Dict[str, float]] = defaultdict(dict)
+
+    for week_num, start_col, end_col in week_blocks:
+        block = None
+        day_blocks = find_day_blocks(grid, DATA_START_ROW, len(grid), start_col, end_col, index)
+        for day_idx, (day_num, day_start_row) in enumerate(day_blocks):
+            day_end_row = day_blocks[day_idx + 1][1] if day_idx + 1 < len(day_blocks) else len(grid)
+            for label in index.labels_between(start_col, day_start_row, day_end_row):
+                for field, pattern, reduce in SHEET_TOTAL_ROWS:
+                    if not pattern.search(label.text):
+                        continue
+                    if block is None:
+                        block = WeekBlockMatrix(grid, start_col, end_col)
+                    row = block.percents[label.row] if reduce == 'mean' else block.values[label.row]
+                    numbers = row[np.isfinite(row)]
+                    if numbers.size:
+                        value = float(numbers.mean() if reduce == 'mean' else numbers.sum())
+                        day_totals = totals[(week_num, day_num)]
+                        # Repeated week numbers add up, like their records do
+                        day_totals[field] = day_totals.get(field, 0.0) + value
+                    break
+
+    return dict(totals)
+
+
+class _SetArrays:
+    """The working sets of a scrape as parallel arrays."""
+
+    def __init__(self, records: Iterable[Record], one_rep_maxes: Dict[str, float]):
+        sets = [record for record in records if type(record) is SetRecord]
+        maxes = {}
+        for record in sets:
+            if record.exercise_name not in maxes:
+                maxes[record.exercise_name] = lift_max(record.exercise_name, one_rep_maxes)
+
+        self.week = np.array([record.week_number for record in sets], dtype=np.int64)
+        self.day = np.array([record.day_number for record in sets], dtype=np.int64)
+        self.exercise = np.array([record.exercise_number for record in sets], dtype=np.int64)
+        self.names = [record.exercise_name for record in sets]
+        self.reps = np.array([record.reps for record in sets], dtype=np.float64)
+        self.weight = np.array([record.weight for record in sets], dtype=np.float64)
+        self.percent = np.array([np.nan if record.percent is None else record.percent for record in sets],
+                                dtype=np.float64)
+        one_rep_max = np.array([maxes[record.exercise_name] or np.nan for record in sets], dtype=np.float64)
+        self.load = self.reps * self.weight
+        # Per set, its load relative to the 1RM; NaN where the lift has no 1RM
+        self.relative_load = self.load / one_rep_max
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def _round(value: float) -> Optional[float]:
+    return None if not np.isfinite(value) else round(float(value), 1)
+
+
+def _rollup(sets: _SetArrays, keys: List[np.ndarray]) -> List[Tuple[Tuple[int, ...], int, Dict[str, Any]]]:
+    """(group key, first set index, metrics) per distinct key, in key order."""
+    if not len(sets):
+        return []
+    groups, first, inverse = np.unique(np.stack(keys, axis=1), axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    count = len(groups)
+
+    def total(weights: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        if mask is None:
+            return np.bincount(inverse, weights, minlength=count)
+        return np.bincount(inverse[mask], weights[mask], minlength=count)
+
+    n_sets = np.bincount(inverse, minlength=count)
+    reps = total(sets.reps)
+    tonnage = total(sets.load)
+
+    has_percent = ~np.isnan(sets.percent)
+    percent_sets = np.bincount(inverse[has_percent], minlength=count)
+    average_percent = total(sets.percent, has_percent) / np.where(percent_sets, percent_sets, 1)
+    average_percent[percent_sets == 0] = np.nan
+    peak_percent = np.full(count, -np.inf)
+    np.maximum.at(peak_percent, inverse[has_percent], sets.percent[has_percent])
+
+    has_max = ~np.isnan(sets.relative_load)
+    max_reps = total(sets.reps, has_max)
+    relative_intensity = 100 * total(sets.relative_load, has_max) / np.where(max_reps, max_reps, 1)
+    relative_intensity[max_reps == 0] = np.nan
+
+    return [
+        (tuple(int(value) for value in groups[group]), int(first[group]), {
+            'sets': int(n_sets[group]),
+            'reps': int(reps[group]),
+            'tonnage': _round(tonnage[group]),
+            'average_percent': _round(average_percent[group]),
+            'peak_percent': _round(peak_percent[group]),
+            'relative_intensity': _round(relative_intensity[group]),
+        })
+        for group in range(count)
+    ]
+
+
+def _agrees(field: str, computed: Optional[float], sheet: float) -> bool:
+    if computed is None:
+        return False
+    absolute, relative = TOLERANCES[field]
+    return abs(computed - sheet) <= max(absolute, relative * abs(sheet))
+
+
+def summarize(records: Iterable[Record], one_rep_maxes: Dict[str, float],
+              sheet_totals: Optional[Dict[DayKey, Dict[str, float]]] = None) -> Dict[str, Any]:
+    """
+    Rollups of parsed records per week, day and exercise (see the module
+    docstring), with each day's sheet totals checked where there are any.
+    """
+    sets = _SetArrays(records, one_rep_maxes)
+    sheet_totals = sheet_totals or {}
+
+    exercises: Dict[DayKey, List[Dict[str, Any]]] = defaultdict(list)
+    for (week_num, day_num, exercise_number), first, metrics in _rollup(sets, [sets.week, sets.day, sets.exercise]):
+        exercises[(week_num, day_num)].append(
+            {'exercise_number': exercise_number, 'exercise_name': sets.names[first], **metrics})
+
+    days: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+    days_checked = 0
+    mismatches = []
+    for (week_num, day_num), _, metrics in _rollup(sets, [sets.week, sets.day]):
+        day = {'day_number': day_num, **metrics}
+        totals = sheet_totals.get((week_num, day_num))
+        if totals:
+            days_checked += 1
+            day['sheet_totals'] = {field: round(value, 1) for field, value in totals.items()}
+            for field, value in totals.items():
+                if not _agrees(field, metrics[field], value):
+                    mismatches.append({'week_number': week_num, 'day_number': day_num, 'field': field,
+                                       'computed': metrics[field], 'sheet': round(value, 1)})
+        day['exercises'] = exercises[(week_num, day_num)]
+        days[week_num].append(day)
+
+    weeks = [{'week_number': week_num, **metrics, 'days': days[week_num]}
+             for (week_num,), _, metrics in _rollup(sets, [sets.week])]
+    program = _rollup(sets, [np.zeros(len(sets), dtype=np.int64)])
+
+    return {
+        'one_rep_maxes': one_rep_maxes,
+        'totals': program[0][2] if program else None,
+        'weeks': weeks,
+        'cross_check': {
+            'days_checked': days_checked,
+            'mismatches': mismatches,
+        },
+    }
+
+
+def summarize_sheet(grid: SheetGrid, records: Iterable[Record]) -> Dict[str, Any]:
+    """summarize() with the 1RMs and sheet totals read from the grid the records were parsed from."""
+    from scraper_api import extract_exercise_weights
+
+    return summarize(records, extract_exercise_weights(grid), read_sheet_totals(grid))
@@ -0,0 +1,93 @@
+"""
+Vectorized numeric view of a week block.
+
+A week block's set columns (start_col + 1 .. end_col) are coerced once into
+NaN-masked float matrices, so pulling the sets for an exercise is a few array
+slices and masks instead of a try/except per cell.
+"""
+
+import math
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from sheet_grid import SheetGrid
+
+MAX_REPS = 50
+MAX_WEIGHT = 500  # Totals rows have very high weights; real sets are under 500kg
+
+
+@lru_cache(maxsize=4096)
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return math.nan
+
+
+@lru_cache(maxsize=4096)
+def _to_percent(value: Any) -> float:
+    try:
+        return float(str(value).strip().replace('%', ''))
+    except (ValueError, TypeError):
+        return math.nan
+
+
+def _coerce(rows: List[List[Any]], width: int, convert) -> np.ndarray:
+    # Cells repeat heavily (rep counts, common weights), so the memoized
+    # converters do the string parsing once per distinct value
+    matrix = np.full((len(rows), width), np.nan, dtype=np.float64)
+    if width and rows:
+        matrix[:] = [[math.nan if value is None else convert(value) for value in row] for row in rows]
+    return matrix
+
+
+class WeekBlockMatrix:
+    """
+    Reps/weights/percents for the set columns of one week block.
+
+    values[r] holds every cell of sheet row r as a float (NaN when empty or not
+    numeric), which covers the reps row and the weights row of an exercise;
+    percents[r] is the same with a trailing '%' allowed.
+    """
+
+    __slots__ = ('row_start', 'values', 'percents')
+
+    def __init__(self, grid: SheetGrid, start_col: int, end_col: int,
+                 row_start: int = 0, row_end: Optional[int] = None):
+        first_col = start_col + 1
+        width = max(0, min(end_col + 1, grid.n_cols) - first_col)
+        row_end = len(grid) if row_end is None else min(row_end, len(grid))
+        rows = [row[first_col:first_col + width] for row in grid.rows[row_start:row_end]]
+
+        self.row_start = row_start
+        self.values = _coerce(rows, width, _to_float)
+        self.percents = _coerce(rows, width, _to_percent)
+
+    def has_numbers(self, row_idx: int) -> bool:
+        """True if any set column of the row holds a number."""
+        return bool(np.isfinite(self.values[row_idx - self.row_start]).any())
+
+    def exercise_sets(self, row_idx: int) -> Tuple[List[int], List[float], List[Optional[float]]]:
+        """
+        Sets for the exercise whose reps are on row_idx (weights on the next row,
+        percents on the one after). Columns without valid reps or with a missing or
+        total-sized weight are masked out.
+        """
+        offset = row_idx - self.row_start
+        reps = np.trunc(self.values[offset])
+        weights = self.values[offset + 1]
+        percents = self.percents[offset + 2]
+
+        mask = (
+            np.isfinite(reps) & (reps > 0) & (reps <= MAX_REPS)
+            & ~np.isnan(weights) & ~(weights > MAX_WEIGHT)
+        )
+
+        set_percents = percents[mask]
+        return (
+            reps[mask].astype(np.int64).tolist(),
+            weights[mask].tolist(),
+            [None if math.isnan(p) else p for p in set_percents.tolist()]
+        )
@@ -0,0 +1,156 @@
+"""
+Scraping every tab of a workbook from a single xlsx download.
+
+The CSV export returns one tab per request, so a sheet holding several
+templates ('3-Day Template', '4-Day Template', per-athlete tabs) costs a round
+trip per tab. The xlsx export returns the whole workbook at once; openpyxl
+reads it in read-only mode, streaming one tab's rows at a time. Each tab is
+turned into a SheetGrid holding the same cell text the CSV export would give,
+so the parsers don't know the difference:
+
+- the first row is dropped, like the CSV header line
+- whole numbers lose their '.0', and cells formatted as percentages read
+  "75%" rather than 0.75
+- dates read as ISO dates ("2024-01-15"); openpyxl gives them as datetimes at
+  midnight, and only a time of day is kept
+- empty cells and the NA strings read_csv treats as missing become None
+
+CLI: python scraper_api.py <sheet_id> ['3-Day Template,4-Day Template' | '*'] [athlete] [start] --workbook
+     python scraper_api.py <sheet_id | program.xlsx> --workbook --list-tabs
+"""
+
+import io
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from sheet_grid import SheetGrid, NA_VALUES
+from sheet_cache import SheetCache, get_session
+from profiler import get_profiler
+
+# openpyxl is imported lazily: only the workbook mode needs it
+
+# Cache slot for the workbook body, next to the per-tab CSV entries of the same sheet
+WORKBOOK_CACHE_KEY = '\0xlsx'
+
+# tab_name on the command line meaning every tab
+ALL_TABS = '*'
+
+WorkbookSource = Union[bytes, str]
+
+
+def fetch_workbook(sheet_id: str, cache: Optional[SheetCache] = None) -> bytes:
+    """Download the whole workbook as xlsx, revalidating against the cache when there is one"""
+    import scraper_api
+
+    url = f"{scraper_api.SHEETS_BASE_URL}/spreadsheets/d/{sheet_id}/export?format=xlsx"
+    cached = cache.load(sheet_id, WORKBOOK_CACHE_KEY) if cache else None
+
+    with get_profiler().stage('fetch'):
+        try:
+            response = get_session().get(url, timeout=30, headers=cached.validators() if cached else None)
+        except OSError as e:
+            raise Exception(f"Failed to download the workbook: {e}")
+
+        if response.status_code == 304 and cached:
+            cache.touch(cached)
+            return cached.read_body()
+        if response.status_code in (401, 403):
+            raise Exception("Access denied (403). The sheet is not publicly accessible. Please make sure the Google Sheet is shared with 'Anyone with the link' can view.")
+        if response.status_code == 404:
+            raise Exception("Sheet not found (404). Please verify the sheet ID is correct.")
+        if response.status_code >= 400:
+            raise Exception(f"Failed to download the workbook: HTTP {response.status_code}")
+
+        body = response.content
+        if cache:
+            cache.store(sheet_id, WORKBOOK_CACHE_KEY, body,
+                        etag=response.headers.get('ETag'),
+                        last_modified=response.headers.get('Last-Modified'))
+        return body
+
+
+def open_workbook(source: WorkbookSource):
+    """Open xlsx bytes or a file path in openpyxl's streaming read-only mode. Close it when done."""
+    import openpyxl
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    # data_only: formula cells hold the value Sheets last computed, as in the CSV export
+    return openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+
+def list_tabs(source: WorkbookSource) -> List[str]:
+    """Tab names of a workbook, in sheet order."""
+    workbook = open_workbook(source)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def _cell_text(cell) -> Optional[str]:
+    """A cell's value as the CSV export would write it."""
+    value = cell.value
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        if '%' in (cell.number_format or ''):
+            value = round(value * 100, 6)
+            return f'{int(value) if value == int(value) else value}%'
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+    if isinstance(value, datetime) and value.time() == time():
+        return value.date().isoformat()
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    value = str(value)
+    return None if value in NA_VALUES else value
+
+
+def workbook_grid(workbook, tab_name: str) -> SheetGrid:
+    """One tab of an open workbook as a grid, row 0 being the row after the first."""
+    if tab_name not in workbook.sheetnames:
+        raise Exception(f"Tab '{tab_name}' not found. Available tabs: {', '.join(workbook.sheetnames)}")
+
+    profile = get_profiler()
+    with profile.stage('read_xlsx'):
+        rows = workbook[tab_name].iter_rows()
+        next(rows, None)  # header line, same as the CSV export
+        grid = SheetGrid([[_cell_text(cell) for cell in row] for row in rows])
+    profile.set_sheet(len(grid), grid.n_cols)
+    return grid
+
+
+def iter_workbook_grids(source: WorkbookSource,
+                        tab_names: Optional[List[str]] = None) -> Iterator[Tuple[str, SheetGrid]]:
+    """(tab name, grid) for each tab (all tabs when tab_names is None), read one at a time."""
+    workbook = open_workbook(source)
+    try:
+        for tab_name in tab_names or workbook.sheetnames:
+            yield tab_name, workbook_grid(workbook, tab_name)
+    finally:
+        workbook.close()
+
+
+def iter_workbook_records(source: WorkbookSource, tab_names: Optional[List[str]] = None,
+                          athlete_name: str = '', start_date: str = '',
+                          parse_workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of each tab (all tabs when tab_names is None) in turn,
+    with the tab name as program_name.
+    """
+    from scraper_api import iter_template_records
+
+    for tab_name, grid in iter_workbook_grids(source, tab_names):
+        yield from iter_template_records(grid, tab_name, athlete_name, start_date, parse_workers)
+
+
+def scrape_workbook(sheet_id: str, tab_names: Optional[List[str]] = None, athlete_name: str = '',
+                    start_date: str = '', cache: Optional[SheetCache] = None,
+                    parse_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Download the workbook once and scrape the given tabs (default all)."""
+    body = fetch_workbook(sheet_id, cache)
+    return list(iter_workbook_records(body, tab_names, athlete_name, start_date, parse_workers))